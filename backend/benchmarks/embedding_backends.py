@@ -0,0 +1,118 @@
+"""
+Embedding backend comparison: load time, CPU throughput and agreement with
+the PyTorch baseline for each EMBEDDING_BACKEND.
+
+Run from the backend directory:
+    python -m benchmarks.embedding_backends --backends torch onnx int8 --output embeddings.json
+
+Accuracy is reported as the mean cosine similarity to the torch vectors for the
+same texts, and as recall@k of the torch nearest neighbours on a synthetic
+memory corpus (how many of the true top-k memories each backend retrieves).
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+from scrai_core.agents.embeddings import EMBEDDING_BACKENDS, create_embedding_backend
+
+ACTIONS = ["moved", "walked", "interacted with", "talked to", "rested near", "collected wood from", "traded with"]
+PLACES = ["the northern resource", "the river", "Agent B", "the market", "the old mill", "the forest edge", "camp"]
+
+
+def synthetic_corpus(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [
+        f"Agent {rng.choice(ACTIONS)} {rng.choice(PLACES)} at latitude {rng.uniform(-90, 90):.3f}, "
+        f"longitude {rng.uniform(-180, 180):.3f}."
+        for _ in range(size)
+    ]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = _normalize(queries) @ _normalize(corpus).T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def measure_backend(name, corpus, queries, batch_sizes, repeat):
+    started = time.perf_counter()
+    backend = create_embedding_backend(name)
+    load_seconds = time.perf_counter() - started
+    backend.encode(corpus[:8])  # warm caches
+
+    throughput = {}
+    for batch_size in batch_sizes:
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            backend.encode(corpus, batch_size=batch_size)
+            samples.append(time.perf_counter() - started)
+        throughput[str(batch_size)] = len(corpus) / min(samples)
+
+    started = time.perf_counter()
+    for query in queries[:50]:
+        backend.encode([query])
+    single_latency_ms = (time.perf_counter() - started) / min(len(queries), 50) * 1000
+
+    return {
+        "dimensions": backend.dimensions,
+        "load_seconds": load_seconds,
+        "texts_per_second": throughput,
+        "single_text_latency_ms": single_latency_ms,
+    }, backend.encode(corpus), backend.encode(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding backends on CPU.")
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=list(EMBEDDING_BACKENDS))
+    parser.add_argument("--corpus-size", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 128])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.corpus_size)
+    queries = synthetic_corpus(args.queries, seed=11)
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+
+    results = {"benchmark": "embedding_backends", "python": sys.version.split()[0], "corpus_size": len(corpus), "backends": {}}
+    baseline_corpus = baseline_queries = baseline_top_k = None
+    for name in backends:
+        try:
+            stats, corpus_vectors, query_vectors = measure_backend(name, corpus, queries, args.batch_sizes, args.repeat)
+        except Exception as e:  # e.g. optimum[onnxruntime] not installed
+            results["backends"][name] = {"error": repr(e)}
+            continue
+
+        if baseline_corpus is None:
+            baseline_corpus, baseline_queries = corpus_vectors, query_vectors
+            baseline_top_k = top_k(baseline_corpus, baseline_queries, args.k)
+        cosine = np.sum(_normalize(corpus_vectors) * _normalize(baseline_corpus), axis=1)
+        backend_top_k = top_k(corpus_vectors, query_vectors, args.k)
+        recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(backend_top_k, baseline_top_k)])
+
+        stats["accuracy"] = {
+            "mean_cosine_to_torch": float(cosine.mean()),
+            "min_cosine_to_torch": float(cosine.min()),
+            f"recall@{args.k}_vs_torch": float(recall),
+        }
+        results["backends"][name] = stats
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
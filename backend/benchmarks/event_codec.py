@@ -0,0 +1,91 @@
+"""
+Event codec benchmark: per-event encode and decode cost and entry size for
+each codec, and the cost of building the event models from decoded data
+(current schema, 1.0 committed events that need upgrading, and
+model_construct for comparison). No Redis needed.
+
+Run from the backend directory:
+    python -m benchmarks.event_codec --events 20000 --output event_codec.json
+"""
+import argparse
+import json
+import sys
+import time
+
+from scrai_core.events.codec import CODECS, get_codec
+from scrai_core.events.schemas import ActionEvent, WorldStateCommittedEvent, parse_event
+
+
+def sample_events(count: int):
+    actions, committed = [], []
+    for i in range(count):
+        action = ActionEvent(
+            entity_id=f"agent-{i % 100}",
+            sequence=i,
+            action_type="move",
+            payload={"new_latitude": 10.0 + i / 1000, "new_longitude": 20.0 - i / 1000},
+        )
+        action.mark("published")
+        action.mark("consumed")
+        action.mark("committed")
+        event = WorldStateCommittedEvent.from_action(
+            action,
+            {"latitude": 10.0, "longitude": 20.0},
+            {"latitude": action.payload["new_latitude"], "longitude": action.payload["new_longitude"]},
+        )
+        event.mark("published")
+        actions.append(action.model_dump(mode='json'))
+        committed.append(event.model_dump(mode='json'))
+    return actions, committed
+
+
+def timed(fn, items) -> float:
+    """Microseconds per item."""
+    started = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - started) / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare event codecs and decode paths.")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+    args = parser.parse_args()
+
+    actions, committed = sample_events(args.events)
+    # The same events in the 1.0 format, which embedded the whole ActionEvent
+    legacy = [
+        {**{k: v for k, v in event.items() if k not in ("action_id", "action_type")},
+         "schema_version": "1.0", "action_event": action}
+        for action, event in zip(actions, committed)
+    ]
+
+    results = {"benchmark": "event_codec", "python": sys.version.split()[0], "events": args.events, "codecs": {}}
+    for name in CODECS:
+        codec = get_codec(name)
+        encoded = [codec.encode(event) for event in committed]
+        results["codecs"][name] = {
+            "encode_us": timed(codec.encode, committed),
+            "decode_us": timed(codec.decode, encoded),
+            "bytes": sum(map(len, encoded)) / len(encoded),
+            "legacy_bytes": sum(len(codec.encode(event)) for event in legacy) / len(legacy),
+        }
+
+    results["model"] = {
+        "action_us": timed(lambda data: parse_event(ActionEvent, data), actions),
+        "action_construct_us": timed(lambda data: ActionEvent.model_construct(**data), actions),
+        "committed_us": timed(lambda data: parse_event(WorldStateCommittedEvent, data), committed),
+        "committed_construct_us": timed(lambda data: WorldStateCommittedEvent.model_construct(**data), committed),
+        "committed_legacy_us": timed(lambda data: parse_event(WorldStateCommittedEvent, data), legacy),
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
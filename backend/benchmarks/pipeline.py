@@ -0,0 +1,251 @@
+"""
+Full tick pipeline load test: agent decisions, WorldStateSystem commits,
+MemoryConsolidator memories and recall latency for a synthetic population.
+
+Needs local Postgres with pgvector (DATABASE_URL) and Redis. Use a Redis
+database that nothing else uses: the benchmark deletes the action and
+committed-event streams there before and after the run. With
+--event-bus memory the streams live in-process and Redis is not needed. Benchmark agents,
+objects and their memories are removed from Postgres afterwards.
+
+Run from the backend directory:
+    python -m benchmarks.pipeline --agents 100 --objects 50 --ticks 5 --output pipeline.json
+
+The LLM is the offline stub provider (scrai_core/core/stub_llm.py) with a
+configurable latency distribution and failure rates, so results measure the
+pipeline, not a provider. Phases
+run one after another so each stage's throughput is measured on its own:
+ticks fill the action stream, then WorldStateSystem drains it, then the
+MemoryConsolidator drains the committed stream, then recall is sampled.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from uuid import uuid4
+
+from scrai_core.agents.cognition import CognitiveAgent
+from scrai_core.agents.embeddings import embed_text, embed_texts
+from scrai_core.agents.memory import retrieve_memories
+from scrai_core.agents.memory_consolidator import MemoryConsolidator
+from scrai_core.agents.models import Agent, EpisodicMemory
+from scrai_core.core.persistence import Base, get_engine, get_session
+from scrai_core.core.simulation import Simulation
+from scrai_core.core.stub_llm import StubChatModel
+from scrai_core.events.bus import EventBus
+from scrai_core.events.inprocess import InProcessEventBus
+from scrai_core.world.models import WorldObject
+from scrai_core.world.systems import WorldStateSystem
+
+ACTION_STREAM = "action_events"
+COMMITTED_STREAM = "world_state_committed_events"
+
+
+def percentiles(samples_ms):
+    if not samples_ms:
+        return {}
+    samples_ms = sorted(samples_ms)
+    pick = lambda q: samples_ms[min(len(samples_ms) - 1, int(q * len(samples_ms)))]
+    return {"p50": statistics.median(samples_ms), "p95": pick(0.95), "p99": pick(0.99), "max": samples_ms[-1]}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+async def group_drained(event_bus: EventBus, stream: str, group: str) -> bool:
+    """True once a consumer group has been delivered every entry of a stream."""
+    last_id = await event_bus.last_id(stream)
+    groups = {info["name"]: info for info in await event_bus.group_info(stream)}
+    return last_id is None or (group in groups and groups[group]["last-delivered-id"] == last_id)
+
+
+async def drain(run, done, timeout: float) -> float:
+    """Runs a consumer until done() reports its work is finished, then stops it."""
+    started = time.perf_counter()
+    task = asyncio.create_task(run())
+    try:
+        while not await done():
+            if time.perf_counter() - started > timeout:
+                raise TimeoutError(f"Consumer did not finish within {timeout}s")
+            await asyncio.sleep(0.05)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    return time.perf_counter() - started
+
+
+def populate(db, run_id, num_agents, num_objects, rng):
+    agents = [
+        Agent(name=f"bench-{run_id}-{i}", latitude=rng.uniform(-90, 90), longitude=rng.uniform(-180, 180))
+        for i in range(num_agents)
+    ]
+    objects = [
+        WorldObject(
+            object_type="resource",
+            position=f"{rng.uniform(-90, 90):.4f},{rng.uniform(-180, 180):.4f}",
+            properties={"resource_level": 1000, "benchmark_run": run_id},
+        )
+        for _ in range(num_objects)
+    ]
+    db.add_all(agents + objects)
+    db.commit()
+    return agents, objects
+
+
+def cleanup(db, agent_ids, object_ids):
+    db.query(EpisodicMemory).filter(EpisodicMemory.agent_id.in_(agent_ids)).delete(synchronize_session=False)
+    db.query(Agent).filter(Agent.id.in_(agent_ids)).delete(synchronize_session=False)
+    db.query(WorldObject).filter(WorldObject.id.in_(object_ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+async def run_benchmark(args) -> dict:
+    rng = random.Random(args.seed)
+    run_id = uuid4().hex[:8]
+    Base.metadata.create_all(get_engine())
+    make_bus = InProcessEventBus if args.event_bus == "memory" else lambda: EventBus(args.redis_url)
+    admin_bus = make_bus()
+    await admin_bus.connect()
+    await admin_bus.delete_streams(ACTION_STREAM, COMMITTED_STREAM)
+
+    db = next(get_session())
+    agents, objects = populate(db, run_id, args.agents, args.objects, rng)
+    agent_ids = [agent.id for agent in agents]
+    object_ids = [obj.id for obj in objects]
+    results = {
+        "benchmark": "pipeline",
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "config": {
+            "agents": args.agents,
+            "objects": args.objects,
+            "ticks": args.ticks,
+            "llm_latency": args.llm_latency,
+            "llm_failure_rate": args.llm_failure_rate,
+            "llm_malformed_rate": args.llm_malformed_rate,
+            "seed": args.seed,
+            "event_bus": args.event_bus,
+            "event_codec": os.getenv("EVENT_CODEC", "orjson"),
+            "embedding_backend": os.getenv("EMBEDDING_BACKEND", "torch"),
+            "memory_vector_storage": os.getenv("MEMORY_VECTOR_STORAGE", "full"),
+        },
+    }
+    try:
+        # Load the embedding model before timing anything
+        await embed_texts(["warm-up"])
+
+        # 1. Agent decisions: every agent runs perceive -> recall -> reason -> reflect -> act
+        tick_bus = make_bus()
+        await tick_bus.connect()
+        simulation = Simulation(tick_bus, db)
+        llm = StubChatModel(
+            seed=args.seed,
+            latency=args.llm_latency,
+            failure_rate=args.llm_failure_rate,
+            malformed_rate=args.llm_malformed_rate,
+        )
+        simulation.agents = [CognitiveAgent(agent, tick_bus, cohort="benchmark", llm=llm) for agent in agents]
+        tick_seconds = []
+        for _ in range(args.ticks):
+            started = time.perf_counter()
+            await simulation.tick()
+            tick_seconds.append(time.perf_counter() - started)
+        await tick_bus.disconnect()
+        actions = await admin_bus.stream_length(ACTION_STREAM)
+        results["ticks"] = {
+            "ticks_per_second": len(tick_seconds) / sum(tick_seconds),
+            "decisions_per_second": args.agents * args.ticks / sum(tick_seconds),
+            "actions_published": actions,
+            "tick_ms": percentiles([s * 1000 for s in tick_seconds]),
+        }
+
+        # 2. WorldStateSystem: apply every published action and publish its commit
+        # Every benchmark action is valid, so the phase ends when each one has a commit;
+        # a delivered-but-unfinished action would be cut off by stopping at delivery.
+        world_system = WorldStateSystem(make_bus(), session_factory=get_session)
+
+        async def all_committed():
+            return await admin_bus.stream_length(COMMITTED_STREAM) >= actions
+
+        seconds = await drain(world_system.run_consumer, all_committed, args.timeout)
+        committed = await admin_bus.stream_length(COMMITTED_STREAM)
+        results["world_state"] = {"events": committed, "seconds": seconds, "events_per_second": committed / seconds}
+
+        # 3. MemoryConsolidator: summarise, embed and store every committed event
+        consolidator = MemoryConsolidator(make_bus(), buffer_threshold=args.buffer_threshold, llm=llm)
+        # Stopping the consolidator flushes its buffer, so delivery of the last event is enough
+        seconds = await drain(
+            consolidator.run,
+            lambda: group_drained(admin_bus, COMMITTED_STREAM, consolidator.consumer_group),
+            args.timeout,
+        )
+        memories = db.query(EpisodicMemory).filter(
+            EpisodicMemory.agent_id.in_(agent_ids), EpisodicMemory.event_type != "reflection"
+        ).count()
+        results["memory"] = {
+            "memories": memories,
+            "memories_per_event": memories / committed if committed else 0.0,
+            "seconds": seconds,
+            "memories_per_second": memories / seconds,
+        }
+
+        # 4. Recall: embed a perception summary and retrieve the relevant and recent memories
+        embed_ms, retrieve_ms = [], []
+        for _ in range(args.recall_queries):
+            agent = rng.choice(agents)
+            started = time.perf_counter()
+            query = await embed_text(f"Current position: latitude {rng.uniform(-90, 90):.4f}, longitude {rng.uniform(-180, 180):.4f}.")
+            embedded = time.perf_counter()
+            await asyncio.to_thread(retrieve_memories, agent.id, query)
+            retrieve_ms.append((time.perf_counter() - embedded) * 1000)
+            embed_ms.append((embedded - started) * 1000)
+        results["recall"] = {
+            "queries": args.recall_queries,
+            "embed_ms": percentiles(embed_ms),
+            "retrieve_ms": percentiles(retrieve_ms),
+            "total_ms": percentiles([a + b for a, b in zip(embed_ms, retrieve_ms)]),
+        }
+    finally:
+        cleanup(db, agent_ids, object_ids)
+        db.close()
+        await admin_bus.delete_streams(ACTION_STREAM, COMMITTED_STREAM)
+        await admin_bus.disconnect()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the full tick pipeline.")
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--objects", type=int, default=20)
+    parser.add_argument("--ticks", type=int, default=3)
+    parser.add_argument("--llm-latency", default="fixed:0", help='Stub LLM latency distribution, e.g. "lognormal:300,0.6".')
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-malformed-rate", type=float, default=0.0)
+    parser.add_argument("--buffer-threshold", type=int, default=100)
+    parser.add_argument("--recall-queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds to wait for a consumer to drain its stream.")
+    parser.add_argument("--event-bus", choices=["redis", "memory"], default="redis", help="Redis streams or the in-process bus.")
+    parser.add_argument("--redis-url", default=os.getenv("BENCHMARK_REDIS_URL", "redis://localhost:6379/15"))
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args))
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Spatial store benchmark: time for the whole-world queries the LOD scheduler
+and WorldStateSystem run per tick, at several agent counts. No database or
+Redis needed.
+
+Run from the backend directory:
+    python -m benchmarks.spatial --agents 1000 5000 --output spatial.json
+"""
+import argparse
+import json
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from scrai_core.world.spatial import SpatialStore, clamp_positions, validate_moves
+
+
+def timed(fn, repeat: int) -> float:
+    """Best of repeat runs, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def populate(agents: int, objects: int, seed: int = 0) -> SpatialStore:
+    rng = np.random.default_rng(seed)
+    store = SpatialStore()
+    store.load(
+        [SimpleNamespace(id=f"agent-{i}", latitude=lat, longitude=lon)
+         for i, (lat, lon) in enumerate(zip(rng.uniform(50.0, 52.0, agents), rng.uniform(-1.0, 1.0, agents)))],
+        [SimpleNamespace(id=f"object-{i}", latitude=lat, longitude=lon)
+         for i, (lat, lon) in enumerate(zip(rng.uniform(50.0, 52.0, objects), rng.uniform(-1.0, 1.0, objects)))],
+    )
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the vectorized spatial queries.")
+    parser.add_argument("--agents", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--objects", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+    args = parser.parse_args()
+
+    results = {"benchmark": "spatial", "python": sys.version.split()[0], "numpy": np.__version__, "runs": []}
+    for agents in args.agents:
+        store = populate(agents, args.objects)
+        origins = store.agents.active()[1]
+        targets = origins + np.random.default_rng(1).normal(0.0, 0.01, origins.shape)
+        results["runs"].append({
+            "agents": agents,
+            "objects": args.objects,
+            "has_neighbour_ms": timed(lambda: store.has_neighbour(1.0), args.repeat),
+            "nearest_agents_ms": timed(lambda: store.nearest_agents(args.k), args.repeat),
+            "nearest_objects_ms": timed(lambda: store.nearest_objects(args.k), args.repeat),
+            "validate_and_clamp_ms": timed(lambda: (validate_moves(origins, targets, 5.0), clamp_positions(targets)), args.repeat),
+        })
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
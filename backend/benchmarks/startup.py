@@ -0,0 +1,106 @@
+"""
+Startup benchmark: application import time, which heavy modules the import
+pulls in, warm-up duration per component and time-to-first-tick.
+
+Run from the backend directory:
+    python -m benchmarks.startup --repeat 5 --output startup.json
+    python -m benchmarks.startup --first-tick   # needs Postgres, Redis and an LLM provider
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ["torch", "sentence_transformers", "langgraph", "langchain_openai", "langchain_google_genai"]
+
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "heavy_modules": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_import(repeat: int) -> dict:
+    """Imports main.py in fresh interpreters and reports the timings."""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = []
+    heavy_modules = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE],
+            cwd=backend_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        samples.append(probe["seconds"])
+        heavy_modules = probe["heavy_modules"]
+    return {
+        "import_seconds_median": statistics.median(samples),
+        "import_seconds_min": min(samples),
+        "import_seconds_samples": samples,
+        "heavy_modules_loaded_at_import": heavy_modules,
+    }
+
+
+async def measure_first_tick() -> dict:
+    """Runs the warm-up and one simulation tick in this process."""
+    started = time.perf_counter()
+    from scrai_core.core.warmup import warm_up
+    from scrai_core.core.persistence import get_session
+    from scrai_core.core.simulation import Simulation
+    from scrai_core.events.bus import EventBus
+
+    state = await warm_up()
+    if not state.ready:
+        return {"warmup": state.as_dict()}
+
+    event_bus = EventBus()
+    await event_bus.connect()
+    db_session = next(get_session())
+    try:
+        simulation = Simulation(event_bus, db_session)
+        simulation.load_agents()
+        loaded = time.perf_counter()
+        await simulation.tick()
+        finished = time.perf_counter()
+    finally:
+        db_session.close()
+        await event_bus.disconnect()
+
+    return {
+        "warmup": state.as_dict(),
+        "agents": len(simulation.agents),
+        "load_agents_seconds": loaded - started - sum(state.component_seconds.values()),
+        "first_tick_seconds": finished - loaded,
+        "time_to_first_tick_seconds": finished - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure ScrAI cold-start costs.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of fresh-interpreter import samples.")
+    parser.add_argument("--first-tick", action="store_true", help="Also measure warm-up and time-to-first-tick.")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+    args = parser.parse_args()
+
+    results = {"benchmark": "startup", "python": sys.version.split()[0], **measure_import(args.repeat)}
+    if args.first_tick:
+        results.update(asyncio.run(measure_first_tick()))
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
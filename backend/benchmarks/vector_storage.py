@@ -0,0 +1,125 @@
+"""
+Vector storage benchmark: index size, query latency and recall@k for the
+full, half and binary MEMORY_VECTOR_STORAGE modes.
+
+Needs a local Postgres with pgvector >= 0.7 (DATABASE_URL). Run it against a
+development database only: it inserts a throwaway agent with synthetic
+memories, builds each mode's index in turn, then deletes the memories, drops
+the vector indexes and rebuilds the one MEMORY_VECTOR_STORAGE expects.
+
+Run from the backend directory:
+    python -m benchmarks.vector_storage --memories 20000 --queries 200 --output vector_storage.json
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from uuid import uuid4
+
+import numpy as np
+from sqlalchemy import insert, text
+
+from scrai_core.agents.memory import get_relevant_memories
+from scrai_core.agents.models import Agent, EpisodicMemory
+from scrai_core.core.migrations import VECTOR_INDEXES, migrate_vector_storage, run_migrations
+from scrai_core.core.persistence import Base, get_engine, get_session
+
+DIMENSIONS = 384
+
+
+def clustered_vectors(count: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors around a few centroids, closer to real memories than uniform noise."""
+    centroids = rng.normal(size=(clusters, DIMENSIONS))
+    vectors = centroids[rng.integers(0, clusters, size=count)] + 0.35 * rng.normal(size=(count, DIMENSIONS))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare compact vector storage modes.")
+    parser.add_argument("--memories", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--modes", nargs="+", default=list(VECTOR_INDEXES), choices=list(VECTOR_INDEXES))
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+    vectors = clustered_vectors(args.memories, args.clusters, rng)
+    queries = clustered_vectors(args.queries, args.clusters, rng)
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :args.k]
+
+    db = next(get_session())
+    agent = Agent(name=f"vector-storage-bench-{uuid4()}")
+    db.add(agent)
+    db.commit()
+    memory_ids = [str(uuid4()) for _ in range(args.memories)]
+    for i in range(0, args.memories, 1000):
+        db.execute(insert(EpisodicMemory.__table__), [
+            {"id": memory_ids[j], "agent_id": agent.id, "content": f"memory {j}", "event_type": "benchmark", "embedding": vectors[j]}
+            for j in range(i, min(i + 1000, args.memories))
+        ])
+    db.commit()
+    position = {memory_id: i for i, memory_id in enumerate(memory_ids)}
+
+    results = {
+        "benchmark": "vector_storage",
+        "python": sys.version.split()[0],
+        "memories": args.memories,
+        "queries": args.queries,
+        "k": args.k,
+        "bytes_per_vector": {"full": 4 * DIMENSIONS + 8, "half": 2 * DIMENSIONS + 8, "binary": DIMENSIONS // 8 + 8},
+        "modes": {},
+    }
+    try:
+        with engine.connect() as conn:
+            results["table_bytes"] = conn.execute(text("SELECT pg_table_size('episodic_memories')")).scalar()
+
+        for mode in args.modes:
+            started = time.perf_counter()
+            index_name = migrate_vector_storage(engine, mode)
+            build_seconds = time.perf_counter() - started
+            with engine.connect() as conn:
+                index_bytes = conn.execute(text(f"SELECT pg_relation_size('{index_name}')")).scalar()
+
+            latencies = []
+            recalls = []
+            for query, truth in zip(queries, exact):
+                started = time.perf_counter()
+                found = get_relevant_memories(agent.id, query, k=args.k, mode=mode)
+                latencies.append((time.perf_counter() - started) * 1000)
+                recalls.append(len({position[m.id] for m in found} & set(truth)) / args.k)
+
+            latencies.sort()
+            results["modes"][mode] = {
+                "index": index_name,
+                "index_bytes": index_bytes,
+                "index_build_seconds": build_seconds,
+                "latency_ms_p50": statistics.median(latencies),
+                "latency_ms_p95": latencies[int(0.95 * (len(latencies) - 1))],
+                f"recall@{args.k}": float(np.mean(recalls)),
+            }
+    finally:
+        db.query(EpisodicMemory).filter(EpisodicMemory.agent_id == agent.id).delete()
+        db.query(Agent).filter(Agent.id == agent.id).delete()
+        db.commit()
+        db.close()
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for index_name, _ in VECTOR_INDEXES.values():
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+        # Restore the index the configured mode expects
+        run_migrations(engine, build_vector_index=True)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
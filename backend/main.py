@@ -3,19 +3,28 @@ import os
 import asyncio
 import structlog
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from prometheus_fastapi_instrumentator import PrometheusFastApiInstrumentator
-from prometheus_client import Counter
 from typing import List
 from pydantic import BaseModel
 from scrai_core.core.logging_config import setup_logging
-from scrai_core.core.persistence import get_session
+from scrai_core.core.tracing import configure_tracing
+from scrai_core.core.warmup import WARMUP_STATE, warm_up
+from scrai_core.agents.embeddings import stop_embedding_pool
+from scrai_core.core.persistence import get_session, init_db as create_tables
 from scrai_core.core.db_init import init_db
+from scrai_core.core.migrations import migrate_vector_storage, run_migrations
+from scrai_core.core.checkpoint import CheckpointManager
+from scrai_core.core.backpressure import BackpressureController
+from scrai_core.core.runners import RunnerOrchestrator
+from scrai_core.core.lod import LodScheduler
 from scrai_core.agents.models import Agent, EpisodicMemory
 from scrai_core.world.models import WorldObject
 from scrai_core.agents.schemas import Agent as AgentSchema, EpisodicMemory as EpisodicMemorySchema
-from scrai_core.events.bus import EventBus
+from scrai_core.events.bus import get_event_bus
+from scrai_core.events.monitor import StreamLagMonitor
 from scrai_core.world.systems import WorldStateSystem
+from scrai_core.world.perception import PerceptionService
 from scrai_core.agents.memory_consolidator import MemoryConsolidator
 from scrai_core.core.simulation import Simulation
 
@@ -27,9 +36,7 @@ SIMULATION_PAUSED = asyncio.Event()
 SIMULATION_PAUSED.set() # Start in a running state
 MANUAL_TICK = asyncio.Event()
 SIMULATION_INSTANCE = None
-
-# --- Prometheus Metrics ---
-EVENTS_PROCESSED = Counter("events_processed_total", "Total number of events processed by the WorldStateSystem")
+BACKPRESSURE = None
 
 # --- FastAPI App ---
 app = FastAPI(title="ScrAI Simulation")
@@ -43,48 +50,96 @@ async def run_simulation_loop():
         if MANUAL_TICK.is_set():
             if SIMULATION_INSTANCE:
                 await SIMULATION_INSTANCE.tick()
+                WARMUP_STATE.mark_first_tick()
             MANUAL_TICK.clear()
         else:
-            # Automatic tick every 2 seconds if not paused and not manually ticked
-            if SIMULATION_INSTANCE:
+            # Automatic tick every 2 seconds if not paused and not manually ticked,
+            # slowed down or skipped while the stream consumers are lagging
+            if SIMULATION_INSTANCE and (BACKPRESSURE is None or await BACKPRESSURE.before_tick()):
                 await SIMULATION_INSTANCE.tick()
+                WARMUP_STATE.mark_first_tick()
         
         await asyncio.sleep(2)
 
 async def run_systems():
     """Runs the core systems of the simulation."""
-    global SIMULATION_INSTANCE
+    global SIMULATION_INSTANCE, BACKPRESSURE
     setup_logging()
-    event_bus = EventBus()
+    configure_tracing()
+    event_bus = get_event_bus()
     db_session = next(get_session())
+    checkpoint_manager = CheckpointManager()
+
+    # Restore the newest checkpoint plus any committed events recorded after it. By
+    # default only into empty tables; a wiped database (RESET_DB_ON_STARTUP) stays empty.
+    restore_mode = os.getenv("CHECKPOINT_RESTORE", "empty").lower()
+    if restore_mode != "never" and os.getenv("RESET_DB_ON_STARTUP", "false").lower() != "true":
+        restore_bus = get_event_bus()
+        await restore_bus.connect()
+        try:
+            await checkpoint_manager.restore_latest(restore_bus, force=restore_mode == "always")
+        finally:
+            await restore_bus.disconnect()
     
-    # Initialize and load the simulation
-    SIMULATION_INSTANCE = Simulation(event_bus, db_session)
-    SIMULATION_INSTANCE.load_agents()
+    # Load the embedding model and LLM clients once, off the event loop
+    await warm_up()
+
+    # Initialize and load the simulation, in this process or partitioned across runner processes
+    if int(os.getenv("AGENT_RUNNER_PROCESSES", "0")) > 0:
+        SIMULATION_INSTANCE = RunnerOrchestrator(get_event_bus())
+        await SIMULATION_INSTANCE.start()
+    else:
+        # Level-of-detail scheduling: agents with nothing around them think less often
+        scheduler = LodScheduler(get_event_bus()) if os.getenv("LOD_ENABLED", "false").lower() == "true" else None
+        perception = PerceptionService(get_event_bus()) if os.getenv("INCREMENTAL_PERCEPTION", "true").lower() == "true" else None
+        SIMULATION_INSTANCE = Simulation(event_bus, db_session, scheduler=scheduler, perception=perception, llm=WARMUP_STATE.agent_llm)
+        SIMULATION_INSTANCE.load_agents()
+
+    if os.getenv("BACKPRESSURE_ENABLED", "true").lower() == "true":
+        backpressure_bus = get_event_bus()
+        await backpressure_bus.connect()
+        BACKPRESSURE = BackpressureController(StreamLagMonitor(backpressure_bus))
 
     world_system = WorldStateSystem(event_bus, session_factory=get_session)
     memory_consolidator = MemoryConsolidator(event_bus)
 
-    # Instrument the process_action_event method
-    original_process_action = world_system.process_action_event
-    async def instrumented_process_action(event_data: dict):
-        await original_process_action(event_data)
-        EVENTS_PROCESSED.inc()
-    world_system.process_action_event = instrumented_process_action
-
     # Start consumers and simulation loop
     world_task = asyncio.create_task(world_system.run_consumer())
     memory_task = asyncio.create_task(memory_consolidator.run())
     simulation_task = asyncio.create_task(run_simulation_loop())
-    
-    await asyncio.gather(world_task, memory_task, simulation_task)
+    checkpoint_task = asyncio.create_task(checkpoint_manager.run(event_bus))
+    monitor_task = asyncio.create_task(StreamLagMonitor(get_event_bus()).run())
+    tasks = [world_task, memory_task, simulation_task, checkpoint_task, monitor_task]
+    if isinstance(SIMULATION_INSTANCE, Simulation):
+        for follower in (SIMULATION_INSTANCE.scheduler, SIMULATION_INSTANCE.perception):
+            if follower is not None:
+                tasks.append(asyncio.create_task(follower.run()))
+    if os.getenv("ARCHIVE_DIR"):
+        # Archive the streams to Parquet and trim archived entries from Redis
+        from scrai_core.events.archive import StreamArchiver
+        tasks.append(asyncio.create_task(StreamArchiver(get_event_bus()).run()))
+
+    await asyncio.gather(*tasks)
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize DB and start the background simulation systems."""
-    init_db()
+    """Prepare the DB and start the background simulation systems."""
+    if os.getenv("RESET_DB_ON_STARTUP", "false").lower() == "true":
+        init_db()
+    else:
+        create_tables()
+    if not run_migrations():
+        # Build the compact-storage vector index without holding up the API
+        asyncio.create_task(asyncio.to_thread(migrate_vector_storage, None, None, False))
     asyncio.create_task(run_systems())
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the agent runner and embedding worker processes."""
+    if isinstance(SIMULATION_INSTANCE, RunnerOrchestrator):
+        await SIMULATION_INSTANCE.stop()
+    await stop_embedding_pool()
+
 # --- API Models ---
 class DashboardData(BaseModel):
     agents: List[AgentSchema]
@@ -95,6 +150,18 @@ class CreateAgentRequest(BaseModel):
     latitude: float
     longitude: float
 
+# --- Health ---
+@app.get("/health/live")
+def liveness():
+    """The process is up and serving requests."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness():
+    """Ready once the warm-up has loaded the embedding model and LLM clients."""
+    status_code = 200 if WARMUP_STATE.ready else 503
+    return JSONResponse(status_code=status_code, content=WARMUP_STATE.as_dict())
+
 # --- Routes ---
 @app.get("/api/dashboard", response_model=DashboardData)
 def get_dashboard_data():
@@ -157,7 +224,7 @@ async def tick_simulation():
 @app.post("/api/simulation/reset")
 async def reset_simulation():
     """Resets the simulation state by clearing all agents, memories, and objects."""
-    global SIMULATION_INSTANCE
+    global SIMULATION_INSTANCE, BACKPRESSURE
     logger.info("Resetting simulation state...")
     
     session = next(get_session())
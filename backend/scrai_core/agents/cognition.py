@@ -1,17 +1,26 @@
+import json
 import os
-from typing import List, TypedDict
+import time
+from typing import Any, List, Optional, TypedDict
+import structlog
 from scrai_core.core.llm_provider_factory import get_chat_model_from_env
-from langgraph.graph import StateGraph, END, START
-from scrai_core.agents.models import Agent, EpisodicMemory
+from scrai_core.agents.models import Agent
+from scrai_core.agents.dedup import add_memories
 from scrai_core.events.bus import EventBus
 from scrai_core.events.schemas import ActionEvent
-from scrai_core.agents.memory import get_relevant_memories, get_memories_for_agent
+from scrai_core.agents.memory import retrieve_memories
 from scrai_core.core.persistence import get_session
-from sentence_transformers import SentenceTransformer
+from scrai_core.agents.embeddings import embed_text, embed_texts
 from scrai_core.world.models import WorldObject
+from scrai_core.world.perception import PerceptionService
+from scrai_core.world.messaging import Inbox
+from scrai_core.core.metrics import COGNITION_TICK_SECONDS, INVALID_ACTIONS, observe_stage
+from scrai_core.core.tracing import span
 import uuid
 import random
 
+logger = structlog.get_logger(__name__)
+
 class ProtoAgentPublisher:
     """
     A simple agent stub that publishes a predefined action.
@@ -32,33 +41,83 @@ class ProtoAgentPublisher:
             action_type="move",
             payload={"new_position": f"sim_{self.sequence},{self.sequence}"}
         )
+        action.mark("published")
         await self.event_bus.publish("action_events", action.model_dump(mode='json'))
         print(f"ProtoAgent {self.agent_model.name} published action: move")
 
+def parse_action(agent_id: str, content: Any) -> ActionEvent:
+    """The ActionEvent an LLM response describes; raises ValueError, KeyError or TypeError if it is not one."""
+    action_data = json.loads(content)
+    return ActionEvent(
+        event_id=str(uuid.uuid4()),
+        entity_id=agent_id,
+        sequence=0, # Placeholder
+        action_type=action_data["action_type"],
+        payload=action_data["payload"]
+    )
+
+
+def is_valid_action(response: Any) -> bool:
+    """Whether a chat model response parses as an action; hedged calls fail over from those that do not."""
+    try:
+        parse_action("", getattr(response, "content", None))
+    except (ValueError, KeyError, TypeError):
+        return False
+    return True
+
+
+def get_agent_chat_model() -> Any:
+    """
+    The chat model agents reason with. Build one per process and share it
+    between the agents, so a hedged model tracks each provider's latency
+    over every agent's calls.
+    """
+    return get_chat_model_from_env(validator=is_valid_action)
+
+
 class AgentState(TypedDict):
     agent_model: Agent
     memories: List[str]
     relevant_memories: List[str]
     nearby_objects: List[WorldObject]
     nearby_agents: List[Agent]
+    messages: List[dict]
     environmental_context: str
     next_action: ActionEvent
 
 class CognitiveAgent:
-    def __init__(self, agent_model: Agent, event_bus: EventBus):
+    def __init__(
+        self,
+        agent_model: Agent,
+        event_bus: EventBus,
+        cohort: str = "default",
+        llm=None,
+        perception: Optional[PerceptionService] = None,
+        inbox: Optional[Inbox] = None,
+    ):
         self.agent_model = agent_model
         self.event_bus = event_bus
-        self.llm = get_chat_model_from_env()
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Shared incremental world view; without one, perception queries the database every tick
+        self.perception = perception
+        # Passed in by callers that recreate agents, so the read cursor survives a reload
+        self.inbox = inbox or Inbox(event_bus, agent_model.id)
+        # Metrics label for grouping agents; keep the set of cohorts small
+        self.cohort = cohort
+        self.llm = llm or get_agent_chat_model()
+        # The last move as (latitude delta, longitude delta), repeated by continue_behavior()
+        self.last_move = None
         self.graph = self._build_graph()
 
     def _build_graph(self):
+        # Imported lazily to keep application import time low
+        from langgraph.graph import StateGraph, END, START
+
         graph = StateGraph(AgentState)
-        graph.add_node("perceive", self._perceive)
-        graph.add_node("recall", self._recall)
-        graph.add_node("reason", self._reason)
-        graph.add_node("reflect", self._reflect)
-        graph.add_node("act", self._act)
+        graph.add_node("perceive", self._timed("perceive", self._perceive))
+        graph.add_node("recall", self._timed("recall", self._recall))
+        graph.add_node("reason", self._timed("reason", self._reason))
+        graph.add_node("reflect", self._timed("reflect", self._reflect))
+        graph.add_node("act", self._timed("act", self._act))
 
         graph.add_edge(START, "perceive")
         graph.add_edge("perceive", "recall")
@@ -69,9 +128,36 @@ class CognitiveAgent:
 
         return graph.compile()
 
+    def _timed(self, stage: str, node):
+        """Wraps a graph node so it is timed per stage and cohort and traced."""
+        async def timed_node(state: AgentState) -> AgentState:
+            async with observe_stage(stage, self.cohort, agent_id=self.agent_model.id):
+                return await node(state)
+        return timed_node
+
     async def _perceive(self, state: AgentState) -> AgentState:
         """Fetches the agent's current state, recent memories, and nearby objects."""
-        print(f"Agent {self.agent_model.name}: Perceiving...")
+        logger.debug("Perceiving", agent=self.agent_model.name)
+        agent_model = None
+        if self.perception is not None:
+            agent_model, nearby_objects, nearby_agents = await self.perception.perceive(self.agent_model.id)
+        if agent_model is None:
+            agent_model, nearby_objects, nearby_agents = self._perceive_from_database()
+        # Only the messages delivered since the last tick
+        messages = await self.inbox.read_new()
+        # Generate environmental context
+        environmental_context = f"Agent is at latitude {agent_model.latitude}, longitude {agent_model.longitude}. There are {len(nearby_objects)} objects and {len(nearby_agents)} other agents in the environment."
+
+        return {
+            **state,
+            "agent_model": agent_model,
+            "nearby_objects": nearby_objects,
+            "nearby_agents": nearby_agents,
+            "messages": messages,
+            "environmental_context": environmental_context,
+        }
+    
+    def _perceive_from_database(self):
         session = next(get_session())
         try:
             agent_model = session.query(Agent).filter(Agent.id == self.agent_model.id).one()
@@ -79,38 +165,32 @@ class CognitiveAgent:
             nearby_objects = session.query(WorldObject).all()
             # Get nearby agents (all agents for now)
             nearby_agents = session.query(Agent).filter(Agent.id != self.agent_model.id).all()
-            # Generate environmental context
-            environmental_context = f"Agent is at latitude {agent_model.latitude}, longitude {agent_model.longitude}. There are {len(nearby_objects)} objects and {len(nearby_agents)} other agents in the environment."
         finally:
             session.close()
+        return agent_model, nearby_objects, nearby_agents
 
-        return {
-            **state,
-            "agent_model": agent_model,
-            "nearby_objects": nearby_objects,
-            "nearby_agents": nearby_agents,
-            "environmental_context": environmental_context,
-        }
-    
     async def _recall(self, state: AgentState) -> AgentState:
         """Retrieves relevant memories based on the current state."""
-        print(f"Agent {self.agent_model.name}: Recalling...")
+        logger.debug("Recalling", agent=self.agent_model.name)
         
         # Create a query string from the current perception
         perception_summary = f"Current position: latitude {state['agent_model'].latitude}, longitude {state['agent_model'].longitude}. Nearby objects: {len(state['nearby_objects'])}."
-        query_embedding = self.embedding_model.encode(perception_summary)
-        
-        relevant_memories = get_relevant_memories(self.agent_model.id, query_embedding)
-        memory_content = [mem.content for mem in relevant_memories]
+        query_embedding = await embed_text(perception_summary)
         
-        return {**state, "relevant_memories": memory_content}
+        # Relevant memories for reasoning and recent ones for reflection, in one query
+        recalled = retrieve_memories(self.agent_model.id, query_embedding)
+        return {
+            **state,
+            "memories": [mem.content for mem in recalled.recent],
+            "relevant_memories": [mem.content for mem in recalled.relevant],
+        }
 
     async def _reflect(self, state: AgentState) -> AgentState:
         """Generates high-level insights from recent memories."""
-        print(f"Agent {self.agent_model.name}: Reflecting...")
+        logger.debug("Reflecting", agent=self.agent_model.name)
         
-        recent_memories = get_memories_for_agent(self.agent_model.id, limit=50)
-        memory_content = [mem.content for mem in recent_memories]
+        # The recent memories recalled this tick
+        memory_content = state.get('memories') or []
         
         if not memory_content:
             return state
@@ -126,21 +206,17 @@ class CognitiveAgent:
         """
         
         response = await self.llm.ainvoke(prompt)
-        reflections = response.content.strip().split('\n')
+        reflections = [reflection for reflection in response.content.strip().split('\n') if reflection]
+        if not reflections:
+            return state
+        embeddings = await embed_texts(reflections)
         
         session = next(get_session())
         try:
-            for reflection in reflections:
-                if not reflection:
-                    continue
-                embedding = self.embedding_model.encode(reflection)
-                memory = EpisodicMemory(
-                    agent_id=self.agent_model.id,
-                    content=reflection,
-                    embedding=embedding,
-                    event_type='reflection',
-                )
-                session.add(memory)
+            add_memories(session, [
+                (self.agent_model.id, 'reflection', reflection, embedding)
+                for reflection, embedding in zip(reflections, embeddings)
+            ])
             session.commit()
         finally:
             session.close()
@@ -149,7 +225,7 @@ class CognitiveAgent:
 
     async def _reason(self, state: AgentState) -> AgentState:
         """Uses an LLM to decide the next action."""
-        print(f"Agent {self.agent_model.name}: Reasoning...")
+        logger.debug("Reasoning", agent=self.agent_model.name)
         
         objects_prompt = "\n".join([f"- Object ID: {obj.id}, Type: {obj.object_type}, Latitude: {obj.latitude}, Longitude: {obj.longitude}" for obj in state["nearby_objects"]])
         
@@ -158,6 +234,7 @@ class CognitiveAgent:
         random_lng = round(random.uniform(-180, 180), 4)
         
         agents_prompt = "\n".join([f"- Agent ID: {agent.id}, Name: {agent.name}, Latitude: {agent.latitude}, Longitude: {agent.longitude}" for agent in state.get("nearby_agents", [])])
+        messages_prompt = "\n".join([f"- From {message['sender_id']}: {message['content']}" for message in state.get("messages", [])]) or "None"
 
         prompt = f"""
         You are Agent {state['agent_model'].name}.
@@ -168,37 +245,73 @@ class CognitiveAgent:
         {objects_prompt}
         Nearby agents are:
         {agents_prompt}
+        Messages you have received since your last turn:
+        {messages_prompt}
 
         What is your next logical action? Consider your memories. If there are other agents nearby, communication is a good option. Your response must be a JSON object representing an ActionEvent. You can "move", "interact_with_object", or "communicate".
 
         Example for moving: {{"action_type": "move", "payload": {{"new_latitude": {random_lat}, "new_longitude": {random_lng}}}}}
         Example for interacting: {{"action_type": "interact_with_object", "payload": {{"object_id": "some_object_id"}}}}
         Example for communicating: {{"action_type": "communicate", "payload": {{"recipient_id": "some_agent_id", "message": "Hello there!"}}}}
+        Example for speaking to every agent within 1 km: {{"action_type": "communicate", "payload": {{"radius_km": 1.0, "message": "Hello everyone!"}}}}
         """
         
         response = await self.llm.ainvoke(prompt)
         action_json = response.content
         
         # Basic validation and parsing
-        import json
-        action_data = json.loads(action_json)
-        
-        next_action = ActionEvent(
-            event_id=str(uuid.uuid4()),
-            entity_id=self.agent_model.id,
-            sequence=0, # Placeholder
-            action_type=action_data["action_type"],
-            payload=action_data["payload"]
-        )
+        try:
+            next_action = parse_action(self.agent_model.id, action_json)
+        except (ValueError, KeyError, TypeError) as e:
+            # The agent skips this tick rather than failing the whole simulation tick
+            INVALID_ACTIONS.labels(cohort=self.cohort).inc()
+            logger.warning("LLM returned an invalid action", agent=self.agent_model.name, response=str(action_json)[:200], error=str(e))
+            return {**state, "next_action": None}
         
         return {**state, "next_action": next_action}
 
     async def _act(self, state: AgentState):
         """Publishes the decided action to the event bus."""
-        print(f"Agent {self.agent_model.name}: Acting...")
-        await self.event_bus.publish("action_events", state["next_action"].model_dump(mode='json'))
+        logger.debug("Acting", agent=self.agent_model.name)
+        if state["next_action"] is None:
+            return state
+        action = state["next_action"]
+        self.last_move = None
+        if action.action_type == "move":
+            try:
+                self.last_move = (
+                    float(action.payload["new_latitude"]) - state["agent_model"].latitude,
+                    float(action.payload["new_longitude"]) - state["agent_model"].longitude,
+                )
+            except (KeyError, TypeError, ValueError):
+                pass
+        action.mark("published")
+        await self.event_bus.publish("action_events", action.model_dump(mode='json'))
         return state
 
+    async def continue_behavior(self, latitude: float, longitude: float, event_id: Optional[str] = None) -> bool:
+        """
+        The cheap tick for agents the LOD scheduler runs at reduced detail:
+        repeats the last move from the given position without perceiving or
+        calling the LLM, as an action with event_id if given. Returns False
+        (and does nothing) if the last action was not a move.
+        """
+        if self.last_move is None:
+            return False
+        d_latitude, d_longitude = self.last_move
+        new_latitude = max(-90.0, min(90.0, latitude + d_latitude))
+        new_longitude = (longitude + d_longitude + 180.0) % 360.0 - 180.0
+        action = ActionEvent(
+            event_id=event_id or str(uuid.uuid4()),
+            entity_id=self.agent_model.id,
+            sequence=0,
+            action_type="move",
+            payload={"new_latitude": new_latitude, "new_longitude": new_longitude},
+        )
+        action.mark("published")
+        await self.event_bus.publish("action_events", action.model_dump(mode='json'))
+        return True
+
     async def tick(self):
         """Runs one cycle of the agent's cognitive loop."""
         initial_state = {
@@ -207,7 +320,13 @@ class CognitiveAgent:
             "relevant_memories": [],
             "nearby_objects": [],
             "nearby_agents": [],
+            "messages": [],
             "environmental_context": "",
             "next_action": None
         }
-        await self.graph.ainvoke(initial_state)
+        started = time.perf_counter()
+        with span("agent.tick", agent_id=self.agent_model.id, cohort=self.cohort):
+            try:
+                await self.graph.ainvoke(initial_state)
+            finally:
+                COGNITION_TICK_SECONDS.labels(cohort=self.cohort).observe(time.perf_counter() - started)
@@ -0,0 +1,240 @@
+"""
+Near-duplicate memory merging. Agents that repeat an action produce runs of
+almost identical memories, which bloat episodic_memories and crowd recall.
+add_memories compares each new memory with the agent's MEMORY_DEDUP_WINDOW
+most recent memories of the same event_type (and with the earlier memories
+of the same batch). One whose embedding is at least MEMORY_DEDUP_THRESHOLD
+cosine-similar to a memory it is compared with is not inserted. Instead,
+that memory's occurrence_count goes up and its timestamp moves to now.
+dedup_history applies the same rule to the memories already stored:
+
+    python -m scrai_core.agents.dedup [--agent-id ID] [--threshold 0.95]
+"""
+import argparse
+import os
+from datetime import UTC, datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import structlog
+from sqlalchemy import String, bindparam, column, select, true, values
+from sqlalchemy.orm import Session
+
+from scrai_core.agents.models import EpisodicMemory
+from scrai_core.core.persistence import get_session
+
+logger = structlog.get_logger(__name__)
+
+# (agent_id, event_type, content, embedding) of a memory to store
+NewMemory = Tuple[str, Optional[str], str, Sequence[float]]
+
+# Memories of one agent compared at once in dedup_history
+HISTORY_BLOCK = 256
+
+
+def _normalized(embeddings) -> np.ndarray:
+    vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def near_duplicates(
+    embeddings,
+    event_types: Sequence[Optional[str]],
+    existing_embeddings,
+    existing_types: Sequence[Optional[str]],
+    threshold: float,
+) -> List[Optional[int]]:
+    """
+    For each new memory, the memory it duplicates, or None if it is new.
+    Indices below len(existing_types) refer to an existing memory, the rest
+    to an earlier new memory (len(existing_types) + its index). The most
+    similar candidate at or above threshold with the same event_type wins.
+    """
+    if not len(event_types):
+        return []
+    count = len(existing_types)
+    vectors = _normalized(embeddings)
+    existing = _normalized(existing_embeddings) if count else np.zeros((0, vectors.shape[1]), dtype=np.float32)
+    similarity = vectors @ np.concatenate([existing, vectors]).T
+    types = list(existing_types) + list(event_types)
+    same_type = np.array(types, dtype=object)[None, :] == np.array(event_types, dtype=object)[:, None]
+    # New memories may only merge into earlier new memories that were themselves kept
+    similarity[~same_type] = -np.inf
+    similarity[:, count:][np.triu_indices(len(event_types))] = -np.inf
+
+    targets: List[Optional[int]] = []
+    merged = np.zeros(len(event_types), dtype=bool)
+    for index, row in enumerate(similarity):
+        row[count:][merged] = -np.inf
+        best = int(row.argmax())
+        merged[index] = row[best] >= threshold
+        targets.append(best if merged[index] else None)
+    return targets
+
+
+def _recent(db: Session, agent_ids: List[str], window: int) -> Dict[str, List[Tuple[str, Optional[str], np.ndarray]]]:
+    """
+    The window most recent memories of each agent as (id, event_type,
+    embedding), in one query. The LATERAL subquery reads each agent's
+    newest memories off the (agent_id, timestamp) index instead of ranking
+    its whole history.
+    """
+    agents = values(column("agent_id", String), name="agents").data([(agent_id,) for agent_id in agent_ids])
+    latest = (
+        select(EpisodicMemory.id, EpisodicMemory.event_type, EpisodicMemory.embedding)
+        .where(EpisodicMemory.agent_id == agents.c.agent_id)
+        .order_by(EpisodicMemory.timestamp.desc())
+        .limit(window)
+        .lateral("latest")
+    )
+    recent: Dict[str, List[Tuple[str, Optional[str], np.ndarray]]] = {agent_id: [] for agent_id in agent_ids}
+    rows = db.execute(
+        select(latest.c.id, agents.c.agent_id, latest.c.event_type, latest.c.embedding).select_from(agents).join(latest, true())
+    )
+    for memory_id, agent_id, event_type, embedding in rows:
+        recent[agent_id].append((memory_id, event_type, embedding))
+    return recent
+
+
+def _touch(db: Session, merged: Dict[str, int], seen_at: datetime):
+    """Adds merged occurrences to existing memories and moves their timestamp to seen_at."""
+    if not merged:
+        return
+    table = EpisodicMemory.__table__
+    db.execute(
+        table.update()
+        .where(table.c.id == bindparam("memory_id"))
+        .values(occurrence_count=table.c.occurrence_count + bindparam("merged"), timestamp=bindparam("seen_at")),
+        [{"memory_id": memory_id, "merged": count, "seen_at": seen_at} for memory_id, count in merged.items()],
+    )
+
+
+def add_memories(
+    db: Session,
+    memories: List[NewMemory],
+    threshold: Optional[float] = None,
+    window: Optional[int] = None,
+) -> int:
+    """
+    Adds memories to the session (the caller commits), merging
+    near-duplicates into existing memories. Returns how many rows were
+    inserted. A window of 0 turns merging off.
+    """
+    threshold = threshold if threshold is not None else float(os.getenv("MEMORY_DEDUP_THRESHOLD", "0.95"))
+    window = window if window is not None else int(os.getenv("MEMORY_DEDUP_WINDOW", "50"))
+    seen_at = datetime.now(UTC)
+    if window <= 0:
+        for agent_id, event_type, content, embedding in memories:
+            db.add(EpisodicMemory(agent_id=agent_id, event_type=event_type, content=content, embedding=embedding))
+        return len(memories)
+
+    by_agent: Dict[str, List[NewMemory]] = {}
+    for memory in memories:
+        by_agent.setdefault(memory[0], []).append(memory)
+    recent = _recent(db, list(by_agent), window)
+
+    merged: Dict[str, int] = {}
+    inserted = 0
+    for agent_id, agent_memories in by_agent.items():
+        existing = recent[agent_id]
+        targets = near_duplicates(
+            [embedding for _, _, _, embedding in agent_memories],
+            [event_type for _, event_type, _, _ in agent_memories],
+            [embedding for _, _, embedding in existing],
+            [event_type for _, event_type, _ in existing],
+            threshold,
+        )
+        kept: Dict[int, EpisodicMemory] = {}
+        for index, ((_, event_type, content, embedding), target) in enumerate(zip(agent_memories, targets)):
+            if target is None:
+                kept[index] = EpisodicMemory(agent_id=agent_id, event_type=event_type, content=content, embedding=embedding, occurrence_count=1)
+            elif target < len(existing):
+                memory_id = existing[target][0]
+                merged[memory_id] = merged.get(memory_id, 0) + 1
+            else:
+                kept[target - len(existing)].occurrence_count += 1
+        db.add_all(kept.values())
+        inserted += len(kept)
+    _touch(db, merged, seen_at)
+    logger.debug("Stored memories", inserted=inserted, merged=len(memories) - inserted)
+    return inserted
+
+
+def dedup_history(db: Session, agent_id: str, threshold: Optional[float] = None) -> int:
+    """
+    Merges an agent's stored near-duplicates, oldest first. Each merged
+    memory's occurrences and latest timestamp are folded into the memory it
+    duplicates, and the row is deleted. Returns how many rows were removed.
+    """
+    threshold = threshold if threshold is not None else float(os.getenv("MEMORY_DEDUP_THRESHOLD", "0.95"))
+    rows = db.execute(
+        select(EpisodicMemory.id, EpisodicMemory.event_type, EpisodicMemory.embedding, EpisodicMemory.occurrence_count, EpisodicMemory.timestamp)
+        .where(EpisodicMemory.agent_id == agent_id)
+        .order_by(EpisodicMemory.timestamp, EpisodicMemory.id)
+    ).all()
+
+    # Kept memories so far: ids, types, normalized embeddings
+    kept_ids: List[str] = []
+    kept_types: List[Optional[str]] = []
+    kept_vectors = np.zeros((0, 0), dtype=np.float32)
+    counts: Dict[str, int] = {}
+    latest: Dict[str, datetime] = {}
+    changed = set()
+    removed: List[str] = []
+    for start in range(0, len(rows), HISTORY_BLOCK):
+        block = rows[start:start + HISTORY_BLOCK]
+        targets = near_duplicates(
+            [row.embedding for row in block], [row.event_type for row in block], kept_vectors, kept_types, threshold,
+        )
+        kept_before = len(kept_ids)
+        block_kept: List[int] = []
+        for index, (row, target) in enumerate(zip(block, targets)):
+            if target is None:
+                block_kept.append(index)
+                counts[row.id], latest[row.id] = row.occurrence_count, row.timestamp
+                continue
+            keeper = kept_ids[target] if target < kept_before else block[target - kept_before].id
+            counts[keeper] += row.occurrence_count
+            latest[keeper] = max(latest[keeper], row.timestamp)
+            changed.add(keeper)
+            removed.append(row.id)
+        kept_ids.extend(block[index].id for index in block_kept)
+        kept_types.extend(block[index].event_type for index in block_kept)
+        new_vectors = _normalized([block[index].embedding for index in block_kept]) if block_kept else np.zeros((0, kept_vectors.shape[1]), dtype=np.float32)
+        kept_vectors = new_vectors if not kept_vectors.size else np.concatenate([kept_vectors, new_vectors])
+
+    if removed:
+        table = EpisodicMemory.__table__
+        db.execute(
+            table.update()
+            .where(table.c.id == bindparam("memory_id"))
+            .values(occurrence_count=bindparam("occurrences"), timestamp=bindparam("seen_at")),
+            [{"memory_id": memory_id, "occurrences": counts[memory_id], "seen_at": latest[memory_id]} for memory_id in changed],
+        )
+        db.execute(table.delete().where(table.c.id.in_(removed)))
+    logger.info("Deduplicated memories", agent_id=agent_id, memories=len(rows), removed=len(removed))
+    return len(removed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge near-duplicate episodic memories already stored.")
+    parser.add_argument("--agent-id", action="append", help="Only this agent (repeatable). Default: every agent with memories.")
+    parser.add_argument("--threshold", type=float, default=None, help="Cosine similarity to merge at (default MEMORY_DEDUP_THRESHOLD).")
+    args = parser.parse_args()
+
+    db = next(get_session())
+    try:
+        agent_ids = args.agent_id or [agent_id for (agent_id,) in db.query(EpisodicMemory.agent_id).distinct()]
+        removed = 0
+        # One transaction per agent keeps locks short while the simulation writes
+        for agent_id in agent_ids:
+            removed += dedup_history(db, agent_id, args.threshold)
+            db.commit()
+    finally:
+        db.close()
+    print(f"Merged {removed} near-duplicate memories across {len(agent_ids)} agents.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+import asyncio
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import structlog
+
+from scrai_core.agents.embeddings import EMBEDDING_DIMENSIONS
+
+logger = structlog.get_logger(__name__)
+
+
+def default_worker_count() -> int:
+    """EMBEDDING_WORKERS if set, otherwise one worker per core minus one for the event loop."""
+    configured = os.getenv("EMBEDDING_WORKERS", "auto").strip().lower()
+    if configured != "auto":
+        return int(configured)
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def _worker_main(index: int, model_factory: Callable[[], Any], shm_name: str, capacity: int,
+                 request_queue, response_conn, torch_threads: int):
+    """Entry point of an embedding worker process: one model, one result buffer."""
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+    # The pool owns and unlinks the block. Spawned workers share the parent's
+    # resource tracker, so attaching here does not register a second owner.
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        model = model_factory()
+        response_conn.send(("ready", index, None, None, None))
+        while True:
+            request = request_queue.get()
+            if request is None:
+                break
+            batch_id, texts = request
+            try:
+                vectors = np.asarray(model.encode(texts), dtype=np.float32)
+                if vectors.ndim == 1:
+                    vectors = vectors.reshape(1, -1)
+                if vectors.nbytes <= capacity:
+                    np.ndarray(vectors.shape, dtype=np.float32, buffer=shm.buf)[...] = vectors
+                    response_conn.send(("result", index, batch_id, vectors.shape, None))
+                else:
+                    # Larger than the shared buffer: fall back to pickling the array
+                    response_conn.send(("result", index, batch_id, vectors.shape, vectors))
+            except Exception as e:
+                response_conn.send(("error", index, batch_id, None, repr(e)))
+    finally:
+        shm.close()
+        response_conn.close()
+
+
+@dataclass
+class _Request:
+    texts: List[str]
+    future: asyncio.Future
+    attempts: int = 0
+
+
+@dataclass
+class _Worker:
+    index: int
+    shm: shared_memory.SharedMemory
+    request_queue: Any
+    process: Any = None
+    generation: int = 0
+    ready: bool = False
+    in_flight: Optional[List[_Request]] = None
+    batch_id: Optional[int] = None
+    restarts: int = 0
+    dispatched_at: float = 0.0
+
+
+@dataclass
+class PoolStats:
+    batches: int = 0
+    texts: int = 0
+    restarts: int = 0
+    failed_requests: int = 0
+    batch_sizes: List[int] = field(default_factory=list)
+
+
+class EmbeddingWorkerPool:
+    """
+    A pool of embedding worker processes, each holding its own model, so that
+    CPU-bound encoding never runs on (or holds the GIL of) the event loop.
+
+    Concurrent encode() calls are coalesced into batches of up to
+    max_batch_size texts. Each worker writes its float32 result into a shared
+    memory block owned by the pool, so vectors are not pickled on the way back.
+    A supervisor restarts dead workers and retries their in-flight batch once.
+    """
+    def __init__(
+        self,
+        num_workers: Optional[int] = None,
+        model_factory: Optional[Callable[[], Any]] = None,
+        max_batch_size: Optional[int] = None,
+        batch_wait_ms: Optional[float] = None,
+        dimensions: int = EMBEDDING_DIMENSIONS,
+        health_check_interval: float = 1.0,
+        startup_timeout: float = 300.0,
+    ):
+        if model_factory is None:
+            from scrai_core.agents.embeddings import get_embedding_model
+            model_factory = get_embedding_model
+        self.num_workers = num_workers if num_workers is not None else default_worker_count()
+        if self.num_workers < 1:
+            raise ValueError("EmbeddingWorkerPool needs at least one worker")
+        self.model_factory = model_factory
+        self.max_batch_size = max_batch_size or int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "64"))
+        if batch_wait_ms is None:
+            batch_wait_ms = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+        self.batch_wait = batch_wait_ms / 1000.0
+        self.dimensions = dimensions
+        self.health_check_interval = health_check_interval
+        self.startup_timeout = startup_timeout
+        self.torch_threads = int(os.getenv("EMBEDDING_WORKER_THREADS", "1"))
+        self.stats = PoolStats()
+
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: List[_Worker] = []
+        self._pending: Optional[asyncio.Queue] = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._carry: Optional[_Request] = None
+        self._batch_ids = itertools.count()
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._all_ready: Optional[asyncio.Event] = None
+        self._closed = False
+
+    # --- Lifecycle ---
+
+    async def start(self):
+        """Spawns the workers and waits until every one has loaded its model."""
+        self._loop = asyncio.get_running_loop()
+        self._pending = asyncio.Queue()
+        self._idle = asyncio.Queue()
+        self._all_ready = asyncio.Event()
+
+        capacity = self.max_batch_size * self.dimensions * np.dtype(np.float32).itemsize
+        for index in range(self.num_workers):
+            shm = shared_memory.SharedMemory(create=True, size=capacity)
+            worker = _Worker(index=index, shm=shm, request_queue=self._context.Queue())
+            self._workers.append(worker)
+            self._spawn(worker)
+
+        self._tasks = [
+            asyncio.create_task(self._dispatch_loop()),
+            asyncio.create_task(self._supervise()),
+        ]
+        await asyncio.wait_for(self._all_ready.wait(), timeout=self.startup_timeout)
+        logger.info("Embedding worker pool started", workers=self.num_workers, max_batch_size=self.max_batch_size)
+
+    async def close(self):
+        """Stops the workers and releases the shared memory blocks."""
+        self._closed = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        for worker in self._workers:
+            worker.request_queue.put(None)
+        for worker in self._workers:
+            await asyncio.to_thread(worker.process.join, 5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            self._fail_in_flight(worker, RuntimeError("Embedding worker pool closed"))
+            worker.shm.close()
+            worker.shm.unlink()
+
+        while not self._pending.empty():
+            request = self._pending.get_nowait()
+            if not request.future.done():
+                request.future.set_exception(RuntimeError("Embedding worker pool closed"))
+        logger.info("Embedding worker pool stopped", batches=self.stats.batches, texts=self.stats.texts)
+
+    def _spawn(self, worker: _Worker):
+        # Each worker gets its own result pipe. A shared multiprocessing.Queue
+        # would leave its cross-process write lock held forever if a worker
+        # died mid-write, stalling every other worker.
+        worker.ready = False
+        worker.generation += 1
+        reader, writer = self._context.Pipe(duplex=False)
+        worker.process = self._context.Process(
+            target=_worker_main,
+            args=(worker.index, self.model_factory, worker.shm.name, worker.shm.size,
+                  worker.request_queue, writer, self.torch_threads),
+            name=f"embedding-worker-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+        writer.close()
+        threading.Thread(
+            target=self._read_responses,
+            args=(worker.generation, reader),
+            name=f"embedding-worker-{worker.index}-reader",
+            daemon=True,
+        ).start()
+
+    # --- Public API ---
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        """Encodes texts in a worker process and returns a (len(texts), dimensions) float32 array."""
+        if self._closed or self._loop is None:
+            raise RuntimeError("EmbeddingWorkerPool is not running. Call start() first.")
+        if not texts:
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+
+        futures = []
+        for i in range(0, len(texts), self.max_batch_size):
+            future = self._loop.create_future()
+            await self._pending.put(_Request(texts=list(texts[i:i + self.max_batch_size]), future=future))
+            futures.append(future)
+        results = await asyncio.gather(*futures)
+        return results[0] if len(results) == 1 else np.concatenate(results)
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "workers": self.num_workers,
+            "alive": sum(1 for w in self._workers if w.process is not None and w.process.is_alive()),
+            "ready": sum(1 for w in self._workers if w.ready),
+            "busy": sum(1 for w in self._workers if w.in_flight),
+            "queued_requests": self._pending.qsize() if self._pending else 0,
+            "restarts": self.stats.restarts,
+        }
+
+    # --- Batching and dispatch ---
+
+    async def _collect_batch(self) -> List[_Request]:
+        first = self._carry or await self._pending.get()
+        self._carry = None
+        batch = [first]
+        size = len(first.texts)
+        deadline = self._loop.time() + self.batch_wait
+        while size < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                request = await asyncio.wait_for(self._pending.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if size + len(request.texts) > self.max_batch_size:
+                self._carry = request
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    async def _dispatch_loop(self):
+        while True:
+            batch = await self._collect_batch()
+            batch = [request for request in batch if not request.future.cancelled()]
+            if not batch:
+                continue
+            worker = await self._acquire_worker()
+            texts = [text for request in batch for text in request.texts]
+            worker.batch_id = next(self._batch_ids)
+            worker.in_flight = batch
+            worker.dispatched_at = time.perf_counter()
+            worker.request_queue.put((worker.batch_id, texts))
+            self.stats.batches += 1
+            self.stats.texts += len(texts)
+            self.stats.batch_sizes.append(len(texts))
+            if len(self.stats.batch_sizes) > 1000:
+                del self.stats.batch_sizes[:500]
+
+    async def _acquire_worker(self) -> _Worker:
+        # Idle tokens can go stale when a worker dies or restarts; a worker is
+        # only handed a batch while it is ready, alive and has nothing in flight,
+        # so its shared buffer is never written by two batches at once.
+        while True:
+            worker = self._workers[await self._idle.get()]
+            if worker.ready and worker.in_flight is None and worker.process.is_alive():
+                return worker
+
+    def _requeue(self, requests: List[_Request]):
+        for request in requests:
+            self._pending.put_nowait(request)
+
+    # --- Responses ---
+
+    def _read_responses(self, generation: int, reader):
+        """Runs in a thread per worker process: forwards its messages to the event loop."""
+        try:
+            while True:
+                try:
+                    message = reader.recv()
+                except (EOFError, OSError):
+                    return  # the worker exited; the supervisor handles restarts
+                try:
+                    self._loop.call_soon_threadsafe(self._on_message, message, generation)
+                except RuntimeError:
+                    return
+        finally:
+            reader.close()
+
+    def _on_message(self, message, generation: int):
+        kind, index, batch_id, shape, payload = message
+        worker = self._workers[index]
+        if generation != worker.generation:
+            return  # from a process that has since been replaced
+
+        if kind == "ready":
+            worker.ready = True
+            self._idle.put_nowait(index)
+            if all(w.ready for w in self._workers):
+                self._all_ready.set()
+            return
+
+        if batch_id != worker.batch_id or worker.in_flight is None:
+            return  # stale reply from before a restart
+        batch, worker.in_flight, worker.batch_id = worker.in_flight, None, None
+
+        if kind == "error":
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(RuntimeError(f"Embedding worker {index} failed: {payload}"))
+            self.stats.failed_requests += len(batch)
+        else:
+            if payload is not None:
+                vectors = payload
+            else:
+                vectors = np.ndarray(shape, dtype=np.float32, buffer=worker.shm.buf).copy()
+            offset = 0
+            for request in batch:
+                rows = vectors[offset:offset + len(request.texts)]
+                offset += len(request.texts)
+                if not request.future.done():
+                    request.future.set_result(rows)
+        self._idle.put_nowait(index)
+
+    # --- Supervision ---
+
+    def _fail_in_flight(self, worker: _Worker, error: Exception):
+        if worker.in_flight:
+            for request in worker.in_flight:
+                if not request.future.done():
+                    request.future.set_exception(error)
+            self.stats.failed_requests += len(worker.in_flight)
+        worker.in_flight = None
+        worker.batch_id = None
+
+    async def _supervise(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            for worker in self._workers:
+                if worker.process.is_alive():
+                    continue
+                logger.warning("Embedding worker died, restarting", worker=worker.index, exitcode=worker.process.exitcode)
+                retry = [r for r in (worker.in_flight or []) if r.attempts == 0 and not r.future.done()]
+                for request in retry:
+                    request.attempts += 1
+                worker.in_flight = [r for r in (worker.in_flight or []) if r not in retry]
+                self._fail_in_flight(worker, RuntimeError(f"Embedding worker {worker.index} died"))
+                self._requeue(retry)
+                worker.restarts += 1
+                self.stats.restarts += 1
+                # A fresh queue so the new process does not pick up the dead one's request
+                worker.request_queue = self._context.Queue()
+                self._spawn(worker)
@@ -0,0 +1,167 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Any, List, Optional
+
+import numpy as np
+
+from scrai_core.core.metrics import EMBEDDING_REQUEST_SECONDS, EMBEDDING_REQUEST_TEXTS
+
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_DIMENSIONS = 384
+
+_embedding_model = None
+_embedding_model_lock = threading.Lock()
+_embedding_pool = None
+
+
+class EmbeddingBackend:
+    """
+    Base class for embedding backends. Every backend must produce
+    EMBEDDING_DIMENSIONS-dimensional float32 vectors so they fit the
+    episodic_memories.embedding column.
+    """
+    name = "base"
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME):
+        self.model_name = model_name
+        self.model = self._load()
+        dimensions = self.model.get_sentence_embedding_dimension()
+        if dimensions != EMBEDDING_DIMENSIONS:
+            raise ValueError(
+                f"Embedding backend '{self.name}' produces {dimensions} dimensions, expected {EMBEDDING_DIMENSIONS}"
+            )
+
+    @property
+    def dimensions(self) -> int:
+        return EMBEDDING_DIMENSIONS
+
+    def _load(self) -> Any:
+        raise NotImplementedError
+
+    def encode(self, texts, batch_size: int = 32) -> np.ndarray:
+        return np.asarray(
+            self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True),
+            dtype=np.float32,
+        )
+
+
+class TorchEmbeddingBackend(EmbeddingBackend):
+    """The original PyTorch SentenceTransformer."""
+    name = "torch"
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(self.model_name, device="cpu")
+
+
+class OnnxEmbeddingBackend(EmbeddingBackend):
+    """
+    ONNX Runtime export of the model (requires optimum[onnxruntime]).
+    EMBEDDING_ONNX_FILE selects a specific export, e.g. onnx/model_O3.onnx.
+    """
+    name = "onnx"
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+        model_kwargs = {"provider": "CPUExecutionProvider"}
+        onnx_file = os.getenv("EMBEDDING_ONNX_FILE")
+        if onnx_file:
+            model_kwargs["file_name"] = onnx_file
+        return SentenceTransformer(self.model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+
+class Int8EmbeddingBackend(EmbeddingBackend):
+    """The PyTorch model with its Linear layers dynamically quantized to int8."""
+    name = "int8"
+
+    def _load(self):
+        import torch
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(self.model_name, device="cpu")
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+EMBEDDING_BACKENDS = {
+    backend.name: backend
+    for backend in (TorchEmbeddingBackend, OnnxEmbeddingBackend, Int8EmbeddingBackend)
+}
+
+
+def create_embedding_backend(name: Optional[str] = None, model_name: str = EMBEDDING_MODEL_NAME) -> EmbeddingBackend:
+    """Creates the backend named by `name` or EMBEDDING_BACKEND (torch, onnx or int8)."""
+    name = (name or os.getenv("EMBEDDING_BACKEND", "torch")).strip().lower()
+    try:
+        backend_class = EMBEDDING_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unsupported EMBEDDING_BACKEND: {name}") from None
+    return backend_class(model_name)
+
+
+def get_embedding_model() -> EmbeddingBackend:
+    """
+    Returns the process-wide embedding backend, loading it on first use.
+
+    sentence_transformers (and with it torch) is imported here rather than at
+    module import time, so importing the application stays cheap and the model
+    is loaded once per process instead of once per agent.
+    """
+    global _embedding_model
+    if _embedding_model is None:
+        with _embedding_model_lock:
+            if _embedding_model is None:
+                _embedding_model = create_embedding_backend()
+    return _embedding_model
+
+
+def is_embedding_model_loaded() -> bool:
+    return _embedding_model is not None or _embedding_pool is not None
+
+
+async def start_embedding_pool(num_workers: Optional[int] = None):
+    """Starts the shared EmbeddingWorkerPool that embed_texts() routes to."""
+    global _embedding_pool
+    from scrai_core.agents.embedding_pool import EmbeddingWorkerPool
+
+    if _embedding_pool is None:
+        pool = EmbeddingWorkerPool(num_workers=num_workers)
+        await pool.start()
+        _embedding_pool = pool
+    return _embedding_pool
+
+
+async def stop_embedding_pool():
+    global _embedding_pool
+    if _embedding_pool is not None:
+        pool, _embedding_pool = _embedding_pool, None
+        await pool.close()
+
+
+def get_embedding_pool():
+    return _embedding_pool
+
+
+async def embed_texts(texts: List[str]) -> np.ndarray:
+    """
+    Encodes texts without blocking the event loop. Uses the worker pool when it
+    is running, otherwise the in-process model on a thread.
+    """
+    path = "pool" if _embedding_pool is not None else "in_process"
+    labels = {"backend": os.getenv("EMBEDDING_BACKEND", "torch"), "path": path}
+    started = time.perf_counter()
+    try:
+        if _embedding_pool is not None:
+            return await _embedding_pool.encode(texts)
+        return await asyncio.to_thread(_encode_in_process, texts)
+    finally:
+        EMBEDDING_REQUEST_SECONDS.labels(**labels).observe(time.perf_counter() - started)
+        EMBEDDING_REQUEST_TEXTS.labels(**labels).observe(len(texts))
+
+
+def _encode_in_process(texts: List[str]) -> np.ndarray:
+    return get_embedding_model().encode(texts)
+
+
+async def embed_text(text: str) -> np.ndarray:
+    return (await embed_texts([text]))[0]
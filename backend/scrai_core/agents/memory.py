@@ -1,12 +1,15 @@
 import asyncio
+import os
 import structlog
-from typing import List
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import List, Optional
 from scrai_core.core.persistence import get_session
 from scrai_core.agents.models import EpisodicMemory
-from sentence_transformers import SentenceTransformer
-from sqlalchemy import text
+from pgvector.sqlalchemy import BIT, HALFVEC, VECTOR
+from sqlalchemy import bindparam, cast, func, select, text, union
 from scrai_core.events.bus import EventBus
-from scrai_core.events.schemas import WorldStateCommittedEvent
+from scrai_core.events.schemas import WorldStateCommittedEvent, parse_event
 
 logger = structlog.get_logger(__name__)
 
@@ -22,7 +25,7 @@ class MemorySystem:
         Processes a WorldStateCommittedEvent and logs it.
         """
         try:
-            event = WorldStateCommittedEvent.model_validate(event_data)
+            event = parse_event(WorldStateCommittedEvent, event_data)
             logger.info(
                 "MemorySystem received WorldStateCommittedEvent",
                 event_id=event.event_id,
@@ -75,18 +78,152 @@ def get_memories_for_agent(agent_id: str, limit: int = 50) -> List[EpisodicMemor
     finally:
         session.close()
 
-def get_relevant_memories(agent_id: str, query_embedding, k: int = 10) -> List[EpisodicMemory]:
+VECTOR_STORAGE_MODES = ("full", "half", "binary")
+
+
+def vector_storage_mode(mode: Optional[str] = None) -> str:
+    """
+    The MEMORY_VECTOR_STORAGE mode used for the first-pass candidate search:
+    - full: exact cosine distance over the float32 embeddings
+    - half: cosine distance over half-precision (halfvec) embeddings
+    - binary: Hamming distance over binary-quantized (bit) embeddings
+    """
+    mode = (mode or os.getenv("MEMORY_VECTOR_STORAGE", "full")).strip().lower()
+    if mode not in VECTOR_STORAGE_MODES:
+        raise ValueError(f"Unsupported MEMORY_VECTOR_STORAGE: {mode}")
+    return mode
+
+
+def first_pass_distance(query_embedding, mode: str):
+    """
+    The distance expression for the candidate search. It matches the
+    expression indexes created by scrai_core.core.migrations, so the planner
+    can scan the compact index instead of the full-precision vectors.
+    """
+    dimensions = EpisodicMemory.embedding.type.dim
+    query = cast(bindparam("query_embedding", query_embedding, type_=VECTOR(dimensions)), VECTOR(dimensions))
+    if mode == "half":
+        return cast(EpisodicMemory.embedding, HALFVEC(dimensions)).cosine_distance(cast(query, HALFVEC(dimensions)))
+    if mode == "binary":
+        return cast(func.binary_quantize(EpisodicMemory.embedding), BIT(dimensions)).hamming_distance(
+            cast(func.binary_quantize(query), BIT(dimensions))
+        )
+    return EpisodicMemory.embedding.cosine_distance(query_embedding)
+
+
+def get_relevant_memories(agent_id: str, query_embedding, k: int = 10, mode: Optional[str] = None) -> List[EpisodicMemory]:
     """
     Retrieves the most relevant memories for a given agent using vector similarity search.
 
+    In the half and binary storage modes the top k * MEMORY_RERANK_OVERSAMPLE
+    candidates are found with the compact vectors and then re-ranked by exact
+    cosine distance, all in one query.
+
     :param agent_id: The ID of the agent.
     :param query_embedding: The embedding of the query.
     :param k: The number of memories to retrieve.
+    :param mode: Overrides MEMORY_VECTOR_STORAGE.
     :return: A list of the most relevant EpisodicMemory objects.
     """
+    mode = vector_storage_mode(mode)
     session = next(get_session())
     try:
         # The <=> operator is the cosine distance operator in pgvector
-        return session.query(EpisodicMemory).filter(EpisodicMemory.agent_id == agent_id).order_by(EpisodicMemory.embedding.cosine_distance(query_embedding)).limit(k).all()
+        exact_distance = EpisodicMemory.embedding.cosine_distance(query_embedding)
+        if mode == "full":
+            return session.query(EpisodicMemory).filter(EpisodicMemory.agent_id == agent_id).order_by(exact_distance).limit(k).all()
+
+        oversample = int(os.getenv("MEMORY_RERANK_OVERSAMPLE", "4"))
+        candidates = (
+            select(EpisodicMemory.id)
+            .where(EpisodicMemory.agent_id == agent_id)
+            .order_by(first_pass_distance(query_embedding, mode))
+            .limit(k * oversample)
+            .scalar_subquery()
+        )
+        return (
+            session.query(EpisodicMemory)
+            .filter(EpisodicMemory.id.in_(candidates))
+            .order_by(exact_distance)
+            .limit(k)
+            .all()
+        )
+    finally:
+        session.close()
+
+
+@dataclass
+class RecalledMemories:
+    """The two memory sets one tick needs, from retrieve_memories."""
+    # Highest combined score first
+    relevant: List[EpisodicMemory] = field(default_factory=list)
+    # Newest first
+    recent: List[EpisodicMemory] = field(default_factory=list)
+
+
+def retrieve_memories(
+    agent_id: str,
+    query_embedding,
+    k: int = 10,
+    recent: int = 50,
+    mode: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> RecalledMemories:
+    """
+    Retrieves an agent's relevant and recent memories in one query.
+
+    The candidates are the k * MEMORY_RERANK_OVERSAMPLE nearest memories by
+    the MEMORY_VECTOR_STORAGE first-pass distance plus the `recent` newest
+    (served by the (agent_id, timestamp) index). Each candidate is scored
+    MEMORY_WEIGHT_RELEVANCE * cosine similarity
+    + MEMORY_WEIGHT_RECENCY * MEMORY_RECENCY_DECAY ** hours since its timestamp
+    + MEMORY_WEIGHT_SALIENCE * salience_score (0 when unset),
+    and the k best are the relevant set.
+
+    :param agent_id: The ID of the agent.
+    :param query_embedding: The embedding of the query.
+    :param k: The number of relevant memories to return.
+    :param recent: The number of recent memories to return.
+    :param mode: Overrides MEMORY_VECTOR_STORAGE.
+    :param now: The time recency is measured from (UTC, default now).
+    """
+    mode = vector_storage_mode(mode)
+    oversample = int(os.getenv("MEMORY_RERANK_OVERSAMPLE", "4"))
+    relevance_weight = float(os.getenv("MEMORY_WEIGHT_RELEVANCE", "1.0"))
+    recency_weight = float(os.getenv("MEMORY_WEIGHT_RECENCY", "1.0"))
+    salience_weight = float(os.getenv("MEMORY_WEIGHT_SALIENCE", "1.0"))
+    # Fraction of the recency score kept per hour
+    decay = float(os.getenv("MEMORY_RECENCY_DECAY", "0.995"))
+    # Timestamps are stored as naive UTC
+    now = (now or datetime.now(UTC)).replace(tzinfo=None)
+
+    by_distance = (
+        select(EpisodicMemory.id)
+        .where(EpisodicMemory.agent_id == agent_id)
+        .order_by(first_pass_distance(query_embedding, mode))
+        .limit(k * oversample)
+    )
+    newest = select(EpisodicMemory.id).where(EpisodicMemory.agent_id == agent_id).order_by(EpisodicMemory.timestamp.desc()).limit(recent)
+    candidates = union(by_distance, newest).subquery()
+
+    hours = func.extract("epoch", bindparam("now", now) - EpisodicMemory.timestamp) / 3600.0
+    score = (
+        relevance_weight * (1 - EpisodicMemory.embedding.cosine_distance(query_embedding))
+        + recency_weight * func.power(decay, func.greatest(hours, 0))
+        + salience_weight * func.coalesce(EpisodicMemory.salience_score, 0.0)
+    )
+    newest_rank = func.row_number().over(order_by=EpisodicMemory.timestamp.desc())
+
+    session = next(get_session())
+    try:
+        rows = (
+            session.query(EpisodicMemory, newest_rank.label("newest_rank"))
+            .filter(EpisodicMemory.id.in_(select(candidates.c.id)))
+            .order_by(score.desc())
+            .all()
+        )
     finally:
         session.close()
+    recalled = RecalledMemories(relevant=[memory for memory, _ in rows[:k]])
+    recalled.recent = [memory for memory, rank in sorted(rows, key=lambda row: row[1]) if rank <= recent]
+    return recalled
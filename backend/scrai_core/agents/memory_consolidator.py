@@ -1,84 +1,242 @@
 import asyncio
+import os
 import time
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
+
+import structlog
+
 from scrai_core.core.persistence import get_session
 from scrai_core.events.bus import EventBus
-from scrai_core.events.schemas import WorldStateCommittedEvent
-from scrai_core.agents.models import EpisodicMemory
-from sentence_transformers import SentenceTransformer
+from scrai_core.events.schemas import WorldStateCommittedEvent, parse_event
+from scrai_core.agents.dedup import add_memories
+from scrai_core.agents.embeddings import embed_texts
+from scrai_core.core.metrics import MEMORY_SUMMARIES, MEMORY_SUMMARIZED_EVENTS, observe_event_latency
+
+logger = structlog.get_logger(__name__)
+
+# (agent_id, event_type, content) of one memory to store
+Memory = Tuple[str, str, str]
+
+# Wait after a failed persist before consuming more; doubles per consecutive failure up to the maximum
+RETRY_BACKOFF_SECONDS = 1.0
+MAX_RETRY_BACKOFF_SECONDS = 60.0
+
+
+def _coordinates(state: Dict[str, Any]) -> str:
+    latitude, longitude = state.get("latitude"), state.get("longitude")
+    if latitude is None or longitude is None:
+        return "unknown"
+    return f"({latitude:.4f}, {longitude:.4f})"
+
 
 class MemoryConsolidator:
     """
     A worker that consumes world state events, consolidates them into
     agent memories, and stores them in long-term storage.
+
+    Each buffer is grouped per agent. Actions in template_actions get
+    template summaries, consecutive moves folded into one; an agent's other
+    events are summarized together by one call to the memory model.
     """
-    def __init__(self, event_bus: EventBus, buffer_threshold: int = 100):
+    def __init__(
+        self,
+        event_bus: EventBus,
+        buffer_threshold: int = 100,
+        llm: Any = None,
+        llm_summaries: Optional[bool] = None,
+        template_actions: Optional[List[str]] = None,
+        summary_concurrency: Optional[int] = None,
+    ):
         self.event_bus = event_bus
         self.buffer_threshold = buffer_threshold
+        if llm_summaries is None:
+            llm_summaries = os.getenv("MEMORY_LLM_SUMMARIES", "true").lower() == "true"
+        if llm is None and llm_summaries:
+            from scrai_core.core.llm_provider_factory import get_memory_chat_model_from_env
+            llm = get_memory_chat_model_from_env()
+        # Without a model every event gets a template summary
+        self.llm = llm if llm_summaries else None
+        self.template_actions = set(
+            template_actions if template_actions is not None
+            else [action.strip() for action in os.getenv("MEMORY_TEMPLATE_ACTIONS", "move").split(",") if action.strip()]
+        )
+        self._summary_slots = asyncio.Semaphore(summary_concurrency or int(os.getenv("MEMORY_SUMMARY_CONCURRENCY", "8")))
         self.event_buffer: List[WorldStateCommittedEvent] = []
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
         self.stream_name = "world_state_committed_events"
         self.consumer_group = "memory_consolidator_group"
         self.consumer_name = "memory_consolidator_1"
+        # Stream ID of the last committed event added to the buffer
+        self.last_received_id: Optional[str] = None
+        self._buffer_lock = asyncio.Lock()
+        self._failures = 0
 
     def _summarize_event(self, event: WorldStateCommittedEvent) -> str:
         """
         Generates a simple summary from a WorldStateCommittedEvent.
         """
-        # Initial simple summarization logic
-        if event.action_event.action_type == "move":
-            old_position = event.previous_state.get("position", "unknown")
-            new_position = event.new_state.get("position", "unknown")
-            return f"Agent moved from {old_position} to {new_position}."
-        return f"Agent performed action: {event.action_event.action_type}."
-
-    def _process_buffer(self):
+        if event.action_type == "move":
+            return f"Agent moved from {_coordinates(event.previous_state)} to {_coordinates(event.new_state)}."
+        if event.action_type == "interact_with_object" and "object_id" in event.new_state:
+            return (
+                f"Agent interacted with object {event.new_state['object_id']} "
+                f"(resource level {event.previous_state.get('resource_level')} -> {event.new_state.get('resource_level')})."
+            )
+        if event.action_type == "communicate" and "recipient_ids" in event.new_state:
+            return f"Agent sent a message to {len(event.new_state['recipient_ids'])} agent(s)."
+        return f"Agent performed action: {event.action_type}."
+
+    def _summarize_templates(self, events: List[WorldStateCommittedEvent]) -> List[Memory]:
+        """Template summaries for one agent's events, with each run of consecutive moves as one memory."""
+        memories: List[Memory] = []
+        index = 0
+        while index < len(events):
+            event = events[index]
+            end = index + 1
+            if event.action_type == "move":
+                while end < len(events) and events[end].action_type == "move":
+                    end += 1
+            if end - index > 1:
+                summary = (
+                    f"Agent moved from {_coordinates(event.previous_state)} to "
+                    f"{_coordinates(events[end - 1].new_state)} in {end - index} steps."
+                )
+            else:
+                summary = self._summarize_event(event)
+            memories.append((event.entity_id, event.action_type, summary))
+            index = end
+        return memories
+
+    async def _summarize_with_llm(self, agent_id: str, events: List[WorldStateCommittedEvent]) -> List[Memory]:
+        """One memory for one agent's events from a single memory-model call; templates if the call fails."""
+        lines = "\n".join(f"- {self._summarize_event(event)}" for event in events)
+        prompt = (
+            f"You are Agent {agent_id}. Summarize these events from your recent past "
+            f"as one short memory of one or two sentences, in the first person.\n{lines}"
+        )
+        try:
+            async with self._summary_slots:
+                response = await self.llm.ainvoke(prompt)
+            summary = str(response.content).strip()
+        except Exception as exc:
+            logger.warning("Memory summary failed, using templates", agent_id=agent_id, error=str(exc))
+            summary = ""
+        if not summary:
+            memories = self._summarize_templates(events)
+            MEMORY_SUMMARIES.labels(method="fallback").inc(len(memories))
+            MEMORY_SUMMARIZED_EVENTS.labels(method="fallback").inc(len(events))
+            return memories
+        MEMORY_SUMMARIES.labels(method="llm").inc()
+        MEMORY_SUMMARIZED_EVENTS.labels(method="llm").inc(len(events))
+        return [(agent_id, "summary", summary)]
+
+    async def summarize(self, events: List[WorldStateCommittedEvent]) -> List[Memory]:
+        """The memories for a buffer of events, grouped per agent in arrival order."""
+        by_agent: Dict[str, List[WorldStateCommittedEvent]] = {}
+        for event in events:
+            by_agent.setdefault(event.entity_id, []).append(event)
+
+        memories: List[Memory] = []
+        calls = []
+        for agent_id, agent_events in by_agent.items():
+            cheap = [event for event in agent_events if self.llm is None or event.action_type in self.template_actions]
+            rest = [event for event in agent_events if self.llm is not None and event.action_type not in self.template_actions]
+            if cheap:
+                templated = self._summarize_templates(cheap)
+                MEMORY_SUMMARIES.labels(method="template").inc(len(templated))
+                MEMORY_SUMMARIZED_EVENTS.labels(method="template").inc(len(cheap))
+                memories.extend(templated)
+            if rest:
+                calls.append(self._summarize_with_llm(agent_id, rest))
+        for summarized in await asyncio.gather(*calls):
+            memories.extend(summarized)
+        return memories
+
+    async def _process_buffer(self):
         """
         Processes the event buffer, creating and saving memories.
+        Summaries are embedded in one batch off the event loop.
+        """
+        async with self._buffer_lock:
+            # Take the buffer before awaiting so events arriving meanwhile start a new one
+            events, self.event_buffer = self.event_buffer, []
+            if not events:
+                return
+            try:
+                await self._persist(events)
+            except Exception:
+                # Keep the events for the next attempt, ahead of newer ones
+                self.event_buffer[:0] = events
+                raise
+
+    async def flush(self):
+        """Persists whatever is buffered now instead of waiting for buffer_threshold."""
+        await self._process_buffer()
+
+    async def _try_process_buffer(self):
+        """
+        Processes the buffer, keeping it and backing off on failure, so a
+        database or embedding outage delays memories instead of ending run().
         """
-        if not self.event_buffer:
-            return
+        try:
+            await self._process_buffer()
+        except Exception as exc:
+            self._failures += 1
+            delay = min(MAX_RETRY_BACKOFF_SECONDS, RETRY_BACKOFF_SECONDS * 2 ** (self._failures - 1))
+            logger.error("Failed to persist memories, retrying", events=len(self.event_buffer), retry_in=delay, error=str(exc))
+            await asyncio.sleep(delay)
+        else:
+            self._failures = 0
 
-        print(f"Processing {len(self.event_buffer)} events from buffer...")
+    async def _persist(self, events: List[WorldStateCommittedEvent]):
+        logger.debug("Processing memory buffer", events=len(events))
+        memories = await self.summarize(events)
+        embeddings = await embed_texts([content for _, _, content in memories])
         session = next(get_session())
         try:
-            for event in self.event_buffer:
-                summary = self._summarize_event(event)
-                embedding = self.embedding_model.encode(summary)
-                memory = EpisodicMemory(
-                    agent_id=event.entity_id,
-                    content=summary,
-                    embedding=embedding,
-                    event_type=event.action_event.action_type,
-                )
-                session.add(memory)
+            add_memories(session, [
+                (agent_id, event_type, content, embedding)
+                for (agent_id, event_type, content), embedding in zip(memories, embeddings)
+            ])
             session.commit()
         finally:
             session.close()
-        
-        self.event_buffer.clear()
-        print("Buffer processed and cleared.")
+
+        for event in events:
+            persisted = event.mark("memory_persisted")
+            observe_event_latency("memory_persist", event.timings.get("consumed"), persisted)
+            observe_event_latency("end_to_end", event.timings.get("action_published"), persisted)
+        logger.debug("Memory buffer processed", events=len(events), memories=len(memories))
 
     async def run(self):
         """
         Main loop to consume events and trigger consolidation.
         """
-        print("Memory Consolidator worker started...")
+        logger.info("Memory Consolidator worker started...")
         await self.event_bus.connect()
         try:
-            async for event_data in self.event_bus.subscribe(
+            async for message_id, event_data in self.event_bus.subscribe_with_ids(
                 self.stream_name, self.consumer_group, self.consumer_name
             ):
-                event = WorldStateCommittedEvent.model_validate(event_data)
+                try:
+                    event = parse_event(WorldStateCommittedEvent, event_data)
+                except (ValueError, KeyError, TypeError) as exc:
+                    logger.warning("Skipping undecodable committed event", message_id=message_id, error=str(exc))
+                    continue
+                consumed = event.mark("consumed")
+                observe_event_latency("committed_queue", event.timings.get("published"), consumed)
                 self.event_buffer.append(event)
+                self.last_received_id = message_id
 
                 if len(self.event_buffer) >= self.buffer_threshold:
-                    self._process_buffer()
+                    await self._try_process_buffer()
 
         except asyncio.CancelledError:
-            print("Memory Consolidator worker stopped.")
+            logger.info("Memory Consolidator worker stopped.")
         finally:
-            self._process_buffer()  # Process any remaining events
+            try:
+                await self._process_buffer()  # Process any remaining events
+            except Exception as exc:
+                logger.error("Failed to persist remaining memories", events=len(self.event_buffer), error=str(exc))
             await self.event_bus.disconnect()
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, Text, Float
+from sqlalchemy import Column, String, ForeignKey, DateTime, Text, Float, Integer, Index
 from sqlalchemy.orm import relationship
 from pgvector.sqlalchemy import VECTOR
 from scrai_core.core.persistence import Base
@@ -20,6 +20,8 @@ class Agent(Base):
 
 class EpisodicMemory(Base):
     __tablename__ = "episodic_memories"
+    # Serves the newest-first scans of one agent's memories (retrieve_memories, dedup)
+    __table_args__ = (Index("ix_episodic_memories_agent_id_timestamp", "agent_id", "timestamp"),)
 
     id = Column(String, primary_key=True, default=lambda: str(uuid4()))
     agent_id = Column(String, ForeignKey("agents.id"), nullable=False)
@@ -27,6 +29,8 @@ class EpisodicMemory(Base):
     content = Column(Text, nullable=False)
     event_type = Column(String, nullable=True)
     salience_score = Column(Float, nullable=True)
+    # Near-duplicates merged into this memory, itself included (scrai_core.agents.dedup)
+    occurrence_count = Column(Integer, nullable=False, default=1, server_default="1")
     embedding = Column(VECTOR(384), nullable=False)
 
     agent = relationship("Agent", back_populates="episodic_memories")
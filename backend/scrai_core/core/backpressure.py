@@ -0,0 +1,113 @@
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+import structlog
+
+from scrai_core.core.metrics import BACKPRESSURE_DELAY_SECONDS, BACKPRESSURE_STATE, BACKPRESSURE_TICKS
+from scrai_core.events.monitor import GroupLag, StreamLagMonitor
+
+logger = structlog.get_logger(__name__)
+
+NORMAL, SLOW, SKIP = "normal", "slow", "skip"
+STATE_VALUES = {NORMAL: 0, SLOW: 1, SKIP: 2}
+
+DEFAULT_GROUPS = "world_state_group,memory_consolidator_group"
+
+
+@dataclass
+class BackpressureDecision:
+    state: str
+    delay_seconds: float = 0.0
+    # The group that caused the throttling, e.g. "action_events/world_state_group"
+    group: Optional[str] = None
+    backlog: int = 0
+    lag_seconds: float = 0.0
+
+
+class BackpressureController:
+    """
+    Decides before each tick whether the consumers are keeping up, from
+    the lag (undelivered entries) plus pending (delivered, unacknowledged)
+    entries and the age of the oldest undelivered entry of each watched
+    consumer group. Past the slow thresholds the tick is delayed, in
+    proportion to how far the backlog is towards the skip thresholds; past
+    the skip thresholds the tick is skipped.
+
+    Only the groups in BACKPRESSURE_GROUPS are watched, so a group left
+    behind by a consumer that no longer runs cannot stall the simulation.
+    """
+    def __init__(
+        self,
+        monitor: StreamLagMonitor,
+        groups: Optional[List[str]] = None,
+        slow_backlog: Optional[int] = None,
+        skip_backlog: Optional[int] = None,
+        slow_lag_seconds: Optional[float] = None,
+        skip_lag_seconds: Optional[float] = None,
+        max_delay_seconds: Optional[float] = None,
+    ):
+        self.monitor = monitor
+        self.groups = groups or [g.strip() for g in os.getenv("BACKPRESSURE_GROUPS", DEFAULT_GROUPS).split(",") if g.strip()]
+        self.slow_backlog = slow_backlog or int(os.getenv("BACKPRESSURE_SLOW_BACKLOG", "500"))
+        self.skip_backlog = skip_backlog or int(os.getenv("BACKPRESSURE_SKIP_BACKLOG", "2000"))
+        self.slow_lag_seconds = slow_lag_seconds or float(os.getenv("BACKPRESSURE_SLOW_LAG_SECONDS", "10"))
+        self.skip_lag_seconds = skip_lag_seconds or float(os.getenv("BACKPRESSURE_SKIP_LAG_SECONDS", "30"))
+        self.max_delay_seconds = max_delay_seconds or float(os.getenv("BACKPRESSURE_MAX_DELAY_SECONDS", "10"))
+
+    def _pressure(self, group: GroupLag) -> float:
+        """How far a group is from the slow (0.0) to the skip (1.0) thresholds, on its worse measure."""
+        backlog = (group.lag or 0) + group.pending
+        by_backlog = (backlog - self.slow_backlog) / max(1, self.skip_backlog - self.slow_backlog)
+        by_age = (group.lag_seconds - self.slow_lag_seconds) / max(1e-9, self.skip_lag_seconds - self.slow_lag_seconds)
+        return max(by_backlog, by_age)
+
+    def decide(self, snapshot) -> BackpressureDecision:
+        """Turns a StreamLagMonitor snapshot into a decision for the next tick."""
+        watched = [group for groups in snapshot.values() for group in groups if group.group in self.groups]
+        if not watched:
+            return BackpressureDecision(NORMAL)
+        worst = max(watched, key=self._pressure)
+        pressure = self._pressure(worst)
+        if pressure < 0:
+            return BackpressureDecision(NORMAL)
+        decision = BackpressureDecision(
+            SKIP if pressure >= 1 else SLOW,
+            group=f"{worst.stream}/{worst.group}",
+            backlog=(worst.lag or 0) + worst.pending,
+            lag_seconds=worst.lag_seconds,
+        )
+        if decision.state == SLOW:
+            decision.delay_seconds = self.max_delay_seconds * pressure
+        return decision
+
+    async def check(self) -> BackpressureDecision:
+        """Reads the current lag and records the decision in the backpressure metrics."""
+        try:
+            decision = self.decide(await self.monitor.collect())
+        except Exception as e:
+            # Never stop the simulation because the lag could not be read
+            logger.error("Failed to read consumer lag, ticking normally", error=e)
+            decision = BackpressureDecision(NORMAL)
+
+        BACKPRESSURE_STATE.set(STATE_VALUES[decision.state])
+        BACKPRESSURE_DELAY_SECONDS.set(decision.delay_seconds)
+        if decision.state != NORMAL:
+            BACKPRESSURE_TICKS.labels(action="skipped" if decision.state == SKIP else "slowed").inc()
+            logger.warning(
+                "Consumers are lagging, throttling the simulation",
+                state=decision.state,
+                group=decision.group,
+                backlog=decision.backlog,
+                lag_seconds=decision.lag_seconds,
+                delay_seconds=decision.delay_seconds,
+            )
+        return decision
+
+    async def before_tick(self) -> bool:
+        """Waits out any slow-down and returns whether the next tick should run."""
+        decision = await self.check()
+        if decision.delay_seconds:
+            await asyncio.sleep(decision.delay_seconds)
+        return decision.state != SKIP
@@ -0,0 +1,291 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, UTC
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import structlog
+from sqlalchemy import DateTime, Table, delete, insert
+from sqlalchemy.orm import Session
+
+from scrai_core.agents.embeddings import EMBEDDING_DIMENSIONS
+from scrai_core.agents.models import Agent, EpisodicMemory
+from scrai_core.core.persistence import get_session
+from scrai_core.events.bus import EventBus
+from scrai_core.world.models import WorldObject
+from scrai_core.world.replay import COMMITTED_EVENT_STREAM, ReplayEngine, iter_redis_stream
+
+logger = structlog.get_logger(__name__)
+
+CHECKPOINT_FORMAT_VERSION = 1
+
+
+@dataclass
+class Checkpoint:
+    """A compact snapshot of the world plus the committed-stream offset it covers."""
+    agents: List[Dict[str, Any]]
+    world_objects: List[Dict[str, Any]]
+    memories: List[Dict[str, Any]]
+    embeddings: np.ndarray
+    stream_offset: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now(UTC).isoformat())
+
+
+def _row_to_dict(table: Table, row: Any, exclude: tuple = ()) -> Dict[str, Any]:
+    values = {}
+    for column in table.columns:
+        if column.name in exclude:
+            continue
+        value = getattr(row, column.name)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        values[column.name] = value
+    return values
+
+
+def _dict_to_row(table: Table, values: Dict[str, Any]) -> Dict[str, Any]:
+    row = dict(values)
+    for column in table.columns:
+        if isinstance(column.type, DateTime) and isinstance(row.get(column.name), str):
+            row[column.name] = datetime.fromisoformat(row[column.name])
+    return row
+
+
+def save_checkpoint(checkpoint: Checkpoint, path: str) -> None:
+    """
+    Writes a checkpoint as a compressed .npz file: the embeddings as one
+    float32 matrix and everything else as a JSON metadata blob. The file is
+    written to a temporary path and renamed so readers never see a partial file.
+    """
+    metadata = {
+        "format_version": CHECKPOINT_FORMAT_VERSION,
+        "created_at": checkpoint.created_at,
+        "stream_offset": checkpoint.stream_offset,
+        "agents": checkpoint.agents,
+        "world_objects": checkpoint.world_objects,
+        "memories": checkpoint.memories,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(
+            f,
+            metadata=np.frombuffer(json.dumps(metadata).encode("utf-8"), dtype=np.uint8),
+            embeddings=np.asarray(checkpoint.embeddings, dtype=np.float32),
+        )
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str) -> Checkpoint:
+    """Reads a checkpoint written by save_checkpoint."""
+    with np.load(path) as data:
+        metadata = json.loads(data["metadata"].tobytes().decode("utf-8"))
+        embeddings = data["embeddings"]
+    if metadata.get("format_version") != CHECKPOINT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported checkpoint format version in {path}: {metadata.get('format_version')}")
+    return Checkpoint(
+        agents=metadata["agents"],
+        world_objects=metadata["world_objects"],
+        memories=metadata["memories"],
+        embeddings=embeddings,
+        stream_offset=metadata["stream_offset"],
+        created_at=metadata["created_at"],
+    )
+
+
+class CheckpointManager:
+    """
+    Periodically snapshots agents, world objects and memory embeddings to
+    local files, and restores the newest snapshot plus a tail replay of the
+    committed-event stream at startup.
+    """
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        interval_seconds: Optional[float] = None,
+        keep: Optional[int] = None,
+        session_factory: Callable = get_session,
+        stream_name: str = COMMITTED_EVENT_STREAM,
+        archive_directory: Optional[str] = None,
+    ):
+        self.directory = directory or os.getenv("CHECKPOINT_DIR", "checkpoints")
+        self.interval_seconds = interval_seconds or float(os.getenv("CHECKPOINT_INTERVAL_SECONDS", "300"))
+        self.keep = keep if keep is not None else int(os.getenv("CHECKPOINT_KEEP", "3"))
+        if self.keep < 1:
+            raise ValueError(f"CHECKPOINT_KEEP must be at least 1, got {self.keep}")
+        self.session_factory = session_factory
+        self.stream_name = stream_name
+        # Committed events trimmed from Redis by the StreamArchiver are read from here
+        self.archive_directory = archive_directory or os.getenv("ARCHIVE_DIR")
+
+    def list_checkpoints(self) -> List[str]:
+        """Returns checkpoint paths, oldest first."""
+        return sorted(glob.glob(os.path.join(self.directory, "checkpoint-*.npz")))
+
+    def latest_checkpoint(self) -> Optional[str]:
+        checkpoints = self.list_checkpoints()
+        return checkpoints[-1] if checkpoints else None
+
+    def snapshot(self, db: Session, stream_offset: Optional[str]) -> Checkpoint:
+        """Reads the current world state from the database into a Checkpoint."""
+        agents = [_row_to_dict(Agent.__table__, row) for row in db.query(Agent).all()]
+        world_objects = [_row_to_dict(WorldObject.__table__, row) for row in db.query(WorldObject).all()]
+
+        memories = []
+        embeddings = []
+        for memory in db.query(EpisodicMemory).order_by(EpisodicMemory.timestamp).yield_per(1000):
+            memories.append(_row_to_dict(EpisodicMemory.__table__, memory, exclude=("embedding",)))
+            embeddings.append(np.asarray(memory.embedding, dtype=np.float32))
+
+        return Checkpoint(
+            agents=agents,
+            world_objects=world_objects,
+            memories=memories,
+            embeddings=np.stack(embeddings) if embeddings else np.zeros((0, EMBEDDING_DIMENSIONS), dtype=np.float32),
+            stream_offset=stream_offset,
+        )
+
+    def write_checkpoint(self, stream_offset: Optional[str]) -> str:
+        """Snapshots the database to a new checkpoint file and prunes old ones."""
+        os.makedirs(self.directory, exist_ok=True)
+        db = next(self.session_factory())
+        try:
+            checkpoint = self.snapshot(db, stream_offset)
+        finally:
+            db.close()
+
+        path = os.path.join(self.directory, f"checkpoint-{datetime.now(UTC).strftime('%Y%m%dT%H%M%S%fZ')}.npz")
+        save_checkpoint(checkpoint, path)
+        for old_path in self.list_checkpoints()[:-self.keep]:
+            os.remove(old_path)
+
+        logger.info(
+            "Checkpoint written",
+            path=path,
+            agents=len(checkpoint.agents),
+            world_objects=len(checkpoint.world_objects),
+            memories=len(checkpoint.memories),
+            stream_offset=stream_offset,
+        )
+        return path
+
+    def restore(self, db: Session, checkpoint: Checkpoint, chunk_size: int = 1000) -> None:
+        """Replaces the contents of the world tables with the checkpoint's rows."""
+        db.execute(delete(EpisodicMemory.__table__))
+        db.execute(delete(WorldObject.__table__))
+        db.execute(delete(Agent.__table__))
+
+        tables = [
+            (Agent.__table__, [_dict_to_row(Agent.__table__, row) for row in checkpoint.agents]),
+            (WorldObject.__table__, [_dict_to_row(WorldObject.__table__, row) for row in checkpoint.world_objects]),
+            (EpisodicMemory.__table__, [
+                {**_dict_to_row(EpisodicMemory.__table__, row), "embedding": embedding}
+                for row, embedding in zip(checkpoint.memories, checkpoint.embeddings)
+            ]),
+        ]
+        for table, rows in tables:
+            for i in range(0, len(rows), chunk_size):
+                db.execute(insert(table), rows[i:i + chunk_size])
+        db.commit()
+
+    def has_world_state(self, db: Session) -> bool:
+        """Whether any agent, world object or memory is stored."""
+        return any(db.query(model.id).first() is not None for model in (Agent, WorldObject, EpisodicMemory))
+
+    async def restore_latest(self, event_bus: Optional[EventBus] = None, force: bool = False) -> bool:
+        """
+        Restores the newest checkpoint, then replays committed events recorded
+        after its stream offset: first those already archived to disk (and
+        possibly trimmed from Redis), then the rest from Redis. Restoring
+        replaces the world tables, so unless force is set it only happens when
+        they are empty. Returns False if nothing was restored.
+
+        Episodic memories are restored as of the checkpoint only: the tail
+        replay re-applies world events, and memories written after the
+        snapshot are lost.
+        """
+        path = self.latest_checkpoint()
+        if path is None:
+            logger.info("No checkpoint found, starting from the current database state.")
+            return False
+
+        started = time.perf_counter()
+        db = next(self.session_factory())
+        try:
+            if not force and await asyncio.to_thread(self.has_world_state, db):
+                logger.info("Database already holds world state, not restoring the checkpoint.", path=path)
+                return False
+            checkpoint = await asyncio.to_thread(load_checkpoint, path)
+            await asyncio.to_thread(self.restore, db, checkpoint)
+
+            engine = ReplayEngine(
+                agents={row["id"]: dict(row) for row in checkpoint.agents},
+                world_objects={
+                    row["id"]: {**row, "properties": dict(row.get("properties") or {})}
+                    for row in checkpoint.world_objects
+                },
+            )
+            offset = checkpoint.stream_offset
+            if self.archive_directory and os.path.isdir(self.archive_directory):
+                from scrai_core.events.archive import iter_archive
+                engine.apply_all(iter_archive(self.archive_directory, self.stream_name, start_after=offset))
+                offset = engine.stats.last_stream_id or offset
+            if event_bus is not None:
+                start = f"({offset}" if offset else "-"
+                await engine.apply_stream(iter_redis_stream(event_bus, self.stream_name, start=start))
+            if engine.stats.events_applied:
+                await asyncio.to_thread(engine.write, db)
+        finally:
+            db.close()
+
+        logger.info(
+            "Checkpoint restored",
+            path=path,
+            stream_offset=checkpoint.stream_offset,
+            tail_events=engine.stats.events_applied,
+            seconds=time.perf_counter() - started,
+        )
+        return True
+
+    async def run(self, event_bus: EventBus):
+        """Writes a checkpoint every interval_seconds until cancelled."""
+        logger.info("Checkpoint writer starting...", directory=self.directory, interval_seconds=self.interval_seconds)
+        try:
+            while True:
+                await asyncio.sleep(self.interval_seconds)
+                try:
+                    # Read the offset before the snapshot; replaying a few already
+                    # applied events on restore is harmless because they are idempotent.
+                    stream_offset = await event_bus.last_id(self.stream_name)
+                    await asyncio.to_thread(self.write_checkpoint, stream_offset)
+                except Exception as e:
+                    logger.error("Failed to write checkpoint", error=e)
+        except asyncio.CancelledError:
+            logger.info("Checkpoint writer stopped.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Restore the newest checkpoint plus the committed events recorded after it.")
+    parser.add_argument("--force", action="store_true", help="Replace the world tables even if they already hold data.")
+    parser.add_argument("--no-redis", action="store_true", help="Replay only the on-disk archive, not the Redis tail.")
+    args = parser.parse_args()
+
+    async def restore() -> bool:
+        if args.no_redis:
+            return await CheckpointManager().restore_latest(force=args.force)
+        event_bus = EventBus()
+        await event_bus.connect()
+        try:
+            return await CheckpointManager().restore_latest(event_bus, force=args.force)
+        finally:
+            await event_bus.disconnect()
+
+    print("Checkpoint restored." if asyncio.run(restore()) else "Nothing restored.")
+
+
+if __name__ == "__main__":
+    main()
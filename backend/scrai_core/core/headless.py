@@ -0,0 +1,210 @@
+"""
+Headless fast-forward runner: loads a scenario and runs ticks back to back
+without the web stack, waiting after each tick until WorldStateSystem has
+applied every action and the MemoryConsolidator has stored every memory.
+
+    python -m scrai_core.core.headless --scenario village --reset --ticks 50 --output run.json
+
+Set LLM_PROVIDER=stub to run without network access.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import structlog
+from sqlalchemy import func
+
+from scrai_core.agents.embeddings import stop_embedding_pool
+from scrai_core.agents.memory_consolidator import MemoryConsolidator
+from scrai_core.agents.models import Agent, EpisodicMemory
+from scrai_core.core.logging_config import setup_logging
+from scrai_core.core.migrations import run_migrations
+from scrai_core.core.persistence import get_session, init_db as create_tables
+from scrai_core.core.simulation import Simulation
+from scrai_core.core.warmup import warm_up
+from scrai_core.events.bus import EventBus, get_event_bus, parse_stream_id
+from scrai_core.scenarios.loader import apply_scenario, clear_world, load_scenario
+from scrai_core.world.models import WorldObject
+from scrai_core.world.systems import WorldStateSystem
+
+logger = structlog.get_logger(__name__)
+
+
+def _reached(processed_id: Optional[str], target_id: Optional[str]) -> bool:
+    if target_id is None:
+        return True
+    return processed_id is not None and parse_stream_id(processed_id) >= parse_stream_id(target_id)
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        "max": ordered[-1],
+    }
+
+
+class HeadlessRunner:
+    """Runs the simulation tick after tick, draining both consumers between ticks."""
+    def __init__(self, ticks: int, drain_timeout: float = 300.0, session_factory: Callable = get_session):
+        self.ticks = ticks
+        self.drain_timeout = drain_timeout
+        self.session_factory = session_factory
+
+    async def _wait_for(self, condition: Callable[[], bool], what: str):
+        deadline = time.perf_counter() + self.drain_timeout
+        while not condition():
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"Timed out after {self.drain_timeout}s waiting for {what}")
+            await asyncio.sleep(0.005)
+
+    async def _drain(
+        self,
+        admin_bus: EventBus,
+        stream: str,
+        previous_id: Optional[str],
+        processed_id: Callable[[], Optional[str]],
+        what: str,
+    ) -> Optional[str]:
+        """Waits until a consumer has handled every entry added to stream since previous_id."""
+        target_id = await admin_bus.last_id(stream)
+        if target_id != previous_id:
+            await self._wait_for(lambda: _reached(processed_id(), target_id), what)
+        return target_id
+
+    async def run(self) -> Dict[str, Any]:
+        state = await warm_up()
+        if not state.ready:
+            raise RuntimeError(f"Warm-up failed: {state.error}")
+
+        admin_bus, sim_bus = get_event_bus(), get_event_bus()
+        await admin_bus.connect()
+        await sim_bus.connect()
+        world_system = WorldStateSystem(get_event_bus(), session_factory=self.session_factory)
+        consolidator = MemoryConsolidator(get_event_bus())
+        consumers = [
+            asyncio.create_task(world_system.run_consumer()),
+            asyncio.create_task(consolidator.run()),
+        ]
+
+        db = next(self.session_factory())
+        try:
+            simulation = Simulation(sim_bus, db, llm=state.agent_llm)
+            simulation.load_agents()
+            memories_before = db.query(EpisodicMemory).count()
+            actions_before = await admin_bus.stream_length(world_system.action_event_stream)
+            commits_before = await admin_bus.stream_length(world_system.committed_event_stream)
+            action_id = await admin_bus.last_id(world_system.action_event_stream)
+            commit_id = await admin_bus.last_id(world_system.committed_event_stream)
+
+            timings = {"think": [], "world": [], "memory": [], "tick": []}
+            started = time.perf_counter()
+            for tick in range(self.ticks):
+                tick_started = time.perf_counter()
+                await simulation.tick()
+                thought = time.perf_counter()
+                action_id = await self._drain(
+                    admin_bus, world_system.action_event_stream, action_id,
+                    lambda: world_system.last_processed_id, "WorldStateSystem",
+                )
+                applied = time.perf_counter()
+                commit_id = await self._drain(
+                    admin_bus, world_system.committed_event_stream, commit_id,
+                    lambda: consolidator.last_received_id, "MemoryConsolidator",
+                )
+                await consolidator.flush()
+                finished = time.perf_counter()
+
+                timings["think"].append(thought - tick_started)
+                timings["world"].append(applied - thought)
+                timings["memory"].append(finished - applied)
+                timings["tick"].append(finished - tick_started)
+                logger.info("Headless tick complete", tick=tick + 1, seconds=finished - tick_started)
+            elapsed = time.perf_counter() - started
+
+            actions = await admin_bus.stream_length(world_system.action_event_stream) - actions_before
+            commits = await admin_bus.stream_length(world_system.committed_event_stream) - commits_before
+            db.expire_all()
+            memories = db.query(EpisodicMemory).count() - memories_before
+            return {
+                "ticks": self.ticks,
+                "agents": len(simulation.agents),
+                "seconds": elapsed,
+                "ticks_per_second": self.ticks / elapsed if elapsed else None,
+                "actions": actions,
+                "actions_per_second": actions / elapsed if elapsed else None,
+                "commits": commits,
+                "memories": memories,
+                "tick_seconds": {stage: _summarize(samples) for stage, samples in timings.items()},
+                "final_state": self._final_state(db),
+            }
+        finally:
+            db.close()
+            for task in consumers:
+                task.cancel()
+            await asyncio.gather(*consumers, return_exceptions=True)
+            await sim_bus.disconnect()
+            await admin_bus.disconnect()
+            await stop_embedding_pool()
+
+    def _final_state(self, db) -> Dict[str, Any]:
+        memory_counts = dict(
+            db.query(EpisodicMemory.agent_id, func.count(EpisodicMemory.id)).group_by(EpisodicMemory.agent_id).all()
+        )
+        return {
+            "agents": [
+                {
+                    "id": agent.id,
+                    "name": agent.name,
+                    "latitude": agent.latitude,
+                    "longitude": agent.longitude,
+                    "memories": memory_counts.get(agent.id, 0),
+                }
+                for agent in db.query(Agent).order_by(Agent.name).all()
+            ],
+            "world_objects": [
+                {"id": obj.id, "object_type": obj.object_type, "position": obj.position, "properties": obj.properties}
+                for obj in db.query(WorldObject).order_by(WorldObject.id).all()
+            ],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the simulation headless, as fast as the pipeline allows.")
+    parser.add_argument("--scenario", help="Scenario YAML file, or the name of a prefab in scrai_core/scenarios/prefabs.")
+    parser.add_argument("--reset", action="store_true", help="Delete all agents, objects and memories before loading the scenario.")
+    parser.add_argument("--ticks", type=int, default=10)
+    parser.add_argument("--drain-timeout", type=float, default=300.0, help="Seconds to wait for the consumers after a tick.")
+    parser.add_argument("--output", help="Write the JSON summary to this file as well as stdout.")
+    args = parser.parse_args()
+
+    setup_logging()
+    create_tables()
+    run_migrations(build_vector_index=True)
+    db = next(get_session())
+    try:
+        if args.reset:
+            clear_world(db)
+        if args.scenario:
+            apply_scenario(db, load_scenario(args.scenario))
+    finally:
+        db.close()
+
+    summary = asyncio.run(HeadlessRunner(args.ticks, drain_timeout=args.drain_timeout).run())
+    summary["scenario"] = args.scenario
+    output = json.dumps(summary, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
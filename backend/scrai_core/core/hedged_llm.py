@@ -0,0 +1,133 @@
+"""
+Hedged requests across several chat models. A HedgedChatModel sends a
+prompt to its first model; if no answer has come back by that model's
+LLM_HEDGE_PERCENTILE latency, it sends the same prompt to the next model
+as well. The first valid response wins and the requests still running are
+cancelled. A model that fails or answers with nothing usable is failed
+over from at once. Latency is tracked per model from its own successful
+calls, so a provider that is usually fast is hedged early and a slow one
+late. Configured with LLM_PROVIDERS (see llm_provider_factory).
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import structlog
+
+from scrai_core.core.metrics import LLM_HEDGE_EVENTS
+
+logger = structlog.get_logger(__name__)
+
+
+def has_content(response: Any) -> bool:
+    """The default validity check: the response carries non-blank text."""
+    return bool(str(getattr(response, "content", "") or "").strip())
+
+
+class LatencyTracker:
+    """Recent successful call latencies of one model, for its hedging threshold."""
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+
+class HedgedChatModel:
+    """Answers ainvoke() from the first of several (name, chat model) pairs to respond validly."""
+    def __init__(
+        self,
+        models: Sequence[Tuple[str, Any]],
+        percentile: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        default_delay: Optional[float] = None,
+        window: Optional[int] = None,
+        validator: Optional[Callable[[Any], bool]] = None,
+    ):
+        if not models:
+            raise ValueError("HedgedChatModel needs at least one model")
+        self.models = list(models)
+        self.percentile = percentile or float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+        # Until a model has this many samples it is hedged after default_delay
+        self.min_samples = min_samples or int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+        self.default_delay = default_delay or float(os.getenv("LLM_HEDGE_DEFAULT_SECONDS", "5.0"))
+        window = window or int(os.getenv("LLM_HEDGE_WINDOW", "200"))
+        self.latency: Dict[str, LatencyTracker] = {name: LatencyTracker(window) for name, _ in self.models}
+        # Decides whether a response wins or is failed over from; callers pass a stricter parse
+        self.validator = validator or has_content
+
+    def hedge_delay(self, name: str) -> float:
+        """Seconds to wait on a model before sending the prompt to the next one."""
+        tracker = self.latency[name]
+        if len(tracker.samples) < self.min_samples:
+            return self.default_delay
+        return tracker.percentile(self.percentile)
+
+    async def _call(self, name: str, model: Any, prompt: Any, kwargs: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        response = await model.ainvoke(prompt, **kwargs)
+        if self.validator(response):
+            self.latency[name].observe(time.perf_counter() - started)
+        return response
+
+    async def ainvoke(self, prompt: Any, **kwargs: Any) -> Any:
+        # task -> (index into models, time it was sent)
+        running: Dict[asyncio.Task, Tuple[int, float]] = {}
+        next_index = 0
+        last_error: Optional[BaseException] = None
+
+        def send():
+            nonlocal next_index
+            name, model = self.models[next_index]
+            running[asyncio.ensure_future(self._call(name, model, prompt, kwargs))] = (next_index, time.monotonic())
+            next_index += 1
+
+        send()
+        try:
+            while running:
+                timeout = None
+                if next_index < len(self.models):
+                    # Hedge when the most recently sent request passes its model's threshold
+                    index, sent = max(running.values(), key=lambda item: item[1])
+                    timeout = max(0.0, sent + self.hedge_delay(self.models[index][0]) - time.monotonic())
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    LLM_HEDGE_EVENTS.labels(provider=self.models[next_index][0], event="hedge").inc()
+                    send()
+                    continue
+                for task in done:
+                    index, _ = running.pop(task)
+                    name = self.models[index][0]
+                    if task.exception() is None and self.validator(task.result()):
+                        if index > 0:
+                            LLM_HEDGE_EVENTS.labels(provider=name, event="won").inc()
+                        return task.result()
+                    last_error = task.exception() or ValueError(f"LLM provider {name} returned an invalid response")
+                    logger.warning("LLM provider failed, failing over", provider=name, error=str(last_error))
+                    if next_index < len(self.models):
+                        LLM_HEDGE_EVENTS.labels(provider=self.models[next_index][0], event="failover").inc()
+                        send()
+        finally:
+            for task in running:
+                task.cancel()
+            # Wait for the losers to finish cancelling so none is left pending or with an unretrieved error
+            await asyncio.gather(*running, return_exceptions=True)
+        raise last_error
+
+
+def parse_providers(spec: str) -> List[Tuple[str, Optional[str]]]:
+    """Parses LLM_PROVIDERS, e.g. "lm_proxy,openrouter:openai/gpt-4o-mini", into (provider, model or None)."""
+    providers = []
+    for item in spec.split(","):
+        provider, _, model = item.strip().partition(":")
+        if provider:
+            providers.append((provider.strip().lower(), model.strip() or None))
+    return providers
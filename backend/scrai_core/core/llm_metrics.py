@@ -0,0 +1,80 @@
+import time
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from scrai_core.core.metrics import LLM_REQUEST_SECONDS, LLM_TOKENS
+from scrai_core.core.tracing import start_span
+
+
+def _token_usage(response: Any) -> Dict[str, int]:
+    """Extracts prompt/completion token counts from an LLMResult, if the provider reported them."""
+    prompt_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+    if not prompt_tokens and not completion_tokens:
+        # Older OpenAI-compatible wrappers only fill llm_output
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+    if not prompt_tokens and not completion_tokens:
+        return {}
+    return {"prompt": prompt_tokens, "completion": completion_tokens}
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """
+    LangChain callback that records latency and token counts of every call a
+    chat model makes, and a span per call.
+    """
+    run_inline = True
+
+    def __init__(self, provider: str, model: str):
+        self.provider = provider
+        self.model = model
+        self._runs: Dict[UUID, tuple] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        run = self._finish(run_id, "success")
+        if run is None:
+            return
+        for kind, count in _token_usage(response).items():
+            LLM_TOKENS.labels(provider=self.provider, model=self.model, kind=kind).observe(count)
+            run.set_attribute(f"llm.tokens.{kind}", count)
+        run.end()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        run = self._finish(run_id, "error")
+        if run is not None:
+            run.record_exception(error)
+            run.end()
+
+    def _start(self, run_id: UUID):
+        run_span = start_span("llm.call", provider=self.provider, model=self.model)
+        self._runs[run_id] = (time.perf_counter(), run_span)
+
+    def _finish(self, run_id: UUID, outcome: str) -> Optional[Any]:
+        started, run_span = self._runs.pop(run_id, (None, None))
+        if started is None:
+            return None
+        LLM_REQUEST_SECONDS.labels(provider=self.provider, model=self.model, outcome=outcome).observe(
+            time.perf_counter() - started
+        )
+        return run_span
+
+
+def instrument_chat_model(chat_model: Any, provider: str, model: str) -> Any:
+    """Attaches an LLMMetricsCallback to a LangChain chat model and returns it."""
+    chat_model.callbacks = list(chat_model.callbacks or []) + [LLMMetricsCallback(provider, model)]
+    return chat_model
@@ -1,5 +1,5 @@
 import os
-from typing import Any, Optional, cast
+from typing import Any, Callable, Optional, cast
 
 from dotenv import load_dotenv
 from pydantic import SecretStr
@@ -12,7 +12,11 @@ def _to_float(env_value: Optional[str], default: float) -> float:
         return default
 
 
-def get_chat_model_from_env(provider: Optional[str] = None) -> Any:
+def get_chat_model_from_env(
+    provider: Optional[str] = None,
+    model: Optional[str] = None,
+    validator: Optional[Callable[[Any], bool]] = None,
+) -> Any:
     """Return a LangChain ChatModel configured from environment variables.
 
     Supported providers (via LLM_PROVIDER):
@@ -20,11 +24,29 @@ def get_chat_model_from_env(provider: Optional[str] = None) -> Any:
     - lm_studio (OpenAI-compatible)
     - openrouter (OpenAI-compatible)
     - gemini (Google AI Studio)
+    - stub (offline seeded policy for load tests)
+
+    With LLM_PROVIDERS set to more than one "provider[:model]" entry (and no
+    explicit provider), returns a HedgedChatModel over them, in order, that
+    only accepts responses `validator` passes (default: non-blank content).
+    `model` overrides the provider's *_MODEL variable.
     """
 
     # Load .env at import/use time
     load_dotenv(override=False)
 
+    if not provider and os.getenv("LLM_PROVIDERS"):
+        from scrai_core.core.hedged_llm import HedgedChatModel, parse_providers
+
+        providers = parse_providers(os.environ["LLM_PROVIDERS"])
+        if len(providers) > 1:
+            return HedgedChatModel([
+                (f"{name}:{name_model}" if name_model else name, get_chat_model_from_env(name, name_model))
+                for name, name_model in providers
+            ], validator=validator)
+        if providers:
+            provider, model = providers[0]
+
     provider_str = cast(str, provider or os.getenv("LLM_PROVIDER", "lm_proxy"))
     provider = provider_str.strip().lower()
 
@@ -33,9 +55,16 @@ def get_chat_model_from_env(provider: Optional[str] = None) -> Any:
     max_tokens_env = os.getenv("LLM_MAX_TOKENS")
     max_tokens = int(max_tokens_env) if max_tokens_env and max_tokens_env.isdigit() else None
 
+    if provider == "stub":
+        # Offline seeded policy for load tests; configured by STUB_LLM_* variables
+        from scrai_core.core.stub_llm import StubChatModel
+        from scrai_core.core.llm_metrics import instrument_chat_model
+        return instrument_chat_model(StubChatModel.from_env(), provider, model or "stub")
+
     if provider in {"lm_proxy", "lm_studio", "openrouter"}:
         try:
             from langchain_openai import ChatOpenAI
+            from scrai_core.core.llm_metrics import instrument_chat_model
         except Exception as e:  # pragma: no cover - import error surfaced at runtime
             raise RuntimeError(
                 "langchain-openai is required for OpenAI-compatible providers"
@@ -43,15 +72,15 @@ def get_chat_model_from_env(provider: Optional[str] = None) -> Any:
 
         if provider == "lm_proxy":
             base_url = os.getenv("LM_PROXY_BASE_URL", "http://localhost:4000/openai/v1")
-            model = os.getenv("LM_PROXY_MODEL", "gpt-4o-mini")
+            model = model or os.getenv("LM_PROXY_MODEL", "gpt-4o-mini")
             api_key = SecretStr(os.getenv("LM_PROXY_API_KEY", "not-needed"))
         elif provider == "lm_studio":
             base_url = os.getenv("LM_STUDIO_BASE_URL", "http://localhost:1234/v1")
-            model = os.getenv("LM_STUDIO_MODEL", "lmstudio-community/Phi-3-4k-mini")
+            model = model or os.getenv("LM_STUDIO_MODEL", "lmstudio-community/Phi-3-4k-mini")
             api_key = SecretStr(os.getenv("LM_STUDIO_API_KEY", "lm-studio"))
         else:  # openrouter
             base_url = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
-            model = os.getenv("OPENROUTER_MODEL", "openrouter/auto")
+            model = model or os.getenv("OPENROUTER_MODEL", "openrouter/auto")
             api_key_env = os.getenv("OPENROUTER_API_KEY")
             if not api_key_env:
                 raise RuntimeError("OPENROUTER_API_KEY is required for provider=openrouter")
@@ -71,11 +100,12 @@ def get_chat_model_from_env(provider: Optional[str] = None) -> Any:
             # Some providers/lib versions use "max_tokens"; set if available
             openai_kwargs["max_tokens"] = max_tokens
 
-        return ChatOpenAI(**openai_kwargs)
+        return instrument_chat_model(ChatOpenAI(**openai_kwargs), provider, model)
 
     if provider == "gemini":
         try:
             from langchain_google_genai import ChatGoogleGenerativeAI
+            from scrai_core.core.llm_metrics import instrument_chat_model
         except Exception as e:  # pragma: no cover
             raise RuntimeError(
                 "langchain-google-genai is required for provider=gemini"
@@ -85,7 +115,7 @@ def get_chat_model_from_env(provider: Optional[str] = None) -> Any:
         if not api_key_env:
             raise RuntimeError("GEMINI_API_KEY is required for provider=gemini")
         api_key = SecretStr(api_key_env)
-        model = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
+        model = model or os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
 
         # Prepare kwargs; some versions may not accept streaming param
         gemini_kwargs: dict[str, Any] = {
@@ -100,7 +130,7 @@ def get_chat_model_from_env(provider: Optional[str] = None) -> Any:
         except Exception:
             pass
 
-        return ChatGoogleGenerativeAI(**gemini_kwargs)
+        return instrument_chat_model(ChatGoogleGenerativeAI(**gemini_kwargs), provider, model)
 
     raise ValueError(f"Unsupported LLM_PROVIDER: {provider}")
 
@@ -119,6 +149,7 @@ def get_memory_chat_model_from_env(provider: Optional[str] = None) -> Any:
     - lm_studio (OpenAI-compatible)
     - openrouter (OpenAI-compatible)
     - gemini (Google AI Studio)
+    - stub (offline seeded policy for load tests)
     """
 
     # Load .env at import/use time
@@ -143,9 +174,16 @@ def get_memory_chat_model_from_env(provider: Optional[str] = None) -> Any:
     max_tokens_env = os.getenv("LLM_MAX_TOKENS")
     max_tokens = int(max_tokens_env) if max_tokens_env and max_tokens_env.isdigit() else None
 
+    if provider == "stub":
+        # Offline seeded policy for load tests; configured by STUB_LLM_* variables
+        from scrai_core.core.stub_llm import StubChatModel
+        from scrai_core.core.llm_metrics import instrument_chat_model
+        return instrument_chat_model(StubChatModel.from_env(), provider, "stub")
+
     if provider in {"lm_proxy", "lm_studio", "openrouter"}:
         try:
             from langchain_openai import ChatOpenAI
+            from scrai_core.core.llm_metrics import instrument_chat_model
         except Exception as e:  # pragma: no cover - import error surfaced at runtime
             raise RuntimeError(
                 "langchain-openai is required for OpenAI-compatible providers"
@@ -196,11 +234,12 @@ def get_memory_chat_model_from_env(provider: Optional[str] = None) -> Any:
             # Some providers/lib versions use "max_tokens"; set if available
             openai_kwargs["max_tokens"] = max_tokens
 
-        return ChatOpenAI(**openai_kwargs)
+        return instrument_chat_model(ChatOpenAI(**openai_kwargs), provider, model)
 
     if provider == "gemini":
         try:
             from langchain_google_genai import ChatGoogleGenerativeAI
+            from scrai_core.core.llm_metrics import instrument_chat_model
         except Exception as e:  # pragma: no cover
             raise RuntimeError(
                 "langchain-google-genai is required for provider=gemini"
@@ -230,6 +269,6 @@ def get_memory_chat_model_from_env(provider: Optional[str] = None) -> Any:
         except Exception:
             pass
 
-        return ChatGoogleGenerativeAI(**gemini_kwargs)
+        return instrument_chat_model(ChatGoogleGenerativeAI(**gemini_kwargs), provider, model)
 
     raise ValueError(f"Unsupported LLM_PROVIDER: {provider}")
@@ -0,0 +1,159 @@
+"""
+Level-of-detail scheduling: agents with something around them think every
+tick, the rest think less often.
+
+Tiers, re-evaluated every tick from the committed-event stream:
+  full     - another agent or an object within LOD_RADIUS_KM (one vectorized
+             query over the SpatialStore), or a message waiting: the full
+             cognitive graph every tick.
+  reduced  - committed an action in the last LOD_IDLE_AFTER_TICKS ticks, or
+             was sent a message: the full graph every LOD_REDUCED_INTERVAL
+             ticks and the cheap "continue current behavior" path in
+             between. Those autopilot moves do not count as activity.
+  idle     - nothing nearby and no recent actions: the full graph every
+             LOD_IDLE_INTERVAL ticks and nothing in between.
+Reduced and idle agents are spread over the interval by a hash of their ID so
+the full ticks do not all land on the same tick. An agent thinks on the first
+tick it is seen, so it has a behavior to continue.
+"""
+import asyncio
+import os
+import zlib
+from typing import Any, Dict, List, Optional, Set, Tuple
+from uuid import uuid4
+
+import structlog
+
+from scrai_core.core.metrics import LOD_AGENT_TICKS, LOD_TIER_AGENTS
+from scrai_core.events.bus import EventBus
+from scrai_core.world.spatial import SpatialStore
+
+logger = structlog.get_logger(__name__)
+
+FULL, REDUCED, IDLE = "full", "reduced", "idle"
+TIERS = (FULL, REDUCED, IDLE)
+# What an agent does on a tick
+THINK, CONTINUE, SKIP = "think", "continue", "skip"
+
+
+class LodScheduler:
+    """Assigns each agent a tier and decides, tick by tick, how it runs."""
+    def __init__(
+        self,
+        event_bus: Optional[EventBus] = None,
+        radius_km: Optional[float] = None,
+        reduced_interval: Optional[int] = None,
+        idle_interval: Optional[int] = None,
+        idle_after_ticks: Optional[int] = None,
+        consumer_group: str = "lod_scheduler_group",
+    ):
+        self.event_bus = event_bus
+        self.radius_km = radius_km or float(os.getenv("LOD_RADIUS_KM", "1.0"))
+        self.reduced_interval = reduced_interval or int(os.getenv("LOD_REDUCED_INTERVAL", "4"))
+        self.idle_interval = idle_interval or int(os.getenv("LOD_IDLE_INTERVAL", "16"))
+        self.idle_after_ticks = idle_after_ticks or int(os.getenv("LOD_IDLE_AFTER_TICKS", "8"))
+        self.stream_name = "world_state_committed_events"
+        self.consumer_group = consumer_group
+        self.consumer_name = f"{consumer_group}_1"
+
+        self.tick_number = 0
+        self.store = SpatialStore()
+        self.last_active: Dict[str, int] = {}
+        self.pending_messages: Set[str] = set()
+        self.tiers: Dict[str, str] = {}
+        # Action IDs of the autopilot moves handed out -> tick, until their committed events arrive
+        self.autopilot_actions: Dict[str, int] = {}
+
+    def load(self, agents: List[Any], world_objects: List[Any]):
+        """Seeds positions from the database; the committed stream keeps them current."""
+        self.store.load(agents, world_objects)
+
+    def apply(self, event: Dict[str, Any]):
+        """Updates positions, activity and waiting messages from one committed event (as a dict)."""
+        entity_id = event.get("entity_id")
+        new_state = event.get("new_state") or {}
+        if entity_id is None:
+            return
+        self.store.apply(event)
+        # The agent's own autopilot moves would otherwise keep it reduced forever
+        if self.autopilot_actions.pop(str(event.get("action_id")), None) is None:
+            self.last_active[entity_id] = self.tick_number
+        if event.get("action_type") == "communicate":
+            recipients = new_state.get("recipient_ids") or ()
+            self.pending_messages.update(recipients)
+            for recipient_id in recipients:
+                self.last_active[recipient_id] = self.tick_number
+
+    def autopilot_action(self) -> str:
+        """An action ID for a CONTINUE move, whose committed event then does not count as activity."""
+        action_id = str(uuid4())
+        self.autopilot_actions[action_id] = self.tick_number
+        return action_id
+
+    def tier_for(self, agent_id: str, near: Dict[str, bool]) -> str:
+        if agent_id in self.pending_messages or near.get(agent_id):
+            return FULL
+        if self.tick_number - self.last_active.get(agent_id, self.tick_number) <= self.idle_after_ticks:
+            return REDUCED
+        return IDLE
+
+    def _due(self, agent_id: str, interval: int) -> bool:
+        return (self.tick_number + zlib.crc32(agent_id.encode("utf-8"))) % interval == 0
+
+    def plan(self, agents: List[Any]) -> List[Tuple[Any, str, str]]:
+        """
+        Advances to the next tick and returns (agent, tier, mode) for every
+        agent, where mode is THINK, CONTINUE or SKIP.
+        """
+        self.tick_number += 1
+        # Autopilot moves that were rejected never commit
+        self.autopilot_actions = {
+            action_id: tick for action_id, tick in self.autopilot_actions.items()
+            if self.tick_number - tick <= self.idle_after_ticks
+        }
+        for agent in agents:
+            agent_id = agent.agent_model.id
+            if agent_id not in self.store.agents.rows:
+                self.store.agents.set(agent_id, agent.agent_model.latitude, agent.agent_model.longitude)
+        near = self.store.has_neighbour(self.radius_km)
+
+        plan = []
+        counts = dict.fromkeys(TIERS, 0)
+        for agent in agents:
+            agent_id = agent.agent_model.id
+            first_seen = agent_id not in self.last_active
+            if first_seen:
+                self.last_active[agent_id] = self.tick_number
+            tier = self.tier_for(agent_id, near)
+            if first_seen or tier == FULL or (tier == REDUCED and self._due(agent_id, self.reduced_interval)) \
+                    or (tier == IDLE and self._due(agent_id, self.idle_interval)):
+                mode = THINK
+                # A full tick perceives any waiting message
+                self.pending_messages.discard(agent_id)
+            else:
+                mode = CONTINUE if tier == REDUCED else SKIP
+            if self.tiers.get(agent_id) != tier:
+                logger.debug("Agent changed tier", agent_id=agent_id, old_tier=self.tiers.get(agent_id), new_tier=tier)
+                self.tiers[agent_id] = tier
+            counts[tier] += 1
+            LOD_AGENT_TICKS.labels(tier=tier, mode=mode).inc()
+            plan.append((agent, tier, mode))
+
+        for tier, count in counts.items():
+            LOD_TIER_AGENTS.labels(tier=tier).set(count)
+        return plan
+
+    def position(self, agent_id: str) -> Optional[Tuple[float, float]]:
+        return self.store.position(agent_id)
+
+    async def run(self):
+        """Follows the committed-event stream until cancelled."""
+        logger.info("LOD scheduler starting...")
+        await self.event_bus.connect()
+        try:
+            async for event in self.event_bus.subscribe(self.stream_name, self.consumer_group, self.consumer_name):
+                self.apply(event)
+        except asyncio.CancelledError:
+            logger.info("LOD scheduler stopped.")
+        finally:
+            await self.event_bus.disconnect()
@@ -0,0 +1,175 @@
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from scrai_core.core.tracing import span
+
+# Latency buckets in seconds, from a fast DB read up to a slow LLM call
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+EVENTS_PROCESSED = Counter(
+    "events_processed_total",
+    "Total number of events processed by the WorldStateSystem",
+)
+COGNITION_STAGE_SECONDS = Histogram(
+    "cognition_stage_seconds",
+    "Time spent in each cognition stage (perceive, recall, reason, reflect, act)",
+    ["stage", "cohort"],
+    buckets=LATENCY_BUCKETS,
+)
+COGNITION_TICK_SECONDS = Histogram(
+    "cognition_tick_seconds",
+    "Time for one agent to run its whole cognitive loop",
+    ["cohort"],
+    buckets=LATENCY_BUCKETS,
+)
+COGNITION_STAGE_ERRORS = Counter(
+    "cognition_stage_errors_total",
+    "Cognition stages that raised an exception",
+    ["stage", "cohort"],
+)
+INVALID_ACTIONS = Counter(
+    "cognition_invalid_actions_total",
+    "LLM responses that could not be parsed into an ActionEvent",
+    ["cohort"],
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_seconds",
+    "LLM call latency",
+    ["provider", "model", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Histogram(
+    "llm_tokens",
+    "Tokens per LLM call, as reported by the provider",
+    ["provider", "model", "kind"],
+    buckets=TOKEN_BUCKETS,
+)
+LLM_HEDGE_EVENTS = Counter(
+    "llm_hedge_events_total",
+    "Hedged LLM requests: a duplicate sent after the hedge delay (hedge), sent because "
+    "the previous provider failed (failover), or a later provider's response used (won)",
+    ["provider", "event"],
+)
+EMBEDDING_REQUEST_SECONDS = Histogram(
+    "embedding_request_seconds",
+    "Latency of one embed_texts() call",
+    ["backend", "path"],
+    buckets=LATENCY_BUCKETS,
+)
+EMBEDDING_REQUEST_TEXTS = Histogram(
+    "embedding_request_texts",
+    "Texts per embed_texts() call",
+    ["backend", "path"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+
+EVENT_STAGE_SECONDS = Histogram(
+    "event_stage_seconds",
+    "Latency between two hops of the action -> commit -> memory pipeline "
+    "(action_queue, world_commit, committed_queue, memory_persist, end_to_end, message_route, message_inbox)",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+STREAM_LENGTH = Gauge("event_stream_length", "Entries in an event stream", ["stream"])
+STREAM_CONSUMER_LAG = Gauge(
+    "event_stream_consumer_lag",
+    "Entries in the stream not yet delivered to the consumer group",
+    ["stream", "group"],
+)
+STREAM_CONSUMER_LAG_SECONDS = Gauge(
+    "event_stream_consumer_lag_seconds",
+    "Age difference between the newest entry and the last one delivered to the consumer group",
+    ["stream", "group"],
+)
+STREAM_PENDING = Gauge(
+    "event_stream_pending",
+    "Entries delivered to the consumer group but not yet acknowledged",
+    ["stream", "group"],
+)
+BACKPRESSURE_STATE = Gauge(
+    "simulation_backpressure_state",
+    "Tick throttling: 0 normal, 1 ticks slowed, 2 ticks skipped",
+)
+BACKPRESSURE_DELAY_SECONDS = Gauge(
+    "simulation_backpressure_delay_seconds",
+    "Extra delay added before the next tick because consumers are lagging",
+)
+BACKPRESSURE_TICKS = Counter(
+    "simulation_backpressure_ticks_total",
+    "Ticks slowed or skipped because consumers are lagging",
+    ["action"],
+)
+ARCHIVED_EVENTS = Counter(
+    "event_stream_archived_total",
+    "Stream entries written to the on-disk archive",
+    ["stream"],
+)
+TRIMMED_EVENTS = Counter(
+    "event_stream_trimmed_total",
+    "Archived stream entries trimmed from Redis",
+    ["stream"],
+)
+LOD_TIER_AGENTS = Gauge(
+    "simulation_lod_tier_agents",
+    "Agents in each level-of-detail tier at the last tick",
+    ["tier"],
+)
+LOD_AGENT_TICKS = Counter(
+    "simulation_lod_agent_ticks_total",
+    "Agent ticks by level-of-detail tier and how the agent ran (think, continue, skip)",
+    ["tier", "mode"],
+)
+MESSAGES_DELIVERED = Counter(
+    "messages_delivered_total",
+    "Messages written to agent inboxes, by direct or broadcast delivery",
+    ["kind"],
+)
+MESSAGE_DELIVERY_SECONDS = Histogram(
+    "message_delivery_seconds",
+    "Time from a communicate action being published to the recipient reading the message",
+    buckets=LATENCY_BUCKETS,
+)
+REJECTED_MOVES = Counter(
+    "world_rejected_moves_total",
+    "Move actions rejected for non-numeric targets or exceeding MAX_MOVE_KM",
+)
+MEMORY_SUMMARIES = Counter(
+    "memory_summaries_total",
+    "Memories written by the MemoryConsolidator, by how they were summarized (template, llm, fallback)",
+    ["method"],
+)
+MEMORY_SUMMARIZED_EVENTS = Counter(
+    "memory_summarized_events_total",
+    "Committed events folded into memories, by how they were summarized (template, llm, fallback)",
+    ["method"],
+)
+
+
+def observe_event_latency(stage: str, started: Optional[float], finished: Optional[float]):
+    """
+    Records the time between two hop timestamps. Events published before
+    timings existed have no start and are skipped; small negative values from
+    clock skew between processes are clamped to zero.
+    """
+    if started is None or finished is None:
+        return
+    EVENT_STAGE_SECONDS.labels(stage=stage).observe(max(0.0, finished - started))
+
+
+@asynccontextmanager
+async def observe_stage(stage: str, cohort: str = "default", **attributes: Any):
+    """Times a cognition stage into COGNITION_STAGE_SECONDS inside a trace span."""
+    started = time.perf_counter()
+    with span(f"cognition.{stage}", stage=stage, cohort=cohort, **attributes) as current:
+        try:
+            yield current
+        except Exception:
+            # The span records the exception itself as it propagates
+            COGNITION_STAGE_ERRORS.labels(stage=stage, cohort=cohort).inc()
+            raise
+        finally:
+            COGNITION_STAGE_SECONDS.labels(stage=stage, cohort=cohort).observe(time.perf_counter() - started)
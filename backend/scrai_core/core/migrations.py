@@ -0,0 +1,113 @@
+import argparse
+import os
+from typing import Optional
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from scrai_core.core.persistence import get_engine
+
+logger = structlog.get_logger(__name__)
+
+# HNSW indexes for each MEMORY_VECTOR_STORAGE mode. The compact modes index an
+# expression over the existing embedding column, so existing rows are covered
+# as soon as the index is built and no backfill is needed. The expressions
+# must match scrai_core.agents.memory.first_pass_distance.
+VECTOR_INDEXES = {
+    "full": (
+        "ix_episodic_memories_embedding_hnsw",
+        "USING hnsw (embedding vector_cosine_ops)",
+    ),
+    "half": (
+        "ix_episodic_memories_embedding_half_hnsw",
+        "USING hnsw ((embedding::halfvec(384)) halfvec_cosine_ops)",
+    ),
+    "binary": (
+        "ix_episodic_memories_embedding_bit_hnsw",
+        "USING hnsw ((binary_quantize(embedding)::bit(384)) bit_hamming_ops)",
+    ),
+}
+
+
+def migrate_vector_storage(engine: Optional[Engine] = None, mode: Optional[str] = None, drop_others: bool = True) -> str:
+    """
+    Builds the vector index for a storage mode and, by default, drops the
+    indexes of the other modes. Indexes are created CONCURRENTLY so the
+    simulation can keep writing memories during the migration.
+    Requires pgvector 0.7 or newer for halfvec, bit and binary_quantize.
+    """
+    from scrai_core.agents.memory import vector_storage_mode
+
+    engine = engine or get_engine()
+    mode = vector_storage_mode(mode)
+    index_name, definition = VECTOR_INDEXES[mode]
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        logger.info("Building vector index", mode=mode, index=index_name)
+        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON episodic_memories {definition}"))
+        if drop_others:
+            for other_mode, (other_name, _) in VECTOR_INDEXES.items():
+                if other_mode != mode:
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {other_name}"))
+    return index_name
+
+
+def vector_index_exists(engine: Optional[Engine] = None, mode: Optional[str] = None) -> bool:
+    """Whether the vector index for a MEMORY_VECTOR_STORAGE mode has been built."""
+    from scrai_core.agents.memory import vector_storage_mode
+
+    engine = engine or get_engine()
+    index_name, _ = VECTOR_INDEXES[vector_storage_mode(mode)]
+    with engine.connect() as conn:
+        return bool(conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": index_name}).scalar())
+
+
+def run_migrations(engine: Optional[Engine] = None, build_vector_index: bool = False) -> bool:
+    """
+    Applies idempotent schema changes that create_all() cannot make on
+    existing tables. Called at startup after the tables are created.
+
+    Building an HNSW index over a large episodic_memories table takes a long
+    time, so the compact storage modes' index is only checked here, and
+    built only if build_vector_index is set. Returns whether the index the
+    configured mode searches is in place; the API builds a missing one in
+    the background with migrate_vector_storage.
+    """
+    from scrai_core.agents.memory import vector_storage_mode
+
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        conn.execute(text(
+            "ALTER TABLE episodic_memories ADD COLUMN IF NOT EXISTS occurrence_count integer NOT NULL DEFAULT 1"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_episodic_memories_agent_id_timestamp ON episodic_memories (agent_id, timestamp)"
+        ))
+    # The compact storage modes rely on their expression index for the first pass
+    if vector_storage_mode() == "full" or vector_index_exists(engine):
+        return True
+    if build_vector_index:
+        migrate_vector_storage(engine, drop_others=False)
+        return True
+    logger.warning(
+        "Vector index for MEMORY_VECTOR_STORAGE is missing; memory search is unindexed until it is built",
+        mode=vector_storage_mode(),
+    )
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ScrAI schema migrations.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    vector_storage = subparsers.add_parser("vector-storage", help="Build the vector index for a MEMORY_VECTOR_STORAGE mode.")
+    vector_storage.add_argument("--mode", choices=list(VECTOR_INDEXES), default=os.getenv("MEMORY_VECTOR_STORAGE", "full"))
+    vector_storage.add_argument("--keep-others", action="store_true", help="Do not drop the other modes' indexes.")
+    args = parser.parse_args()
+
+    if args.command == "vector-storage":
+        index_name = migrate_vector_storage(mode=args.mode, drop_others=not args.keep_others)
+        print(f"Vector storage migrated to '{args.mode}' ({index_name}).")
+
+
+if __name__ == "__main__":
+    main()
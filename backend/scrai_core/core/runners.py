@@ -0,0 +1,278 @@
+"""
+Multi-process agent runners. Agents are partitioned by a hash of their ID
+across AGENT_RUNNER_PROCESSES worker processes, each with its own event
+loop and GIL. The main process keeps the API and the stream consumers and
+drives the ticks: it publishes a tick command that every runner receives,
+and waits until each partition has reported the tick done (a barrier)
+before the tick returns.
+
+Commands and results travel over the event bus on streams named after the
+orchestrator's run, so runners never act on a previous run's commands.
+Runners are separate processes, so this needs the Redis event bus.
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+import structlog
+
+from scrai_core.core.lod import LodScheduler
+from scrai_core.core.persistence import get_session
+from scrai_core.core.simulation import Simulation
+from scrai_core.events.bus import EventBus, get_event_bus
+from scrai_core.world.perception import PerceptionService
+
+logger = structlog.get_logger(__name__)
+
+
+def command_stream(run_id: str) -> str:
+    return f"agent_runner_commands:{run_id}"
+
+
+def result_stream(run_id: str) -> str:
+    return f"agent_runner_results:{run_id}"
+
+
+COMMITTED_EVENT_STREAM = "world_state_committed_events"
+# Each runner follows the committed stream through its own groups, named with these prefixes and its partition
+FOLLOWER_GROUP_PREFIXES = ("lod_scheduler_group_", "perception_group_")
+
+
+class AgentRunner:
+    """
+    Runs one partition of the agents: loads them, then ticks them whenever
+    the orchestrator publishes a tick command and reports the outcome.
+    """
+    def __init__(self, index: int, partitions: int, run_id: str, event_bus: EventBus, simulation: Simulation, start_tick: int = 0):
+        self.index = index
+        self.partitions = partitions
+        self.run_id = run_id
+        self.event_bus = event_bus
+        self.simulation = simulation
+        # Ticks up to this one are done or were given up on; a restarted runner starts after the tick it died on
+        self.last_tick = start_tick
+
+    def stale(self, command: Dict[str, Any]) -> bool:
+        """Whether a tick command is one the orchestrator no longer waits for."""
+        return command["tick"] <= self.last_tick or time.time() > command.get("expires_at", float("inf"))
+
+    def _reload(self):
+        self.simulation.db_session.expire_all()
+        self.simulation.load_agents()
+
+    async def handle(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        """Runs the tick a command asks for and returns the result to report."""
+        if command.get("reload"):
+            self._reload()
+        self.last_tick = command["tick"]
+        started = time.perf_counter()
+        failed = await self.simulation.tick()
+        return {
+            "tick": command["tick"],
+            "partition": self.index,
+            "agents": len(self.simulation.agents),
+            "failed": failed or 0,
+            "seconds": time.perf_counter() - started,
+        }
+
+    async def run(self):
+        await self.event_bus.connect()
+        try:
+            self.simulation.load_agents()
+            await self.event_bus.publish(result_stream(self.run_id), {"ready": self.index, "agents": len(self.simulation.agents)})
+            logger.info("Agent runner ready", partition=self.index, agents=len(self.simulation.agents))
+            async for command in self.event_bus.subscribe(
+                command_stream(self.run_id), f"agent_runner_{self.index}", f"agent_runner_{self.index}"
+            ):
+                if command.get("stop"):
+                    break
+                if self.stale(command):
+                    # Its result would be dropped; catch up instead of running a backlog back to back
+                    logger.warning("Skipping stale tick", partition=self.index, tick=command["tick"])
+                    if command.get("reload"):
+                        self._reload()
+                    continue
+                await self.event_bus.publish(result_stream(self.run_id), await self.handle(command))
+        except asyncio.CancelledError:
+            pass
+        finally:
+            logger.info("Agent runner stopped", partition=self.index)
+            await self.event_bus.disconnect()
+
+
+async def _run_partition(index: int, partitions: int, run_id: str, start_tick: int = 0):
+    from scrai_core.core.logging_config import setup_logging
+    from scrai_core.core.warmup import warm_up
+    setup_logging()
+    state = await warm_up()
+    event_bus = get_event_bus()
+    db = next(get_session())
+    # Every runner follows the whole committed stream, so each needs its own consumer groups
+    scheduler, perception = None, None
+    if os.getenv("LOD_ENABLED", "false").lower() == "true":
+        scheduler = LodScheduler(get_event_bus(), consumer_group=f"{FOLLOWER_GROUP_PREFIXES[0]}{index}")
+    if os.getenv("INCREMENTAL_PERCEPTION", "true").lower() == "true":
+        perception = PerceptionService(get_event_bus(), consumer_group=f"{FOLLOWER_GROUP_PREFIXES[1]}{index}")
+    followers = [asyncio.create_task(follower.run()) for follower in (scheduler, perception) if follower is not None]
+    try:
+        simulation = Simulation(event_bus, db, partition=(index, partitions), scheduler=scheduler, perception=perception, llm=state.agent_llm)
+        await AgentRunner(index, partitions, run_id, event_bus, simulation, start_tick).run()
+    finally:
+        for task in followers:
+            task.cancel()
+        await asyncio.gather(*followers, return_exceptions=True)
+        db.close()
+
+
+def _runner_main(index: int, partitions: int, run_id: str, start_tick: int = 0):
+    """Entry point of an agent runner process."""
+    # Every runner embedding through its own pool of one-per-core workers would oversubscribe the machine
+    os.environ.setdefault("EMBEDDING_WORKERS", "0")
+    asyncio.run(_run_partition(index, partitions, run_id, start_tick))
+
+
+class RunnerOrchestrator:
+    """
+    Stands in for Simulation in the main process: tick() and load_agents()
+    are forwarded to the runner processes, and tick() returns once every
+    partition has finished the tick or tick_timeout has passed. A runner
+    whose process dies is restarted, and the tick it died on returns
+    without its partition.
+    """
+    def __init__(
+        self,
+        event_bus: EventBus,
+        partitions: Optional[int] = None,
+        tick_timeout: Optional[float] = None,
+        run_id: Optional[str] = None,
+        supervise_interval: Optional[float] = None,
+    ):
+        self.event_bus = event_bus
+        self.partitions = partitions or int(os.getenv("AGENT_RUNNER_PROCESSES", "2"))
+        self.tick_timeout = tick_timeout or float(os.getenv("AGENT_RUNNER_TICK_TIMEOUT", "300"))
+        # How often the runner processes are checked while waiting on them
+        self.supervise_interval = supervise_interval or float(os.getenv("AGENT_RUNNER_SUPERVISE_SECONDS", "1"))
+        self.run_id = run_id or uuid4().hex[:12]
+        self.tick_number = 0
+        # Results arriving after their tick timed out are dropped
+        self._finished_tick = 0
+        self.agents_per_partition: Dict[int, int] = {}
+        self.processes: List[multiprocessing.Process] = []
+        self._reload = False
+        self._results: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        self._ready: set = set()
+        self._changed = asyncio.Condition()
+        self._listener: Optional[asyncio.Task] = None
+
+    def _start_partition(self, index: int) -> multiprocessing.Process:
+        process = multiprocessing.get_context("spawn").Process(
+            target=_runner_main, args=(index, self.partitions, self.run_id, self.tick_number),
+            name=f"agent-runner-{index}", daemon=True,
+        )
+        process.start()
+        return process
+
+    def _spawn(self):
+        from scrai_core.events.inprocess import InProcessEventBus
+        if isinstance(self.event_bus, InProcessEventBus):
+            raise RuntimeError("Agent runner processes need the Redis event bus (EVENT_BUS_BACKEND=redis)")
+        self.processes = [self._start_partition(index) for index in range(self.partitions)]
+
+    def _respawn_dead(self) -> List[int]:
+        """Restarts the runners whose process has exited; returns their partitions."""
+        dead = [index for index, process in enumerate(self.processes) if not process.is_alive()]
+        for index in dead:
+            logger.error("Agent runner died, restarting it", partition=index, exitcode=self.processes[index].exitcode)
+            self._ready.discard(index)
+            # The new runner loads its agents and picks up the commands after the one it died on
+            self.processes[index] = self._start_partition(index)
+        return dead
+
+    async def _listen(self):
+        async for result in self.event_bus.subscribe(result_stream(self.run_id), "runner_orchestrator", "runner_orchestrator"):
+            async with self._changed:
+                if "ready" in result:
+                    self._ready.add(result["ready"])
+                    self.agents_per_partition[result["ready"]] = result["agents"]
+                else:
+                    if result["tick"] > self._finished_tick:
+                        self._results.setdefault(result["tick"], {})[result["partition"]] = result
+                    self.agents_per_partition[result["partition"]] = result["agents"]
+                self._changed.notify_all()
+
+    async def _wait_for(self, condition, what: str, fail_on_crash: bool = False) -> bool:
+        """
+        Waits up to tick_timeout for condition, restarting runners that die
+        meanwhile. With fail_on_crash it gives up as soon as one has died.
+        """
+        deadline = time.monotonic() + self.tick_timeout
+        async with self._changed:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.error("Timed out waiting for agent runners", what=what, timeout=self.tick_timeout)
+                    return False
+                try:
+                    await asyncio.wait_for(self._changed.wait_for(condition), min(remaining, self.supervise_interval))
+                    return True
+                except asyncio.TimeoutError:
+                    pass
+                if self._respawn_dead() and fail_on_crash:
+                    return False
+
+    async def _destroy_follower_groups(self):
+        """
+        Removes the runners' groups on the committed stream, including those
+        of earlier runs and partition counts, which would otherwise hold back
+        archive trimming and show up as lag.
+        """
+        for group in await self.event_bus.group_info(COMMITTED_EVENT_STREAM):
+            if group["name"].startswith(FOLLOWER_GROUP_PREFIXES):
+                await self.event_bus.destroy_group(COMMITTED_EVENT_STREAM, group["name"])
+
+    async def start(self):
+        """Starts the runner processes and waits until each has loaded its agents."""
+        await self.event_bus.connect()
+        await self._destroy_follower_groups()
+        self._listener = asyncio.create_task(self._listen())
+        self._spawn()
+        await self._wait_for(lambda: len(self._ready) == self.partitions, "runner start-up")
+        logger.info("Agent runners started", partitions=self.partitions, agents=self.agents_per_partition)
+
+    def load_agents(self):
+        """Has every runner reload its agents before the next tick."""
+        self._reload = True
+
+    async def tick(self) -> int:
+        """Runs one tick on every partition; returns the number of failed agents."""
+        self.tick_number += 1
+        tick = self.tick_number
+        reload, self._reload = self._reload, False
+        await self.event_bus.publish(
+            command_stream(self.run_id), {"tick": tick, "reload": reload, "expires_at": time.time() + self.tick_timeout}
+        )
+        done = await self._wait_for(lambda: len(self._results.get(tick, {})) == self.partitions, f"tick {tick}", fail_on_crash=True)
+        results = self._results.pop(tick, {})
+        self._finished_tick = tick
+        if not done:
+            logger.error("Tick finished without every partition", tick=tick, missing=sorted(set(range(self.partitions)) - set(results)))
+        return sum(result["failed"] for result in results.values())
+
+    async def stop(self, timeout: float = 10.0):
+        """Stops the runners and removes this run's command and result streams and follower groups."""
+        try:
+            await self.event_bus.publish(command_stream(self.run_id), {"stop": True})
+            for process in self.processes:
+                await asyncio.to_thread(process.join, timeout)
+                if process.is_alive():
+                    process.terminate()
+            if self._listener:
+                self._listener.cancel()
+                await asyncio.gather(self._listener, return_exceptions=True)
+            await self.event_bus.delete_streams(command_stream(self.run_id), result_stream(self.run_id))
+            await self._destroy_follower_groups()
+        finally:
+            await self.event_bus.disconnect()
@@ -1,41 +1,107 @@
 import asyncio
+import zlib
+from typing import Any, Dict, Optional, Tuple
 from sqlalchemy.orm import Session
 from scrai_core.core.persistence import get_session
 from scrai_core.events.bus import EventBus
 from scrai_core.agents.models import Agent
-from scrai_core.agents.cognition import CognitiveAgent
+from scrai_core.agents.cognition import CognitiveAgent, get_agent_chat_model
+from scrai_core.core.lod import CONTINUE, THINK, LodScheduler
+from scrai_core.world.models import WorldObject
+from scrai_core.world.messaging import Inbox
+from scrai_core.world.perception import PerceptionService
 import logging
 
 logger = logging.getLogger(__name__)
 
+def partition_for(agent_id: str, partitions: int) -> int:
+    """The agent runner partition an agent belongs to; stable across processes and restarts."""
+    return zlib.crc32(agent_id.encode("utf-8")) % partitions
+
 class Simulation:
-    def __init__(self, event_bus: EventBus, db_session: Session):
+    def __init__(
+        self,
+        event_bus: EventBus,
+        db_session: Session,
+        partition: Optional[Tuple[int, int]] = None,
+        scheduler: Optional[LodScheduler] = None,
+        perception: Optional[PerceptionService] = None,
+        llm: Any = None,
+    ):
         self.event_bus = event_bus
         self.db_session = db_session
+        # (index, count): only run the agents in this partition
+        self.partition = partition
+        # Level-of-detail scheduling; without one every agent thinks every tick
+        self.scheduler = scheduler
+        # Shared incremental world view for the agents' perception
+        self.perception = perception
         self.agents = []
+        # Kept across load_agents() so a reload does not deliver old messages again
+        self.inboxes: Dict[str, Inbox] = {}
+        # One chat model for every agent: the one from warm-up, or built on the first load_agents()
+        self.llm = llm
 
     def load_agents(self):
-        """Loads all agents from the database and creates cognitive agent instances."""
+        """Loads all agents (of this partition) from the database and creates cognitive agent instances."""
         try:
             all_agents = self.db_session.query(Agent).all()
-            self.agents = [CognitiveAgent(agent, self.event_bus) for agent in all_agents]
+            if self.partition is not None:
+                index, count = self.partition
+                all_agents = [agent for agent in all_agents if partition_for(agent.id, count) == index]
+            if self.llm is None:
+                self.llm = get_agent_chat_model()
+            self.inboxes = {agent.id: self.inboxes.get(agent.id) or Inbox(self.event_bus, agent.id) for agent in all_agents}
+            self.agents = [
+                CognitiveAgent(agent, self.event_bus, llm=self.llm, perception=self.perception, inbox=self.inboxes[agent.id])
+                for agent in all_agents
+            ]
+            if self.perception is not None:
+                self.perception.invalidate()
+            if self.scheduler is not None:
+                # Neighbours outside this partition still count as nearby
+                self.scheduler.load(self.db_session.query(Agent).all(), self.db_session.query(WorldObject).all())
             logger.info(f"Loaded {len(self.agents)} cognitive agents for simulation.")
         except Exception as e:
             logger.error(f"Failed to load agents: {e}")
             raise
 
-    async def tick(self):
+    async def tick(self) -> int:
         """
         Executes one tick of the simulation, where each agent publishes an action.
+        Returns the number of agents whose tick failed.
         """
         if not self.agents:
             logger.warning("No agents loaded, simulation tick has no effect.")
-            return
+            return 0
         
         logger.info(f"--- Simulation Tick Start ---")
-        tasks = [agent.tick() for agent in self.agents]
-        await asyncio.gather(*tasks)
+        if self.scheduler is None:
+            running = self.agents
+            tasks = [agent.tick() for agent in self.agents]
+        else:
+            running, tasks = [], []
+            for agent, tier, mode in self.scheduler.plan(self.agents):
+                # The tier doubles as the cohort so cognition metrics split by tier
+                agent.cohort = tier
+                if mode == THINK:
+                    tasks.append(agent.tick())
+                elif mode == CONTINUE:
+                    tasks.append(agent.continue_behavior(
+                        *self.scheduler.position(agent.agent_model.id), event_id=self.scheduler.autopilot_action()
+                    ))
+                else:
+                    continue
+                running.append(agent)
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # One agent's failed LLM call or DB error should not abort the tick for the rest
+        failed = 0
+        for agent, result in zip(running, results):
+            if isinstance(result, Exception):
+                failed += 1
+                logger.error(f"Agent {agent.agent_model.name} failed its tick: {result!r}")
         logger.info(f"--- Simulation Tick End ---")
+        return failed
 
 async def main():
     # Example usage
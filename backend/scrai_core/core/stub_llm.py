@@ -0,0 +1,187 @@
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field, PrivateAttr
+
+AGENT_NAME = re.compile(r"You are Agent (.+?)\.")
+POSITION = re.compile(r"Your current position is latitude (-?\d+(?:\.\d+)?), longitude (-?\d+(?:\.\d+)?)")
+OBJECT_ID = re.compile(r"Object ID: ([^,\s]+),")
+AGENT_ID = re.compile(r"Agent ID: ([^,\s]+),")
+
+REFLECTIONS = [
+    "I have been wandering without much of a plan.",
+    "The resources near me are running low.",
+    "Talking to the agents around me has been useful.",
+    "I keep returning to the same part of the map.",
+    "I should explore further away from where I started.",
+]
+SUMMARIES = [
+    "I gathered what I could from the objects around me.",
+    "I kept in touch with the agents nearby.",
+    "I spent my time between the resources and the other agents.",
+]
+MESSAGES = ["Hello there!", "Have you found any resources?", "Let's meet up.", "The area to the north looks promising."]
+MALFORMED = [
+    'I think I should move north.',
+    '{"action_type": "move", "payload": {"new_latitude": ',
+    '```json\n{"action": "dance"}\n```',
+]
+
+
+class StubLLMError(RuntimeError):
+    """Raised for the calls the stub provider is configured to fail."""
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Parses a latency distribution into a sampler returning seconds.
+    Supported specs (milliseconds): "fixed:200", "uniform:50,400",
+    "normal:200,50", "exponential:200" (mean) and "lognormal:200,0.5"
+    (median, sigma) for the long tail typical of LLM APIs.
+    """
+    kind, _, params = spec.strip().lower().partition(":")
+    values = [float(value) for value in params.split(",") if value.strip()] or [0.0]
+    if kind == "fixed":
+        return lambda rng: values[0] / 1000
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1])) / 1000
+    if kind == "exponential":
+        return lambda rng: rng.expovariate(1 / values[0]) / 1000 if values[0] > 0 else 0.0
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(max(values[0], 1e-3)), values[1]) / 1000
+    raise ValueError(f"Unsupported latency distribution: {spec}")
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Parses "move=0.6,interact_with_object=0.3,communicate=0.1"."""
+    weights = {}
+    for item in spec.split(","):
+        if item.strip():
+            name, _, weight = item.partition("=")
+            weights[name.strip()] = float(weight)
+    return weights
+
+
+class StubChatModel(BaseChatModel):
+    """
+    An offline chat model for load tests. It answers the cognition prompts
+    with schema-valid actions, reflections and memory summaries from a seeded
+    policy, after an artificial latency, and fails or returns malformed
+    output at configured rates. Decisions are seeded per agent and per call, so a run is
+    reproducible however the agents' calls interleave.
+    """
+    seed: int = 0
+    latency: str = "fixed:0"
+    failure_rate: float = 0.0
+    malformed_rate: float = 0.0
+    action_weights: Dict[str, float] = Field(
+        default_factory=lambda: {"move": 0.6, "interact_with_object": 0.3, "communicate": 0.1}
+    )
+    step_degrees: float = 0.05
+
+    _calls: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _sample_latency: Callable[[random.Random], float] = PrivateAttr()
+
+    def model_post_init(self, __context: Any):
+        self._sample_latency = parse_latency(self.latency)
+
+    @classmethod
+    def from_env(cls) -> "StubChatModel":
+        """Configures the stub from STUB_LLM_* environment variables."""
+        kwargs: Dict[str, Any] = {
+            "seed": int(os.getenv("STUB_LLM_SEED", "0")),
+            "latency": os.getenv("STUB_LLM_LATENCY", "fixed:0"),
+            "failure_rate": float(os.getenv("STUB_LLM_FAILURE_RATE", "0")),
+            "malformed_rate": float(os.getenv("STUB_LLM_MALFORMED_RATE", "0")),
+        }
+        if os.getenv("STUB_LLM_ACTION_WEIGHTS"):
+            kwargs["action_weights"] = parse_weights(os.environ["STUB_LLM_ACTION_WEIGHTS"])
+        return cls(**kwargs)
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _rng(self, prompt: str) -> random.Random:
+        match = AGENT_NAME.search(prompt)
+        caller = match.group(1) if match else "anonymous"
+        call = self._calls.get(caller, 0)
+        self._calls[caller] = call + 1
+        return random.Random(f"{self.seed}:{caller}:{call}")
+
+    def _respond(self, prompt: str, rng: random.Random) -> str:
+        roll = rng.random()
+        if roll < self.failure_rate:
+            raise StubLLMError("Stub LLM injected failure")
+        if roll < self.failure_rate + self.malformed_rate:
+            return rng.choice(MALFORMED)
+        if "insights or reflections" in prompt:
+            return "\n".join(f"- {reflection}" for reflection in rng.sample(REFLECTIONS, rng.randint(1, 3)))
+        if "Summarize these events" in prompt:
+            return rng.choice(SUMMARIES)
+        return json.dumps(self._decide(prompt, rng))
+
+    def _decide(self, prompt: str, rng: random.Random) -> Dict[str, Any]:
+        object_ids = OBJECT_ID.findall(prompt)
+        agent_ids = AGENT_ID.findall(prompt)
+        choices = {
+            action: weight for action, weight in self.action_weights.items()
+            if weight > 0
+            and (action != "interact_with_object" or object_ids)
+            and (action != "communicate" or agent_ids)
+        } or {"move": 1.0}
+        action_type = rng.choices(list(choices), weights=list(choices.values()))[0]
+
+        if action_type == "interact_with_object":
+            return {"action_type": action_type, "payload": {"object_id": rng.choice(object_ids)}}
+        if action_type == "communicate":
+            return {"action_type": action_type, "payload": {"recipient_id": rng.choice(agent_ids), "message": rng.choice(MESSAGES)}}
+
+        position = POSITION.search(prompt)
+        latitude, longitude = (float(position.group(1)), float(position.group(2))) if position else (0.0, 0.0)
+        return {
+            "action_type": "move",
+            "payload": {
+                "new_latitude": round(min(90.0, max(-90.0, latitude + rng.uniform(-self.step_degrees, self.step_degrees))), 6),
+                "new_longitude": round(min(180.0, max(-180.0, longitude + rng.uniform(-self.step_degrees, self.step_degrees))), 6),
+            },
+        }
+
+    def _prepare(self, messages: List[BaseMessage]):
+        prompt = "\n".join(str(message.content) for message in messages)
+        rng = self._rng(prompt)
+        return prompt, rng, self._sample_latency(rng)
+
+    def _result(self, prompt: str, content: str) -> ChatResult:
+        prompt_tokens = max(1, len(prompt) // 4)
+        completion_tokens = max(1, len(content) // 4)
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        prompt, rng, delay = self._prepare(messages)
+        time.sleep(delay)
+        return self._result(prompt, self._respond(prompt, rng))
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        prompt, rng, delay = self._prepare(messages)
+        await asyncio.sleep(delay)
+        return self._result(prompt, self._respond(prompt, rng))
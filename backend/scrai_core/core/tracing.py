@@ -0,0 +1,91 @@
+import os
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+_tracer = None
+
+
+class _NoOpSpan:
+    """Stands in for an OpenTelemetry span when opentelemetry is not installed."""
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_exception(self, exception: BaseException):
+        pass
+
+    def end(self):
+        pass
+
+
+def configure_tracing(service_name: str = "scrai") -> bool:
+    """
+    Installs an OpenTelemetry SDK tracer provider that exports spans over OTLP
+    when OTEL_EXPORTER_OTLP_ENDPOINT is set. Spans are still created through
+    the OpenTelemetry API without this (e.g. when running under
+    opentelemetry-instrument); without opentelemetry installed they are no-ops.
+    Returns True if an exporter was installed.
+    """
+    if not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        return False
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        logger.warning("OTEL_EXPORTER_OTLP_ENDPOINT is set but opentelemetry-sdk or the OTLP exporter is not installed")
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", service_name)}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    logger.info("OpenTelemetry tracing enabled", endpoint=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"))
+    return True
+
+
+def get_tracer():
+    """Returns the scrai OpenTelemetry tracer, or None if opentelemetry is not installed."""
+    global _tracer
+    if _tracer is None:
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            _tracer = False
+        else:
+            _tracer = trace.get_tracer("scrai")
+    return _tracer or None
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """
+    Runs the block inside a span that becomes the parent of spans started
+    within it, including ones started in tasks created inside the block.
+    """
+    tracer = get_tracer()
+    if tracer is None:
+        yield _NoOpSpan()
+        return
+    with tracer.start_as_current_span(name, attributes=_clean(attributes)) as current:
+        yield current
+
+
+def start_span(name: str, **attributes: Any) -> Any:
+    """
+    Starts a span that the caller ends explicitly, for work whose start and
+    end are reported by separate callbacks. The span is not made current.
+    """
+    tracer = get_tracer()
+    if tracer is None:
+        return _NoOpSpan()
+    return tracer.start_span(name, attributes=_clean(attributes))
+
+
+def _clean(attributes: dict) -> Optional[dict]:
+    # OpenTelemetry rejects None attribute values
+    return {key: value for key, value in attributes.items() if value is not None}
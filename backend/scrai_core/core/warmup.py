@@ -0,0 +1,92 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Approximate process start; this module is imported early by main.py.
+PROCESS_STARTED = time.perf_counter()
+
+
+class WarmupState:
+    """Tracks the background warm-up of heavy dependencies for the health endpoints."""
+    def __init__(self):
+        self.started: bool = False
+        self.ready: bool = False
+        self.error: Optional[str] = None
+        # The shared agent chat model built during warm-up, for Simulation(llm=...)
+        self.agent_llm: Any = None
+        self.component_seconds: Dict[str, float] = {}
+        self.time_to_ready_seconds: Optional[float] = None
+        self.time_to_first_tick_seconds: Optional[float] = None
+
+    def mark_first_tick(self):
+        if self.time_to_first_tick_seconds is None:
+            self.time_to_first_tick_seconds = time.perf_counter() - PROCESS_STARTED
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "status": "ready" if self.ready else ("failed" if self.error else "warming_up"),
+            "error": self.error,
+            "component_seconds": self.component_seconds,
+            "time_to_ready_seconds": self.time_to_ready_seconds,
+            "time_to_first_tick_seconds": self.time_to_first_tick_seconds,
+        }
+
+
+WARMUP_STATE = WarmupState()
+
+
+def _load_cognition_graph(state: WarmupState):
+    import langgraph.graph  # noqa: F401
+
+
+async def _load_embedding_model(state: WarmupState):
+    from scrai_core.agents.embedding_pool import default_worker_count
+    from scrai_core.agents.embeddings import embed_texts, start_embedding_pool
+
+    num_workers = default_worker_count()
+    if num_workers > 0:
+        await start_embedding_pool(num_workers)
+    # Encode once so lazy kernels and tokenizer caches are initialised too
+    await embed_texts(["warm-up"])
+
+
+def _load_llm_clients(state: WarmupState):
+    from scrai_core.agents.cognition import get_agent_chat_model
+    state.agent_llm = get_agent_chat_model()
+
+
+WARMUP_STEPS: List[Tuple[str, Callable[[WarmupState], Any]]] = [
+    ("cognition_graph", _load_cognition_graph),
+    ("embedding_model", _load_embedding_model),
+    ("llm_clients", _load_llm_clients),
+]
+
+
+async def warm_up(state: WarmupState = WARMUP_STATE) -> WarmupState:
+    """
+    Loads the heavy dependencies once, off the event loop, recording how long
+    each step took. The app is marked ready only if every step succeeds.
+    """
+    state.started = True
+    for name, step in WARMUP_STEPS:
+        started = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(step):
+                await step(state)
+            else:
+                await asyncio.to_thread(step, state)
+        except Exception as e:
+            state.error = f"{name}: {e}"
+            logger.error("Warm-up step failed", step=name, error=e)
+            return state
+        state.component_seconds[name] = time.perf_counter() - started
+        logger.info("Warm-up step complete", step=name, seconds=state.component_seconds[name])
+
+    state.ready = True
+    state.time_to_ready_seconds = time.perf_counter() - PROCESS_STARTED
+    logger.info("Warm-up complete", time_to_ready_seconds=state.time_to_ready_seconds)
+    return state
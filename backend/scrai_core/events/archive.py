@@ -0,0 +1,280 @@
+"""
+Archives the Redis event streams to compressed Parquet files on local disk
+and trims archived entries from Redis, so Redis memory stays flat while the
+full history of a run remains readable offline.
+
+Files are laid out with Hive-style partitions:
+
+    {ARCHIVE_DIR}/{stream}/run={run_id}/date=YYYY-MM-DD/hour=HH/{first_id}_{last_id}.parquet
+
+so a whole stream can be analysed with
+``pyarrow.dataset.dataset(f"{ARCHIVE_DIR}/action_events", partitioning="hive")``.
+
+    python -m scrai_core.events.archive            # run the archiver worker
+    python -m scrai_core.events.archive --once     # archive everything now and exit
+"""
+import argparse
+import asyncio
+import glob
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, UTC
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import structlog
+
+from scrai_core.core.metrics import ARCHIVED_EVENTS, TRIMMED_EVENTS
+from scrai_core.events.bus import EventBus, parse_stream_id
+from scrai_core.events.codec import get_codec
+from scrai_core.events.monitor import MONITORED_STREAMS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is the optional "archive" extra
+    pa = None
+    pq = None
+
+logger = structlog.get_logger(__name__)
+
+# (stream message id, event data)
+ArchiveRecord = Tuple[str, Dict[str, Any]]
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Stream archiving requires pyarrow (install the 'archive' extra)")
+
+
+def _file_ids(path: str) -> Tuple[str, str]:
+    """The first and last stream IDs covered by an archive file, from its name."""
+    first_id, _, last_id = os.path.basename(path)[:-len(".parquet")].partition("_")
+    return first_id, last_id
+
+
+def list_archive_files(directory: str, stream: str, run_id: Optional[str] = None) -> List[str]:
+    """Returns a stream's archive files in stream order."""
+    pattern = os.path.join(directory, stream, f"run={run_id or '*'}", "date=*", "hour=*", "*.parquet")
+    return sorted(glob.glob(pattern), key=lambda path: parse_stream_id(_file_ids(path)[0]))
+
+
+def iter_archive(
+    directory: str,
+    stream: str,
+    start_after: Optional[str] = None,
+    run_id: Optional[str] = None,
+) -> Iterator[ArchiveRecord]:
+    """
+    Yields (stream_id, event) records from a stream's archive in stream order,
+    optionally only those after the stream ID start_after.
+    """
+    _require_pyarrow()
+    codec = get_codec("orjson")
+    after = parse_stream_id(start_after) if start_after else None
+    for path in list_archive_files(directory, stream, run_id):
+        if after is not None and parse_stream_id(_file_ids(path)[1]) <= after:
+            continue
+        table = pq.read_table(path, columns=["stream_id", "data"])
+        for stream_id, data in zip(table.column("stream_id").to_pylist(), table.column("data").to_pylist()):
+            if after is None or parse_stream_id(stream_id) > after:
+                yield stream_id, codec.decode(data)
+
+
+def _next_id(stream_id: str) -> str:
+    milliseconds, sequence = parse_stream_id(stream_id)
+    return f"{milliseconds}-{sequence + 1}"
+
+
+class StreamArchiver:
+    """
+    Tails each stream with XRANGE, buffers the entries and rolls them into a
+    Parquet file once roll_rows entries or roll_seconds have accumulated.
+    After a file is safely on disk the archived range is trimmed from Redis,
+    but never past what every consumer group has been delivered; a stream
+    without consumer groups is archived but not trimmed.
+    """
+    def __init__(
+        self,
+        event_bus: EventBus,
+        directory: Optional[str] = None,
+        streams: Optional[List[str]] = None,
+        run_id: Optional[str] = None,
+        roll_rows: Optional[int] = None,
+        roll_seconds: Optional[float] = None,
+        poll_seconds: float = 1.0,
+        batch_size: int = 1000,
+        trim: bool = True,
+    ):
+        _require_pyarrow()
+        self.event_bus = event_bus
+        self.directory = directory or os.getenv("ARCHIVE_DIR", "archive")
+        self.streams = streams or MONITORED_STREAMS
+        self.run_id = run_id or os.getenv("SIMULATION_RUN_ID") or datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
+        self.roll_rows = roll_rows or int(os.getenv("ARCHIVE_ROLL_ROWS", "10000"))
+        self.roll_seconds = roll_seconds or float(os.getenv("ARCHIVE_ROLL_SECONDS", "60"))
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.trim = trim
+        self.compression = os.getenv("ARCHIVE_COMPRESSION", "zstd")
+        self._codec = get_codec("orjson")
+        self._buffers: Dict[str, List[ArchiveRecord]] = defaultdict(list)
+        self._buffer_started: Dict[str, float] = {}
+        # Stream ID of the last entry read (buffered or archived) per stream
+        self._read_id: Dict[str, Optional[str]] = {}
+
+    def last_archived_id(self, stream: str) -> Optional[str]:
+        """The newest stream ID already on disk for a stream, from any run."""
+        files = list_archive_files(self.directory, stream)
+        if not files:
+            return None
+        return max((_file_ids(path)[1] for path in files), key=parse_stream_id)
+
+    async def poll(self, stream: str) -> int:
+        """Reads the entries added since the last poll into the buffer. Returns how many."""
+        if stream not in self._read_id:
+            self._read_id[stream] = self.last_archived_id(stream)
+        read = 0
+        while True:
+            start = f"({self._read_id[stream]}" if self._read_id[stream] else "-"
+            batch = await self.event_bus.read_range(stream, start=start, count=self.batch_size)
+            if batch:
+                if not self._buffers[stream]:
+                    self._buffer_started[stream] = time.monotonic()
+                self._buffers[stream].extend(batch)
+                self._read_id[stream] = batch[-1][0]
+                read += len(batch)
+            if len(batch) < self.batch_size:
+                return read
+
+    def _should_roll(self, stream: str) -> bool:
+        buffer = self._buffers[stream]
+        return bool(buffer) and (
+            len(buffer) >= self.roll_rows
+            or time.monotonic() - self._buffer_started[stream] >= self.roll_seconds
+        )
+
+    def write_files(self, stream: str, records: List[ArchiveRecord]) -> List[str]:
+        """Writes records to one Parquet file per hour partition and returns the paths."""
+        partitions: Dict[Tuple[str, str], List[ArchiveRecord]] = defaultdict(list)
+        for record in records:
+            created = datetime.fromtimestamp(parse_stream_id(record[0])[0] / 1000, UTC)
+            partitions[(created.strftime("%Y-%m-%d"), created.strftime("%H"))].append(record)
+
+        paths = []
+        for (date, hour), rows in partitions.items():
+            directory = os.path.join(self.directory, stream, f"run={self.run_id}", f"date={date}", f"hour={hour}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{rows[0][0]}_{rows[-1][0]}.parquet")
+            tmp_path = f"{path}.tmp"
+            pq.write_table(self._to_table(rows), tmp_path, compression=self.compression)
+            os.replace(tmp_path, path)
+            paths.append(path)
+        return paths
+
+    def _to_table(self, rows: List[ArchiveRecord]) -> "pa.Table":
+        """
+        One row per entry: the fields most analyses filter on as typed
+        columns, plus the whole event as JSON in data.
+        """
+        events = [event for _, event in rows]
+        return pa.table({
+            "stream_id": pa.array([stream_id for stream_id, _ in rows], pa.string()),
+            "timestamp": pa.array([parse_stream_id(stream_id)[0] for stream_id, _ in rows], pa.timestamp("ms", tz="UTC")),
+            "event_id": pa.array([event.get("event_id") for event in events], pa.string()),
+            "entity_id": pa.array([event.get("entity_id") for event in events], pa.string()),
+            "sequence": pa.array([event.get("sequence") for event in events], pa.int64()),
+            "action_type": pa.array([event.get("action_type") for event in events], pa.string()),
+            "schema_version": pa.array([event.get("schema_version") for event in events], pa.string()),
+            "data": pa.array([self._codec.encode(event).decode("utf-8") for event in events], pa.string()),
+        })
+
+    async def flush(self, stream: str) -> List[str]:
+        """Archives everything buffered for a stream, then trims it from Redis."""
+        records, self._buffers[stream] = self._buffers[stream], []
+        if not records:
+            return []
+        try:
+            paths = await asyncio.to_thread(self.write_files, stream, records)
+        except Exception:
+            self._buffers[stream][:0] = records
+            raise
+        ARCHIVED_EVENTS.labels(stream=stream).inc(len(records))
+        logger.info("Archived stream entries", stream=stream, entries=len(records), files=paths)
+        if self.trim:
+            await self.trim_archived(stream, records[-1][0])
+        return paths
+
+    async def trim_archived(self, stream: str, archived_id: str) -> int:
+        """Trims entries up to archived_id that every consumer group has been delivered."""
+        groups = await self.event_bus.group_info(stream)
+        if not groups:
+            return 0
+        # Consumers acknowledge on delivery, so delivered entries are finished with
+        bound = min(
+            [archived_id] + [group["last-delivered-id"] for group in groups],
+            key=parse_stream_id,
+        )
+        if parse_stream_id(bound) == (0, 0):
+            return 0
+        trimmed = await self.event_bus.trim(stream, _next_id(bound))
+        TRIMMED_EVENTS.labels(stream=stream).inc(trimmed)
+        return trimmed
+
+    async def archive_once(self, force: bool = False) -> int:
+        """Polls every stream and rolls the buffers that are due (all of them if force)."""
+        read = 0
+        for stream in self.streams:
+            read += await self.poll(stream)
+            if force or self._should_roll(stream):
+                await self.flush(stream)
+        return read
+
+    async def run(self):
+        """Archives until cancelled, then writes whatever is still buffered."""
+        logger.info("Stream archiver starting...", directory=self.directory, run_id=self.run_id, streams=self.streams)
+        await self.event_bus.connect()
+        try:
+            while True:
+                try:
+                    await self.archive_once()
+                except Exception as e:
+                    logger.error("Failed to archive streams", error=e)
+                await asyncio.sleep(self.poll_seconds)
+        except asyncio.CancelledError:
+            logger.info("Stream archiver stopped.")
+        finally:
+            for stream in self.streams:
+                try:
+                    await self.flush(stream)
+                except Exception as e:
+                    logger.error("Failed to archive buffered entries", stream=stream, error=e)
+            await self.event_bus.disconnect()
+
+
+async def _archive_once(args: argparse.Namespace):
+    archiver = StreamArchiver(EventBus(), directory=args.directory, run_id=args.run_id, trim=not args.no_trim)
+    await archiver.event_bus.connect()
+    try:
+        await archiver.archive_once(force=True)
+    finally:
+        await archiver.event_bus.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive the Redis event streams to Parquet files.")
+    parser.add_argument("--directory", help="Archive root (default: ARCHIVE_DIR or ./archive).")
+    parser.add_argument("--run-id", help="Run partition (default: SIMULATION_RUN_ID or the start time).")
+    parser.add_argument("--once", action="store_true", help="Archive everything in the streams now and exit.")
+    parser.add_argument("--no-trim", action="store_true", help="Keep archived entries in Redis.")
+    args = parser.parse_args()
+
+    if args.once:
+        asyncio.run(_archive_once(args))
+    else:
+        archiver = StreamArchiver(EventBus(), directory=args.directory, run_id=args.run_id, trim=not args.no_trim)
+        asyncio.run(archiver.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,20 @@
 import redis.asyncio as redis
 from redis.exceptions import ResponseError
-import json
-from typing import AsyncGenerator, Dict, Any
+from typing import AsyncGenerator, Dict, Any, List, Optional, Tuple, Union
 import os
+from scrai_core.events.codec import EventCodec, codec_for_content_type, get_codec
 
 class EventBus:
-    def __init__(self, redis_url: str = None):
+    def __init__(self, redis_url: str = None, codec: Optional[EventCodec] = None):
         self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        # Codec used for publishing; entries are always read with the codec they were written with
+        self.codec = codec or get_codec()
         self._redis = None
 
     async def connect(self):
         """Establishes connection to Redis."""
-        self._redis = redis.from_url(self.redis_url, decode_responses=True)
+        # Responses stay as bytes so binary payloads such as msgpack survive
+        self._redis = redis.from_url(self.redis_url, decode_responses=False)
         await self._redis.ping()
         print(f"Connected to Redis at {self.redis_url}")
 
@@ -21,25 +24,108 @@ class EventBus:
             await self._redis.aclose()
             print("Disconnected from Redis.")
 
-    async def publish(self, stream_name: str, event_data: Dict[str, Any]):
-        """Publishes an event to a Redis Stream."""
+    async def publish(self, stream_name: str, event_data: Dict[str, Any], maxlen: Optional[int] = None):
+        """Publishes an event to a Redis Stream, keeping at most maxlen entries if given."""
         if not self._redis:
             raise ConnectionError("EventBus not connected. Call connect() first.")
         
-        message_id = await self._redis.xadd(stream_name, {"data": json.dumps(event_data)})
+        message_id = await self._redis.xadd(
+            stream_name,
+            {"data": self.codec.encode(event_data), "content_type": self.codec.content_type},
+            maxlen=maxlen,
+            approximate=False,
+        )
         # print(f"Published to stream '{stream_name}' with ID: {message_id}")
-        return message_id
+        return _text(message_id)
 
-    async def subscribe(self, stream_name: str, consumer_group: str, consumer_name: str) -> AsyncGenerator[Dict[str, Any], None]:
+    async def read_range(self, stream_name: str, start: str = "-", end: str = "+", count: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Reads a range of a Redis Stream without a consumer group.
+        Returns (message_id, event_data) pairs in stream order.
+        Use an exclusive start such as "(<id>" to page through a stream.
+        """
+        if not self._redis:
+            raise ConnectionError("EventBus not connected. Call connect() first.")
+
+        messages = await self._redis.xrange(stream_name, min=start, max=end, count=count)
+        return [
+            (_text(message_id), decode_entry(message_data))
+            for message_id, message_data in messages
+            if b"data" in message_data
+        ]
+
+    async def last_id(self, stream_name: str) -> Optional[str]:
+        """Returns the ID of the newest entry in a Redis Stream, or None if it is empty."""
+        if not self._redis:
+            raise ConnectionError("EventBus not connected. Call connect() first.")
+
+        messages = await self._redis.xrevrange(stream_name, count=1)
+        return _text(messages[0][0]) if messages else None
+
+    async def group_info(self, stream_name: str) -> List[Dict[str, Any]]:
+        """
+        Returns XINFO GROUPS for a stream: one dict per consumer group with
+        name, consumers, pending, last-delivered-id and, on Redis 7+, lag.
+        Returns an empty list if the stream does not exist yet.
+        """
+        if not self._redis:
+            raise ConnectionError("EventBus not connected. Call connect() first.")
+
+        try:
+            groups = await self._redis.xinfo_groups(stream_name)
+            return [{_text(key): _text(value) for key, value in group.items()} for group in groups]
+        except ResponseError as e:
+            if "no such key" in str(e).lower():
+                return []
+            raise
+
+    async def stream_length(self, stream_name: str) -> int:
+        if not self._redis:
+            raise ConnectionError("EventBus not connected. Call connect() first.")
+
+        return await self._redis.xlen(stream_name)
+
+    async def delete_streams(self, *stream_names: str) -> int:
+        """Deletes whole streams, including their consumer groups. Returns how many existed."""
+        if not self._redis:
+            raise ConnectionError("EventBus not connected. Call connect() first.")
+
+        return await self._redis.delete(*stream_names)
+
+    async def destroy_group(self, stream_name: str, consumer_group: str) -> bool:
+        """Removes a consumer group (XGROUP DESTROY), so it no longer holds back trimming. Returns whether it existed."""
+        if not self._redis:
+            raise ConnectionError("EventBus not connected. Call connect() first.")
+
+        return bool(await self._redis.xgroup_destroy(stream_name, consumer_group))
+
+    async def trim(self, stream_name: str, min_id: str) -> int:
+        """Removes every entry older than min_id (XTRIM MINID). Returns how many were removed."""
+        if not self._redis:
+            raise ConnectionError("EventBus not connected. Call connect() first.")
+
+        return await self._redis.xtrim(stream_name, minid=min_id, approximate=False)
+
+    async def subscribe(self, stream_name: str, consumer_group: str, consumer_name: str, start_id: str = "0") -> AsyncGenerator[Dict[str, Any], None]:
         """
         Subscribes to a Redis Stream using a consumer group.
         Yields parsed event data.
         """
+        async for _, event_data in self.subscribe_with_ids(stream_name, consumer_group, consumer_name, start_id):
+            yield event_data
+
+    async def subscribe_with_ids(self, stream_name: str, consumer_group: str, consumer_name: str, start_id: str = "0") -> AsyncGenerator[Tuple[str, Dict[str, Any]], None]:
+        """
+        Like subscribe(), but yields (message_id, event_data) pairs so the
+        consumer can report how far through the stream it has got. A group
+        that does not exist yet is created to deliver the entries after
+        start_id ("0": all retained entries, "$": only new ones).
+        """
         if not self._redis:
             raise ConnectionError("RedisEventBus not connected. Call connect() first.")
 
         try:
-            await self._redis.xgroup_create(stream_name, consumer_group, id='0', mkstream=True)
+            await self._redis.xgroup_create(stream_name, consumer_group, id=start_id, mkstream=True)
             print(f"Consumer group '{consumer_group}' created for stream '{stream_name}'.")
         except ResponseError as e:
             if "BUSYGROUP" not in str(e):
@@ -63,13 +149,93 @@ class EventBus:
                             # Acknowledge the message
                             await self._redis.xack(stream_name, consumer_group, message_id)
                             # print(f"Acknowledged message {message_id} from stream {stream_name}")
-                            
+                            message_id = _text(message_id)
+
                             # Parse and yield the event
-                            if "data" in message_data:
-                                yield json.loads(message_data["data"])
+                            if b"data" in message_data:
+                                yield message_id, decode_entry(message_data)
                             else:
                                 print(f"Warning: Message {message_id} in stream {stream_name} has no 'data' field.")
 
             except Exception as e:
                 print(f"Error during Redis stream subscription: {e}")
                 # Depending on error, might want to re-establish connection or retry after a delay
+
+
+    async def subscribe_batches(self, stream_name: str, consumer_group: str, consumer_name: str, count: int = 100) -> AsyncGenerator[List[Tuple[str, Dict[str, Any]]], None]:
+        """
+        Like subscribe_with_ids(), but yields whatever is waiting (up to count
+        entries) as one list, so consumers can handle a backlog in batches.
+        """
+        if not self._redis:
+            raise ConnectionError("RedisEventBus not connected. Call connect() first.")
+
+        try:
+            await self._redis.xgroup_create(stream_name, consumer_group, id='0', mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+        while True:
+            try:
+                messages = await self._redis.xreadgroup(
+                    consumer_group,
+                    consumer_name,
+                    {stream_name: '>'},
+                    count=count,
+                    block=1000
+                )
+                for _, message_list in messages or []:
+                    if not message_list:
+                        continue
+                    # Decode entry by entry so one bad entry does not lose the rest of the batch
+                    batch = []
+                    for message_id, message_data in message_list:
+                        message_id = _text(message_id)
+                        if b"data" not in message_data:
+                            print(f"Warning: Message {message_id} in stream {stream_name} has no 'data' field.")
+                            continue
+                        try:
+                            batch.append((message_id, decode_entry(message_data)))
+                        except Exception as e:
+                            print(f"Warning: Skipping undecodable message {message_id} in stream {stream_name}: {e}")
+                    await self._redis.xack(stream_name, consumer_group, *[message_id for message_id, _ in message_list])
+                    if batch:
+                        yield batch
+            except Exception as e:
+                print(f"Error during Redis stream subscription: {e}")
+
+
+def get_event_bus(redis_url: str = None) -> EventBus:
+    """
+    Returns an EventBus for the backend chosen by EVENT_BUS_BACKEND: "redis"
+    (default) or "memory", the in-process bus for single-process runs, in
+    which every bus created in the same event loop shares the same streams.
+    """
+    backend = os.getenv("EVENT_BUS_BACKEND", "redis").lower()
+    if backend == "memory":
+        from scrai_core.events.inprocess import InProcessEventBus
+        return InProcessEventBus()
+    if backend != "redis":
+        raise ValueError(f"Unsupported EVENT_BUS_BACKEND: {backend}")
+    return EventBus(redis_url)
+
+
+def _text(value: Any) -> Any:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def decode_entry(fields: Dict[Union[bytes, str], Any]) -> Dict[str, Any]:
+    """
+    Decodes a stream entry's data field with the codec named by its
+    content_type field. Entries written before content types were recorded
+    are JSON.
+    """
+    content_type = fields.get(b"content_type")
+    return codec_for_content_type(_text(content_type)).decode(fields[b"data"])
+
+
+def parse_stream_id(stream_id: str) -> Tuple[int, int]:
+    """Splits a Redis stream ID ("<ms>-<seq>") into a tuple that sorts in stream order."""
+    milliseconds, _, sequence = stream_id.partition("-")
+    return int(milliseconds), int(sequence or 0)
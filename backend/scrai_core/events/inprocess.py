@@ -0,0 +1,261 @@
+import asyncio
+import itertools
+import os
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Deque, Dict, List, Optional, Set, Tuple
+
+from scrai_core.core.backpressure import DEFAULT_GROUPS
+from scrai_core.events.bus import EventBus, parse_stream_id
+from scrai_core.events.codec import EventCodec
+
+
+@dataclass
+class _Group:
+    # Absolute position of the next entry to deliver
+    position: int
+    last_delivered_id: str = "0-0"
+    consumers: Set[str] = field(default_factory=set)
+
+
+class _Stream:
+    def __init__(self):
+        self.entries: Deque[Tuple[str, Dict[str, Any]]] = deque()
+        # Absolute position of entries[0]; positions survive trimming
+        self.base = 0
+        self.groups: Dict[str, _Group] = {}
+        self.changed = asyncio.Condition()
+
+    @property
+    def end(self) -> int:
+        return self.base + len(self.entries)
+
+    def lag(self, group: _Group) -> int:
+        return self.end - max(group.position, self.base)
+
+
+class InProcessBroker:
+    """
+    The streams shared by every InProcessEventBus in one event loop. Entries
+    are kept as the published dicts, with Redis-style "<ms>-<seq>" IDs, until
+    they are trimmed or the stream is deleted.
+    """
+    def __init__(self, max_pending: Optional[int] = None, retention: Optional[int] = None, groups: Optional[List[str]] = None):
+        # Publishing waits while a watched consumer group is this many entries behind
+        self.max_pending = max_pending or int(os.getenv("EVENT_BUS_MAX_PENDING", "10000"))
+        # Only these groups hold publishers back, so a group whose consumer died cannot stall them
+        self.groups = set(groups or [g.strip() for g in os.getenv("BACKPRESSURE_GROUPS", DEFAULT_GROUPS).split(",") if g.strip()])
+        # Delivered entries beyond this many per stream are discarded, like MAXLEN
+        self.retention = retention or int(os.getenv("EVENT_BUS_RETENTION", "100000"))
+        self.streams: Dict[str, _Stream] = {}
+        self._last_id: Tuple[int, int] = (0, 0)
+
+    def stream(self, name: str) -> _Stream:
+        if name not in self.streams:
+            self.streams[name] = _Stream()
+        return self.streams[name]
+
+    def next_id(self) -> str:
+        milliseconds = int(time.time() * 1000)
+        last_ms, last_seq = self._last_id
+        self._last_id = (milliseconds, 0) if milliseconds > last_ms else (last_ms, last_seq + 1)
+        return f"{self._last_id[0]}-{self._last_id[1]}"
+
+
+_brokers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, InProcessBroker]" = weakref.WeakKeyDictionary()
+
+
+def get_broker() -> InProcessBroker:
+    """The broker for the running event loop (asyncio primitives belong to one loop)."""
+    loop = asyncio.get_running_loop()
+    if loop not in _brokers:
+        _brokers[loop] = InProcessBroker()
+    return _brokers[loop]
+
+
+def _after(start: str) -> Tuple[Tuple[int, int], bool]:
+    """Parses an XRANGE start bound into (id, exclusive)."""
+    if start == "-":
+        return (0, 0), False
+    if start.startswith("("):
+        return parse_stream_id(start[1:]), True
+    return parse_stream_id(start), False
+
+
+def _position_after(stream: _Stream, start_id: str) -> int:
+    """The absolute position of the first entry after start_id ("$": the end of the stream)."""
+    if start_id == "$":
+        return stream.end
+    bound = parse_stream_id(start_id)
+    return stream.base + sum(1 for message_id, _ in stream.entries if parse_stream_id(message_id) <= bound)
+
+
+class InProcessEventBus(EventBus):
+    """
+    An EventBus backed by in-memory streams for single-process runs and
+    tests. Event dicts are handed to consumers as published, with no
+    serialization or network round trip. Consumer groups behave as with
+    Redis: each group receives every entry once, shared between its
+    consumers, starting from the oldest retained entry. Publishing blocks
+    while a group in BACKPRESSURE_GROUPS is max_pending entries behind.
+    """
+    def __init__(self, broker: Optional[InProcessBroker] = None, codec: Optional[EventCodec] = None):
+        # The codec is unused here but kept for callers that read it off any EventBus
+        super().__init__(codec=codec)
+        self._broker = broker
+        self._connected = False
+
+    @property
+    def broker(self) -> InProcessBroker:
+        if self._broker is None:
+            self._broker = get_broker()
+        return self._broker
+
+    def _check(self):
+        if not self._connected:
+            raise ConnectionError("EventBus not connected. Call connect() first.")
+
+    async def connect(self):
+        self._connected = True
+
+    async def disconnect(self):
+        self._connected = False
+
+    async def publish(self, stream_name: str, event_data: Dict[str, Any], maxlen: Optional[int] = None):
+        self._check()
+        broker = self.broker
+        stream = broker.stream(stream_name)
+        async with stream.changed:
+            await stream.changed.wait_for(
+                lambda: all(
+                    stream.lag(group) < broker.max_pending
+                    for name, group in stream.groups.items()
+                    if name in broker.groups
+                )
+            )
+            message_id = broker.next_id()
+            stream.entries.append((message_id, event_data))
+            # Like XADD MAXLEN: the oldest entries go whether or not they were delivered
+            while maxlen is not None and len(stream.entries) > maxlen:
+                stream.entries.popleft()
+                stream.base += 1
+            # Drop the oldest entries once every group has been delivered them
+            while len(stream.entries) > broker.retention and all(
+                group.position > stream.base for group in stream.groups.values()
+            ):
+                stream.entries.popleft()
+                stream.base += 1
+            stream.changed.notify_all()
+        return message_id
+
+    async def read_range(self, stream_name: str, start: str = "-", end: str = "+", count: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        self._check()
+        stream = self.broker.streams.get(stream_name)
+        if stream is None:
+            return []
+        after, exclusive = _after(start)
+        until = None if end == "+" else parse_stream_id(end)
+        records = []
+        for message_id, event_data in stream.entries:
+            parsed = parse_stream_id(message_id)
+            if parsed < after or (exclusive and parsed == after):
+                continue
+            if until is not None and parsed > until:
+                break
+            records.append((message_id, event_data))
+            if count is not None and len(records) >= count:
+                break
+        return records
+
+    async def last_id(self, stream_name: str) -> Optional[str]:
+        self._check()
+        stream = self.broker.streams.get(stream_name)
+        return stream.entries[-1][0] if stream and stream.entries else None
+
+    async def group_info(self, stream_name: str) -> List[Dict[str, Any]]:
+        self._check()
+        stream = self.broker.streams.get(stream_name)
+        if stream is None:
+            return []
+        return [
+            {
+                "name": name,
+                "consumers": len(group.consumers),
+                # Entries are acknowledged as they are delivered
+                "pending": 0,
+                "last-delivered-id": group.last_delivered_id,
+                "lag": stream.lag(group),
+            }
+            for name, group in stream.groups.items()
+        ]
+
+    async def stream_length(self, stream_name: str) -> int:
+        self._check()
+        stream = self.broker.streams.get(stream_name)
+        return len(stream.entries) if stream else 0
+
+    async def delete_streams(self, *stream_names: str) -> int:
+        self._check()
+        return sum(self.broker.streams.pop(name, None) is not None for name in stream_names)
+
+    async def destroy_group(self, stream_name: str, consumer_group: str) -> bool:
+        self._check()
+        stream = self.broker.streams.get(stream_name)
+        if stream is None or stream.groups.pop(consumer_group, None) is None:
+            return False
+        async with stream.changed:
+            # Publishers may have been waiting on the group
+            stream.changed.notify_all()
+        return True
+
+    async def trim(self, stream_name: str, min_id: str) -> int:
+        self._check()
+        stream = self.broker.streams.get(stream_name)
+        if stream is None:
+            return 0
+        bound = parse_stream_id(min_id)
+        trimmed = 0
+        async with stream.changed:
+            while stream.entries and parse_stream_id(stream.entries[0][0]) < bound:
+                stream.entries.popleft()
+                stream.base += 1
+                trimmed += 1
+            stream.changed.notify_all()
+        return trimmed
+
+    async def subscribe_with_ids(self, stream_name: str, consumer_group: str, consumer_name: str, start_id: str = "0") -> AsyncGenerator[Tuple[str, Dict[str, Any]], None]:
+        self._check()
+        stream = self.broker.stream(stream_name)
+        # Like XGROUP CREATE: a new group starts after start_id
+        if consumer_group not in stream.groups:
+            stream.groups[consumer_group] = _Group(position=_position_after(stream, start_id))
+        group = stream.groups[consumer_group]
+        group.consumers.add(consumer_name)
+        while True:
+            async with stream.changed:
+                # Entries trimmed before delivery are skipped, as with XTRIM
+                await stream.changed.wait_for(lambda: max(group.position, stream.base) < stream.end)
+                group.position = max(group.position, stream.base)
+                message_id, event_data = stream.entries[group.position - stream.base]
+                group.position += 1
+                group.last_delivered_id = message_id
+                # Wake publishers waiting for this group to catch up
+                stream.changed.notify_all()
+            yield message_id, event_data
+
+    async def subscribe_batches(self, stream_name: str, consumer_group: str, consumer_name: str, count: int = 100) -> AsyncGenerator[List[Tuple[str, Dict[str, Any]]], None]:
+        self._check()
+        stream = self.broker.stream(stream_name)
+        group = stream.groups.setdefault(consumer_group, _Group(position=stream.base))
+        group.consumers.add(consumer_name)
+        while True:
+            async with stream.changed:
+                await stream.changed.wait_for(lambda: max(group.position, stream.base) < stream.end)
+                start = max(group.position, stream.base) - stream.base
+                batch = list(itertools.islice(stream.entries, start, start + count))
+                group.position = stream.base + start + len(batch)
+                group.last_delivered_id = batch[-1][0]
+                stream.changed.notify_all()
+            yield batch
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import structlog
+
+from scrai_core.core.metrics import STREAM_CONSUMER_LAG, STREAM_CONSUMER_LAG_SECONDS, STREAM_LENGTH, STREAM_PENDING
+from scrai_core.events.bus import EventBus, parse_stream_id
+
+logger = structlog.get_logger(__name__)
+
+MONITORED_STREAMS = ["action_events", "world_state_committed_events"]
+
+
+@dataclass
+class GroupLag:
+    stream: str
+    group: str
+    pending: int
+    lag: Optional[int]
+    lag_seconds: float
+
+
+def stream_id_seconds(stream_id: str) -> float:
+    """The wall-clock time (Unix seconds) encoded in a Redis stream ID."""
+    return parse_stream_id(stream_id)[0] / 1000
+
+
+class StreamLagMonitor:
+    """
+    Polls every consumer group on the monitored streams and exports their
+    lag (entries not yet delivered), lag in seconds (how long the oldest
+    undelivered entry has been waiting) and pending (delivered, unacked)
+    counts as Prometheus gauges.
+    """
+    def __init__(self, event_bus: EventBus, streams: Optional[List[str]] = None, interval_seconds: Optional[float] = None):
+        self.event_bus = event_bus
+        self.streams = streams or MONITORED_STREAMS
+        self.interval_seconds = interval_seconds or float(os.getenv("STREAM_MONITOR_INTERVAL_SECONDS", "5"))
+
+    async def collect(self) -> Dict[str, List[GroupLag]]:
+        """Reads the current lag of every group and updates the gauges."""
+        snapshot = {}
+        now = time.time()
+        for stream in self.streams:
+            STREAM_LENGTH.labels(stream=stream).set(await self.event_bus.stream_length(stream))
+            groups = []
+            for info in await self.event_bus.group_info(stream):
+                group = info["name"]
+                oldest_undelivered = await self.event_bus.read_range(stream, start=f"({info['last-delivered-id']}", count=1)
+                lag_seconds = max(0.0, now - stream_id_seconds(oldest_undelivered[0][0])) if oldest_undelivered else 0.0
+                group_lag = GroupLag(
+                    stream=stream,
+                    group=group,
+                    pending=info["pending"],
+                    lag=info.get("lag"),
+                    lag_seconds=lag_seconds,
+                )
+                STREAM_PENDING.labels(stream=stream, group=group).set(group_lag.pending)
+                STREAM_CONSUMER_LAG_SECONDS.labels(stream=stream, group=group).set(lag_seconds)
+                # lag is only reported by Redis 7+ and is unknown after XDEL
+                if group_lag.lag is not None:
+                    STREAM_CONSUMER_LAG.labels(stream=stream, group=group).set(group_lag.lag)
+                groups.append(group_lag)
+            snapshot[stream] = groups
+        return snapshot
+
+    async def run(self):
+        """Collects every interval_seconds until cancelled."""
+        logger.info("Stream lag monitor starting...", streams=self.streams, interval_seconds=self.interval_seconds)
+        await self.event_bus.connect()
+        try:
+            while True:
+                try:
+                    await self.collect()
+                except Exception as e:
+                    logger.error("Failed to collect stream lag", error=e)
+                await asyncio.sleep(self.interval_seconds)
+        except asyncio.CancelledError:
+            logger.info("Stream lag monitor stopped.")
+        finally:
+            await self.event_bus.disconnect()
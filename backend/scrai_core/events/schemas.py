@@ -1,8 +1,21 @@
+import time
 from uuid import UUID, uuid4
 from pydantic import BaseModel, Field
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Tuple, Type, TypeVar
 
-class ActionEvent(BaseModel):
+class TimedEvent(BaseModel):
+    """
+    Events carry wall-clock timestamps (Unix seconds) for each pipeline hop
+    they pass through, e.g. published, consumed, committed, memory_persisted.
+    """
+    timings: Dict[str, float] = Field(default_factory=dict)
+
+    def mark(self, hop: str) -> float:
+        """Records the current time for a hop and returns it."""
+        self.timings[hop] = time.time()
+        return self.timings[hop]
+
+class ActionEvent(TimedEvent):
     event_id: UUID = Field(default_factory=uuid4)
     sequence: int
     entity_id: str
@@ -12,15 +25,66 @@ class ActionEvent(BaseModel):
 
 from typing import Literal
 
-class WorldStateCommittedEvent(BaseModel):
+class WorldStateCommittedEvent(TimedEvent):
+    """
+    The outcome of one ActionEvent. Schema 2.0 references the action by ID
+    instead of embedding it; the action's hop timings are carried over in
+    timings with an "action_" prefix (action_published, action_consumed,
+    action_committed).
+    """
     event_id: UUID = Field(default_factory=uuid4)
     sequence: int
     entity_id: str
-    schema_version: str = "1.0"
-    action_event: ActionEvent
+    schema_version: str = "2.0"
+    action_id: UUID
+    action_type: str
     previous_state: Dict[str, Any]
     new_state: Dict[str, Any]
 
+    @classmethod
+    def from_action(cls, action_event: ActionEvent, previous_state: Dict[str, Any], new_state: Dict[str, Any]) -> "WorldStateCommittedEvent":
+        return cls(
+            event_id=action_event.event_id,
+            sequence=action_event.sequence,
+            entity_id=action_event.entity_id,
+            action_id=action_event.event_id,
+            action_type=action_event.action_type,
+            previous_state=previous_state,
+            new_state=new_state,
+            timings={f"action_{hop}": at for hop, at in action_event.timings.items()},
+        )
+
+
+def _upgrade_committed_1_0(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Schema 1.0 committed events embedded the whole ActionEvent."""
+    data = dict(data)
+    action = data.pop("action_event", None) or {}
+    data.setdefault("action_id", action.get("event_id", data.get("event_id")))
+    data.setdefault("action_type", action.get("action_type"))
+    timings = {f"action_{hop}": at for hop, at in (action.get("timings") or {}).items()}
+    data["timings"] = {**timings, **(data.get("timings") or {})}
+    data["schema_version"] = "2.0"
+    return data
+
+# (model, schema_version) -> function returning the data in the model's current schema
+SCHEMA_UPGRADES: Dict[Tuple[Type[BaseModel], str], Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    (WorldStateCommittedEvent, "1.0"): _upgrade_committed_1_0,
+}
+
+EventModel = TypeVar("EventModel", bound=BaseModel)
+
+def parse_event(model: Type[EventModel], data: Dict[str, Any]) -> EventModel:
+    """
+    Builds an event from decoded stream data, first upgrading data written
+    in an older schema_version. Upgrades live here rather than in model
+    validators so current-schema events are validated entirely by
+    pydantic-core, with no Python hooks on the consumer hot path.
+    """
+    upgrade = SCHEMA_UPGRADES.get((model, data.get("schema_version")))
+    if upgrade is not None:
+        data = upgrade(data)
+    return model.model_validate(data)
+
 ActionType = Literal["move", "interact_with_object", "communicate"]
 
 def create_action_event(agent_id: str, action_type: ActionType, payload: Dict[str, Any], sequence: int) -> ActionEvent:
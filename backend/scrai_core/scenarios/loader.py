@@ -1,9 +1,17 @@
+import os
+import random
+from typing import Tuple
+import yaml
 from sqlalchemy.orm import Session
-from scrai_core.agents.models import Agent
+from scrai_core.agents.models import Agent, EpisodicMemory
+from scrai_core.scenarios.schemas import Scenario
+from scrai_core.world.models import WorldObject
 import logging
 
 logger = logging.getLogger(__name__)
 
+PREFABS_DIR = os.path.join(os.path.dirname(__file__), "prefabs")
+
 def create_agent(db: Session, name: str, latitude: float, longitude: float) -> Agent:
     """
     Creates a new agent and saves it to the database.
@@ -20,3 +28,53 @@ def create_agent(db: Session, name: str, latitude: float, longitude: float) -> A
         db.rollback()
         logger.error(f"Failed to create agent '{name}': {e}")
         raise
+
+def load_scenario(path: str) -> Scenario:
+    """
+    Parses a scenario YAML file. A bare name such as "village" refers to a
+    prefab in scrai_core/scenarios/prefabs.
+    """
+    if not os.path.exists(path) and os.path.exists(os.path.join(PREFABS_DIR, f"{path}.yaml")):
+        path = os.path.join(PREFABS_DIR, f"{path}.yaml")
+    with open(path) as f:
+        return Scenario.model_validate(yaml.safe_load(f))
+
+def clear_world(db: Session):
+    """Deletes all agents, memories and world objects."""
+    db.query(EpisodicMemory).delete()
+    db.query(Agent).delete()
+    db.query(WorldObject).delete()
+    db.commit()
+
+def apply_scenario(db: Session, scenario: Scenario) -> Tuple[int, int]:
+    """Adds the scenario's agents and objects to the database. Returns (agents, objects) created."""
+    agents = [Agent(name=a.name, latitude=a.latitude, longitude=a.longitude) for a in scenario.agents]
+    objects = [
+        WorldObject(object_type=o.object_type, position=f"{o.latitude},{o.longitude}", properties=dict(o.properties))
+        for o in scenario.objects
+    ]
+
+    population = scenario.random
+    if population is not None:
+        rng = random.Random(population.seed)
+        point = lambda: (rng.uniform(*population.latitude_range), rng.uniform(*population.longitude_range))
+        for i in range(population.agents):
+            latitude, longitude = point()
+            agents.append(Agent(name=f"{scenario.name}-{i}", latitude=latitude, longitude=longitude))
+        for _ in range(population.objects):
+            latitude, longitude = point()
+            objects.append(WorldObject(
+                object_type=population.object_type,
+                position=f"{latitude:.6f},{longitude:.6f}",
+                properties={"resource_level": population.resource_level},
+            ))
+
+    try:
+        db.add_all(agents + objects)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to apply scenario '{scenario.name}': {e}")
+        raise
+    logger.info(f"Applied scenario '{scenario.name}': {len(agents)} agents, {len(objects)} objects.")
+    return len(agents), len(objects)
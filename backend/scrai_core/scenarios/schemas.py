@@ -0,0 +1,31 @@
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel, Field
+
+class ScenarioAgent(BaseModel):
+    name: str
+    latitude: float
+    longitude: float
+
+class ScenarioObject(BaseModel):
+    object_type: str
+    latitude: float
+    longitude: float
+    properties: Dict[str, Any] = Field(default_factory=dict)
+
+class RandomPopulation(BaseModel):
+    """Synthetic agents and resource objects scattered uniformly over a bounding box."""
+    agents: int = 0
+    objects: int = 0
+    object_type: str = "resource"
+    resource_level: int = 10
+    latitude_range: Tuple[float, float] = (-90.0, 90.0)
+    longitude_range: Tuple[float, float] = (-180.0, 180.0)
+    seed: int = 0
+
+class Scenario(BaseModel):
+    """A prefab world: named agents and objects plus an optional random population."""
+    name: str
+    description: str = ""
+    agents: List[ScenarioAgent] = Field(default_factory=list)
+    objects: List[ScenarioObject] = Field(default_factory=list)
+    random: Optional[RandomPopulation] = None
@@ -0,0 +1,92 @@
+"""
+Object interactions as one atomic SQL statement per batch.
+
+An interaction takes `amount` off an object's properties["resource_level"],
+never below zero. Instead of loading each WorldObject, changing the JSONB in
+Python and committing (a read-modify-write that loses updates when several
+consumers touch the same object), a batch of interactions is applied with a
+single statement. The statement locks the objects involved in ID order,
+applies each object's total in one jsonb_set, and returns the levels from
+before the batch, from which the level before and after every single
+interaction is worked out.
+"""
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+Level = Union[int, float]
+
+INTERACT_SQL = text("""
+WITH requested AS (
+    SELECT object_id, SUM(amount) AS total
+    FROM unnest(CAST(:object_ids AS text[]), CAST(:amounts AS numeric[])) AS r(object_id, amount)
+    GROUP BY object_id
+),
+locked AS (
+    SELECT w.id,
+           CASE WHEN jsonb_typeof(w.properties -> 'resource_level') = 'number'
+                THEN (w.properties ->> 'resource_level')::numeric
+                ELSE 0 END AS old_level
+    FROM world_objects w
+    JOIN requested r ON r.object_id = w.id
+    ORDER BY w.id
+    FOR UPDATE OF w
+),
+updated AS (
+    UPDATE world_objects w
+    SET properties = jsonb_set(
+        COALESCE(w.properties, '{}'::jsonb),
+        '{resource_level}',
+        to_jsonb(GREATEST(l.old_level - r.total, 0))
+    )
+    FROM locked l
+    JOIN requested r ON r.object_id = l.id
+    WHERE w.id = l.id AND l.old_level > 0
+)
+SELECT id, old_level FROM locked
+""")
+
+
+def _level(value: Decimal) -> Level:
+    return int(value) if value == value.to_integral_value() else float(value)
+
+
+def resolve_levels(
+    object_ids: Sequence[str],
+    amounts: Sequence[Level],
+    old_levels: Dict[str, Level],
+) -> List[Optional[Tuple[Level, Level]]]:
+    """
+    Replays the interactions in order from the levels before the batch.
+    Returns (level before, level after) per interaction, or None where the
+    object does not exist. An empty resource is left as it is.
+    """
+    levels = dict(old_levels)
+    results = []
+    for object_id, amount in zip(object_ids, amounts):
+        if object_id not in levels:
+            results.append(None)
+            continue
+        before = levels[object_id]
+        after = max(before - amount, 0) if before > 0 else before
+        levels[object_id] = after
+        results.append((before, after))
+    return results
+
+
+def apply_interactions(
+    db: Session,
+    object_ids: Sequence[str],
+    amounts: Optional[Sequence[Level]] = None,
+) -> List[Optional[Tuple[Level, Level]]]:
+    """
+    Applies a batch of interactions in the session's transaction (the caller
+    commits) and returns (level before, level after) per interaction.
+    """
+    if not object_ids:
+        return []
+    amounts = list(amounts) if amounts is not None else [1] * len(object_ids)
+    rows = db.execute(INTERACT_SQL, {"object_ids": list(object_ids), "amounts": amounts}).all()
+    return resolve_levels(object_ids, amounts, {object_id: _level(old_level) for object_id, old_level in rows})
@@ -0,0 +1,111 @@
+"""
+Delivery of the communicate action. WorldStateSystem hands each committed
+communicate action to a MessageRouter, which appends the message to one
+bounded stream per recipient (agent_inbox:{agent_id}). A message goes to
+payload["recipient_id"], or, without a recipient, to every agent within
+payload["radius_km"] (default MESSAGE_BROADCAST_RADIUS_KM) of the sender.
+Agents read their inbox with an Inbox, which remembers the last entry it
+returned so each read costs only the new messages.
+"""
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import structlog
+from sqlalchemy.orm import Session
+
+from scrai_core.agents.models import Agent
+from scrai_core.core.metrics import MESSAGE_DELIVERY_SECONDS, MESSAGES_DELIVERED, observe_event_latency
+from scrai_core.events.bus import EventBus
+from scrai_core.world.geo import haversine_km
+
+logger = structlog.get_logger(__name__)
+
+
+def inbox_stream(agent_id: str) -> str:
+    return f"agent_inbox:{agent_id}"
+
+
+class MessageRouter:
+    """Resolves the recipients of a communicate action and writes to their inboxes."""
+    def __init__(self, event_bus: EventBus, max_inbox: Optional[int] = None, broadcast_radius_km: Optional[float] = None):
+        self.event_bus = event_bus
+        # Older messages are dropped once an inbox holds this many
+        self.max_inbox = max_inbox or int(os.getenv("MESSAGE_INBOX_MAXLEN", "100"))
+        self.broadcast_radius_km = broadcast_radius_km or float(os.getenv("MESSAGE_BROADCAST_RADIUS_KM", "1.0"))
+
+    def recipients(self, db: Session, sender: Agent, payload: Dict[str, Any]) -> List[str]:
+        """The agent IDs a communicate payload addresses; unknown recipients are dropped."""
+        recipient_id = payload.get("recipient_id")
+        if recipient_id:
+            if recipient_id == sender.id or db.query(Agent.id).filter(Agent.id == recipient_id).first() is None:
+                return []
+            return [recipient_id]
+        try:
+            radius_km = float(payload.get("radius_km") or self.broadcast_radius_km)
+        except (TypeError, ValueError):
+            radius_km = self.broadcast_radius_km
+        return [
+            agent_id
+            for agent_id, latitude, longitude in db.query(Agent.id, Agent.latitude, Agent.longitude).filter(Agent.id != sender.id)
+            if haversine_km(sender.latitude, sender.longitude, latitude, longitude) <= radius_km
+        ]
+
+    async def deliver(
+        self,
+        sender_id: str,
+        recipient_ids: List[str],
+        content: str,
+        action_id: Optional[str] = None,
+        sent_at: Optional[float] = None,
+        broadcast: bool = False,
+    ) -> int:
+        """Appends the message to every recipient's inbox. Returns how many inboxes received it."""
+        delivered_at = time.time()
+        for recipient_id in recipient_ids:
+            await self.event_bus.publish(
+                inbox_stream(recipient_id),
+                {
+                    "action_id": action_id,
+                    "sender_id": sender_id,
+                    "recipient_id": recipient_id,
+                    "content": content,
+                    "broadcast": broadcast,
+                    "sent_at": sent_at,
+                    "delivered_at": delivered_at,
+                },
+                maxlen=self.max_inbox,
+            )
+        if recipient_ids:
+            MESSAGES_DELIVERED.labels(kind="broadcast" if broadcast else "direct").inc(len(recipient_ids))
+            observe_event_latency("message_route", sent_at, delivered_at)
+        logger.info("Delivered message", sender_id=sender_id, recipients=len(recipient_ids))
+        return len(recipient_ids)
+
+
+class Inbox:
+    """One agent's view of its inbox stream, read from a cursor."""
+    def __init__(self, event_bus: EventBus, agent_id: str, batch_size: int = 100):
+        self.event_bus = event_bus
+        self.stream_name = inbox_stream(agent_id)
+        self.batch_size = batch_size
+        # ID of the last message returned
+        self.cursor: Optional[str] = None
+
+    async def read_new(self) -> List[Dict[str, Any]]:
+        """The messages delivered since the previous read, oldest first."""
+        messages = []
+        while True:
+            start = f"({self.cursor}" if self.cursor else "-"
+            batch = await self.event_bus.read_range(self.stream_name, start=start, count=self.batch_size)
+            for message_id, message in batch:
+                self.cursor = message_id
+                messages.append(message)
+            if len(batch) < self.batch_size:
+                break
+        read_at = time.time()
+        for message in messages:
+            if message.get("sent_at") is not None:
+                MESSAGE_DELIVERY_SECONDS.observe(max(0.0, read_at - message["sent_at"]))
+            observe_event_latency("message_inbox", message.get("delivered_at"), read_at)
+        return messages
@@ -1,8 +1,17 @@
+from typing import Optional, Tuple
 from sqlalchemy import Column, String, JSON
 from sqlalchemy.dialects.postgresql import JSONB
 from scrai_core.core.persistence import Base
 from uuid import uuid4
 
+def parse_position(position: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
+    """Parses a "latitude,longitude" position string; returns (None, None) if it is not numeric."""
+    try:
+        latitude, longitude = (float(part) for part in (position or "").split(","))
+    except ValueError:
+        return None, None
+    return latitude, longitude
+
 class WorldObject(Base):
     __tablename__ = "world_objects"
 
@@ -11,5 +20,13 @@ class WorldObject(Base):
     position = Column(String, nullable=False)
     properties = Column(JSONB, nullable=True)
 
+    @property
+    def latitude(self) -> Optional[float]:
+        return parse_position(self.position)[0]
+
+    @property
+    def longitude(self) -> Optional[float]:
+        return parse_position(self.position)[1]
+
     def __repr__(self):
         return f"<WorldObject(id='{self.id}', type='{self.object_type}', position='{self.position}')>"
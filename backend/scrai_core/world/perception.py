@@ -0,0 +1,158 @@
+"""
+A shared, incrementally maintained view of the world for agent perception.
+
+Instead of every agent querying the agents and world_objects tables on
+every tick, one PerceptionService per process loads them once, applies the
+deltas WorldStateSystem publishes on world_state_committed_events, and
+reconciles against the database every PERCEPTION_RECONCILE_SECONDS to pick
+up changes made outside the event stream (agents created through the API,
+scenario resets). The view trails the database by the consumer lag of the
+committed stream. Each reconcile records the stream's last ID first; events
+at or before it are already in the database and are not applied again.
+"""
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+from scrai_core.agents.models import Agent
+from scrai_core.core.persistence import get_session
+from scrai_core.events.bus import EventBus, parse_stream_id
+from scrai_core.world.models import WorldObject
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class AgentView:
+    id: str
+    name: str
+    latitude: float
+    longitude: float
+
+
+@dataclass
+class ObjectView:
+    id: str
+    object_type: str
+    latitude: Optional[float]
+    longitude: Optional[float]
+    properties: Dict[str, Any] = field(default_factory=dict)
+
+
+class PerceptionService:
+    """Keeps AgentView and ObjectView snapshots current from committed events."""
+    def __init__(
+        self,
+        event_bus: Optional[EventBus] = None,
+        session_factory: Callable = get_session,
+        reconcile_seconds: Optional[float] = None,
+        consumer_group: str = "perception_group",
+    ):
+        self.event_bus = event_bus
+        self.session_factory = session_factory
+        self.reconcile_seconds = reconcile_seconds or float(os.getenv("PERCEPTION_RECONCILE_SECONDS", "30"))
+        self.stream_name = "world_state_committed_events"
+        self.consumer_group = consumer_group
+        self.consumer_name = f"{consumer_group}_1"
+        self.agents: Dict[str, AgentView] = {}
+        self.objects: Dict[str, ObjectView] = {}
+        self.last_reconciled: Optional[float] = None
+        # Last committed-stream ID the database already reflected at the latest reconcile
+        self.reconciled_id: Optional[str] = None
+        # Set when an event names an entity the view does not know yet
+        self._stale = False
+        self._reconciling = asyncio.Lock()
+
+    def _load(self) -> Tuple[Dict[str, AgentView], Dict[str, ObjectView]]:
+        session = next(self.session_factory())
+        try:
+            agents = {
+                agent.id: AgentView(agent.id, agent.name, agent.latitude, agent.longitude)
+                for agent in session.query(Agent).all()
+            }
+            objects = {
+                obj.id: ObjectView(obj.id, obj.object_type, obj.latitude, obj.longitude, dict(obj.properties or {}))
+                for obj in session.query(WorldObject).all()
+            }
+        finally:
+            session.close()
+        return agents, objects
+
+    async def reconcile(self):
+        """Replaces the view with the current database state, off the event loop."""
+        reconciled_id = None
+        if self.event_bus is not None:
+            # Read before the database, so every event at or before it is already committed there
+            try:
+                reconciled_id = await self.event_bus.last_id(self.stream_name)
+            except ConnectionError:
+                # Not following the stream yet; run() starts after whatever is committed by then
+                pass
+        self.agents, self.objects = await asyncio.to_thread(self._load)
+        self.reconciled_id = reconciled_id
+        self.last_reconciled = time.monotonic()
+        self._stale = False
+        logger.debug("Reconciled perception view", agents=len(self.agents), objects=len(self.objects), stream_id=reconciled_id)
+
+    def invalidate(self):
+        """Makes the next perceive() reconcile, e.g. after agents were created or reset."""
+        self._stale = True
+
+    def apply(self, event: Dict[str, Any], message_id: Optional[str] = None):
+        """Applies one committed event's new_state (as a dict) to the view."""
+        if message_id is not None and self.reconciled_id is not None and parse_stream_id(message_id) <= parse_stream_id(self.reconciled_id):
+            # The reconciled database state already includes it, and may be newer
+            return
+        entity_id = event.get("entity_id")
+        new_state = event.get("new_state") or {}
+        agent = self.agents.get(entity_id)
+        if agent is None:
+            self._stale = True
+        elif new_state.get("latitude") is not None and new_state.get("longitude") is not None:
+            agent.latitude = new_state["latitude"]
+            agent.longitude = new_state["longitude"]
+
+        object_id = new_state.get("object_id")
+        if object_id is not None and "resource_level" in new_state:
+            obj = self.objects.get(object_id)
+            if obj is None:
+                self._stale = True
+            else:
+                obj.properties["resource_level"] = new_state["resource_level"]
+
+    def _due(self) -> bool:
+        return self._stale or self.last_reconciled is None or time.monotonic() - self.last_reconciled >= self.reconcile_seconds
+
+    async def refresh(self):
+        """Reconciles if the view is due; concurrent callers share one reconcile."""
+        if not self._due():
+            return
+        async with self._reconciling:
+            if self._due():
+                await self.reconcile()
+
+    async def perceive(self, agent_id: str) -> Tuple[Optional[AgentView], List[ObjectView], List[AgentView]]:
+        """The agent itself, the world objects and the other agents, from the view."""
+        await self.refresh()
+        others = [agent for other_id, agent in self.agents.items() if other_id != agent_id]
+        return self.agents.get(agent_id), list(self.objects.values()), others
+
+    async def run(self):
+        """Follows the committed-event stream until cancelled."""
+        logger.info("Perception service starting...")
+        await self.event_bus.connect()
+        try:
+            await self.reconcile()
+            # A new group starts right after the reconciled state; an existing one skips what it already holds
+            async for message_id, event in self.event_bus.subscribe_with_ids(
+                self.stream_name, self.consumer_group, self.consumer_name, start_id=self.reconciled_id or "$"
+            ):
+                self.apply(event, message_id)
+        except asyncio.CancelledError:
+            logger.info("Perception service stopped.")
+        finally:
+            await self.event_bus.disconnect()
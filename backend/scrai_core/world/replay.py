@@ -0,0 +1,251 @@
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from scrai_core.agents.models import Agent
+from scrai_core.core.persistence import get_session
+from scrai_core.events.bus import EventBus
+from scrai_core.world.models import WorldObject
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+COMMITTED_EVENT_STREAM = "world_state_committed_events"
+
+# (stream message id, committed event data)
+ReplayRecord = Tuple[Optional[str], Mapping[str, Any]]
+
+
+@dataclass
+class ReplayStats:
+    events_applied: int = 0
+    events_skipped: int = 0
+    last_stream_id: Optional[str] = None
+    apply_seconds: float = 0.0
+    write_seconds: float = 0.0
+
+    @property
+    def events_per_second(self) -> float:
+        return self.events_applied / self.apply_seconds if self.apply_seconds else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "events_applied": self.events_applied,
+            "events_skipped": self.events_skipped,
+            "last_stream_id": self.last_stream_id,
+            "apply_seconds": self.apply_seconds,
+            "write_seconds": self.write_seconds,
+            "events_per_second": self.events_per_second,
+        }
+
+
+class ReplayEngine:
+    """
+    Rebuilds the agent and world-object tables from a recorded
+    world_state_committed_events log, starting from a base state that holds
+    the agents and objects themselves (the log only records their positions
+    and resource levels).
+
+    State is held as plain row dictionaries and events are applied without
+    Pydantic validation or LLM calls, so the apply path runs as fast as the
+    log can be read. The committed new_state values are absolute, which makes
+    replaying an event that is already reflected in the base state a no-op.
+    """
+
+    def __init__(
+        self,
+        agents: Optional[Dict[str, Dict[str, Any]]] = None,
+        world_objects: Optional[Dict[str, Dict[str, Any]]] = None,
+    ):
+        self.agents: Dict[str, Dict[str, Any]] = agents if agents is not None else {}
+        self.world_objects: Dict[str, Dict[str, Any]] = world_objects if world_objects is not None else {}
+        self.stats = ReplayStats()
+
+    @classmethod
+    def from_session(cls, db: Session) -> "ReplayEngine":
+        """Creates an engine whose base state is the current contents of the database."""
+        agents = {
+            agent_id: {"id": agent_id, "name": name, "latitude": latitude, "longitude": longitude}
+            for agent_id, name, latitude, longitude in db.query(
+                Agent.id, Agent.name, Agent.latitude, Agent.longitude
+            )
+        }
+        world_objects = {
+            object_id: {
+                "id": object_id,
+                "object_type": object_type,
+                "position": position,
+                "properties": dict(properties or {}),
+            }
+            for object_id, object_type, position, properties in db.query(
+                WorldObject.id, WorldObject.object_type, WorldObject.position, WorldObject.properties
+            )
+        }
+        return cls(agents, world_objects)
+
+    def apply(self, event: Mapping[str, Any], stream_id: Optional[str] = None) -> None:
+        """
+        Applies a single committed event (as a plain dict) to the in-memory
+        state. Events for agents missing from the base state are skipped:
+        agents are created outside the event log, so their rows cannot be
+        rebuilt from it.
+        """
+        if stream_id is not None:
+            self.stats.last_stream_id = stream_id
+        entity_id = event.get("entity_id")
+        new_state = event.get("new_state")
+        agent = self.agents.get(entity_id)
+        if agent is None or new_state is None:
+            self.stats.events_skipped += 1
+            return
+
+        latitude = new_state.get("latitude")
+        longitude = new_state.get("longitude")
+        if latitude is not None and longitude is not None:
+            agent["latitude"] = latitude
+            agent["longitude"] = longitude
+
+        object_id = new_state.get("object_id")
+        if object_id is not None and "resource_level" in new_state:
+            world_object = self.world_objects.get(object_id)
+            if world_object is not None:
+                world_object["properties"]["resource_level"] = new_state["resource_level"]
+
+        self.stats.events_applied += 1
+
+    def apply_all(self, records: Iterable[ReplayRecord]) -> ReplayStats:
+        """Applies every (stream_id, event) record from an iterable source."""
+        apply = self.apply
+        started = time.perf_counter()
+        for stream_id, event in records:
+            apply(event, stream_id)
+        self.stats.apply_seconds += time.perf_counter() - started
+        return self.stats
+
+    async def apply_stream(self, records: AsyncIterator[ReplayRecord]) -> ReplayStats:
+        """Applies every (stream_id, event) record from an async source such as Redis."""
+        apply = self.apply
+        started = time.perf_counter()
+        async for stream_id, event in records:
+            apply(event, stream_id)
+        self.stats.apply_seconds += time.perf_counter() - started
+        return self.stats
+
+    def write(self, db: Session, chunk_size: int = 1000) -> None:
+        """
+        Bulk-writes the replayed state with INSERT ... ON CONFLICT DO UPDATE,
+        chunk_size rows per statement.
+        """
+        started = time.perf_counter()
+        agent_rows = list(self.agents.values())
+        for i in range(0, len(agent_rows), chunk_size):
+            statement = insert(Agent.__table__).values(agent_rows[i:i + chunk_size])
+            db.execute(statement.on_conflict_do_update(
+                index_elements=[Agent.__table__.c.id],
+                set_={
+                    "latitude": statement.excluded.latitude,
+                    "longitude": statement.excluded.longitude,
+                },
+            ))
+
+        object_rows = list(self.world_objects.values())
+        for i in range(0, len(object_rows), chunk_size):
+            statement = insert(WorldObject.__table__).values(object_rows[i:i + chunk_size])
+            db.execute(statement.on_conflict_do_update(
+                index_elements=[WorldObject.__table__.c.id],
+                set_={"properties": statement.excluded.properties},
+            ))
+
+        db.commit()
+        self.stats.write_seconds += time.perf_counter() - started
+        logger.info("Replayed state written", agents=len(agent_rows), world_objects=len(object_rows))
+
+
+async def iter_redis_stream(
+    event_bus: EventBus,
+    stream_name: str = COMMITTED_EVENT_STREAM,
+    start: str = "-",
+    end: str = "+",
+    batch_size: int = 1000,
+) -> AsyncIterator[ReplayRecord]:
+    """Pages through a Redis Stream with XRANGE, yielding (stream_id, event) records."""
+    while True:
+        batch = await event_bus.read_range(stream_name, start=start, end=end, count=batch_size)
+        for record in batch:
+            yield record
+        if len(batch) < batch_size:
+            return
+        start = f"({batch[-1][0]}"
+
+
+def iter_jsonl(path: str) -> Iterator[ReplayRecord]:
+    """
+    Reads a JSON Lines archive of committed events. Each line is either the
+    event itself or {"stream_id": ..., "data": <event>}.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "data" in record and "entity_id" not in record:
+                yield record.get("stream_id"), record["data"]
+            else:
+                yield None, record
+
+
+async def _replay(args: argparse.Namespace) -> Dict[str, Any]:
+    db = next(get_session())
+    try:
+        # The log only carries positions and resource levels; agent names and objects come from the base
+        engine = ReplayEngine.from_session(db)
+        if args.source == "redis":
+            event_bus = EventBus()
+            await event_bus.connect()
+            try:
+                await engine.apply_stream(iter_redis_stream(event_bus, args.stream, start=args.start))
+            finally:
+                await event_bus.disconnect()
+        elif args.source == "archive":
+            from scrai_core.events.archive import iter_archive
+            engine.apply_all(iter_archive(args.path, args.stream, run_id=args.run_id))
+        else:
+            engine.apply_all(iter_jsonl(args.path))
+
+        if args.write:
+            engine.write(db)
+    finally:
+        db.close()
+    return engine.stats.as_dict()
+
+
+def main(argv: Optional[List[str]] = None):
+    """
+    Replays the log on top of the current database contents. The events
+    record only agent positions and object resource levels, so agents and
+    objects must already exist there: restore a checkpoint or load the
+    scenario first rather than replaying into empty tables.
+    """
+    parser = argparse.ArgumentParser(description="Apply the committed event log on top of the current database contents.")
+    parser.add_argument("--source", choices=["redis", "jsonl", "archive"], default="redis")
+    parser.add_argument("--path", help="Archive file for --source jsonl, or the ARCHIVE_DIR root for --source archive.")
+    parser.add_argument("--run-id", help="Only replay this run's partition (--source archive).")
+    parser.add_argument("--stream", default=COMMITTED_EVENT_STREAM)
+    parser.add_argument("--start", default="-", help="First stream ID to replay (Redis source).")
+    parser.add_argument("--write", action="store_true", help="Bulk-write the replayed state to the database.")
+    args = parser.parse_args(argv)
+    if args.source in ("jsonl", "archive") and not args.path:
+        parser.error(f"--path is required for --source {args.source}")
+
+    stats = asyncio.run(_replay(args))
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
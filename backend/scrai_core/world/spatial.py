@@ -0,0 +1,297 @@
+"""
+Array-backed positions for vectorized spatial queries.
+
+SpatialStore keeps every agent's and object's coordinates in contiguous
+(n, 2) NumPy arrays of (latitude, longitude) degrees, with an ID -> row
+mapping that does not change while the entity exists: removed rows are set
+to NaN and reused by the next insert. It is seeded from the database and
+kept current by applying committed events, and answers whole-world queries
+(distance matrices, k nearest neighbours for every agent, neighbours within
+a radius) without Python loops over entities.
+
+Each position is also kept as a unit vector on the sphere, so the all-agent
+queries are matrix products (the dot product of two unit vectors falls as
+their great-circle distance grows) and only the selected pairs go through
+the haversine formula. Agents are compared in compact chunks, each with only
+the points in a latitude/longitude box around the chunk.
+"""
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from scrai_core.world.geo import EARTH_RADIUS_KM
+
+# (min latitude, min longitude, max latitude, max longitude)
+Bounds = Tuple[float, float, float, float]
+WORLD_BOUNDS: Bounds = (-90.0, -180.0, 90.0, 180.0)
+
+# Agents handled at once in the all-agent queries
+CHUNK_ROWS = 256
+# Up to this many neighbours are picked by repeated argmax rather than a partition
+TOP_K_PASSES = 8
+
+
+def parse_bounds(value: Optional[str]) -> Bounds:
+    """Parses "min_lat,min_lon,max_lat,max_lon"; the whole globe if unset."""
+    if not value:
+        return WORLD_BOUNDS
+    min_latitude, min_longitude, max_latitude, max_longitude = (float(part) for part in value.split(","))
+    return min_latitude, min_longitude, max_latitude, max_longitude
+
+
+def haversine_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Great-circle distances in km between every row of a (n, 2) and b (m, 2), as (n, m)."""
+    a, b = np.radians(a), np.radians(b)
+    d_phi = b[None, :, 0] - a[:, None, 0]
+    d_lambda = b[None, :, 1] - a[:, None, 1]
+    h = np.sin(d_phi / 2) ** 2 + np.cos(a[:, None, 0]) * np.cos(b[None, :, 0]) * np.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def unit_vectors(positions: np.ndarray) -> np.ndarray:
+    """(n, 2) latitude/longitude degrees as (n, 3) points on the unit sphere."""
+    latitude, longitude = np.radians(positions[:, 0]), np.radians(positions[:, 1])
+    cos_latitude = np.cos(latitude)
+    return np.stack([cos_latitude * np.cos(longitude), cos_latitude * np.sin(longitude), np.sin(latitude)], axis=1)
+
+
+def haversine_pairs(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Great-circle distances in km between matching rows of a and b, both (n, 2)."""
+    a, b = np.radians(a), np.radians(b)
+    h = np.sin((b[:, 0] - a[:, 0]) / 2) ** 2 + np.cos(a[:, 0]) * np.cos(b[:, 0]) * np.sin((b[:, 1] - a[:, 1]) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def clamp_positions(positions: np.ndarray, bounds: Bounds = WORLD_BOUNDS) -> np.ndarray:
+    """
+    Brings (n, 2) positions inside bounds. On the whole globe longitudes wrap
+    around the antimeridian; within narrower bounds both axes are clamped.
+    """
+    min_latitude, min_longitude, max_latitude, max_longitude = bounds
+    clamped = np.empty_like(positions, dtype=np.float64)
+    clamped[:, 0] = np.clip(positions[:, 0], min_latitude, max_latitude)
+    if (min_longitude, max_longitude) == (-180.0, 180.0):
+        clamped[:, 1] = (positions[:, 1] + 180.0) % 360.0 - 180.0
+    else:
+        clamped[:, 1] = np.clip(positions[:, 1], min_longitude, max_longitude)
+    return clamped
+
+
+def validate_moves(origins: np.ndarray, targets: np.ndarray, max_step_km: Optional[float] = None) -> np.ndarray:
+    """
+    Whether each move from origins to targets (both (n, 2)) is allowed:
+    finite coordinates and, if max_step_km is set, no further than that.
+    """
+    valid = np.isfinite(targets).all(axis=1)
+    if max_step_km is not None:
+        with np.errstate(invalid="ignore"):
+            valid &= haversine_pairs(origins, targets) <= max_step_km
+    return valid
+
+
+KM_PER_DEGREE_LATITUDE = np.pi * EARTH_RADIUS_KM / 180
+
+
+def _by_latitude(points: "_Points") -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """points.active() sorted by latitude, so a latitude band is a contiguous slice."""
+    rows, coordinates, vectors = points.active()
+    order = np.argsort(coordinates[:, 0], kind="stable")
+    return rows[order], coordinates[order], vectors[order]
+
+
+def _chunks(coordinates: np.ndarray) -> List[np.ndarray]:
+    """
+    Splits latitude-sorted points into chunks of about CHUNK_ROWS that are
+    compact in both directions: latitude strips, each cut up by longitude.
+    """
+    strips = max(1, int(round(np.sqrt(len(coordinates) / CHUNK_ROWS))))
+    chunks = []
+    for strip in np.array_split(np.arange(len(coordinates)), strips):
+        strip = strip[np.argsort(coordinates[strip, 1], kind="stable")]
+        chunks.extend(np.array_split(strip, max(1, -(-len(strip) // CHUNK_ROWS))))
+    return [chunk for chunk in chunks if len(chunk)]
+
+
+def _box(coordinates: np.ndarray, chunk: np.ndarray, margin_km: float) -> np.ndarray:
+    """
+    Positions (ascending) in the latitude-sorted coordinates of every point
+    that may be within margin_km of a point in chunk: a latitude band, then a
+    longitude window where the chunk is far enough from the poles for one.
+    """
+    margin = margin_km / KM_PER_DEGREE_LATITUDE
+    low = int(np.searchsorted(coordinates[:, 0], chunk[:, 0].min() - margin, "left"))
+    high = int(np.searchsorted(coordinates[:, 0], chunk[:, 0].max() + margin, "right"))
+    candidates = np.arange(low, high)
+    # Within angle d of a point at latitude phi, longitude differs by at most asin(sin d / cos phi)
+    sin_distance = np.sin(min(margin_km / EARTH_RADIUS_KM, np.pi / 2))
+    cos_latitude = np.cos(np.radians(np.abs(chunk[:, 0]).max()))
+    if sin_distance >= cos_latitude:
+        return candidates
+    reach = np.degrees(np.arcsin(sin_distance / cos_latitude))
+    west, east = chunk[:, 1].min() - reach, chunk[:, 1].max() + reach
+    if east - west >= 360.0:
+        return candidates
+    return candidates[(coordinates[low:high, 1] - west) % 360.0 <= east - west]
+
+
+def _top_k(similarity: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k largest values in each row."""
+    if k > TOP_K_PASSES:
+        return np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+    # For small k, k passes of argmax are several times faster than a partition per row
+    similarity = similarity.copy()
+    rows = np.arange(len(similarity))
+    columns = np.empty((len(similarity), k), dtype=np.intp)
+    for column in range(k):
+        columns[:, column] = similarity.argmax(axis=1)
+        similarity[rows, columns[:, column]] = -np.inf
+    return columns
+
+
+class _Points:
+    """IDs and coordinates of one kind of entity, with stable rows."""
+    def __init__(self, capacity: int = 64):
+        self.coordinates = np.full((capacity, 2), np.nan)
+        self.vectors = np.full((capacity, 3), np.nan)
+        self.ids: List[Optional[str]] = []
+        self.rows: Dict[str, int] = {}
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def set(self, entity_id: str, latitude: float, longitude: float) -> int:
+        row = self.rows.get(entity_id)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+                self.ids[row] = entity_id
+            else:
+                row = len(self.ids)
+                if row == len(self.coordinates):
+                    self.coordinates = np.concatenate([self.coordinates, np.full_like(self.coordinates, np.nan)])
+                    self.vectors = np.concatenate([self.vectors, np.full_like(self.vectors, np.nan)])
+                self.ids.append(entity_id)
+            self.rows[entity_id] = row
+        self.coordinates[row] = (latitude, longitude)
+        self.vectors[row] = unit_vectors(self.coordinates[row:row + 1])[0]
+        return row
+
+    def remove(self, entity_id: str):
+        row = self.rows.pop(entity_id, None)
+        if row is not None:
+            self.coordinates[row] = np.nan
+            self.vectors[row] = np.nan
+            self.ids[row] = None
+            self._free.append(row)
+
+    def active(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(rows, coordinates, unit vectors) of the entities that exist, in row order."""
+        rows = np.flatnonzero(~np.isnan(self.coordinates[:len(self.ids), 0]))
+        return rows, self.coordinates[rows], self.vectors[rows]
+
+
+class SpatialStore:
+    """Agent and object positions in NumPy arrays, synced from committed events."""
+    def __init__(self, bounds: Optional[Bounds] = None):
+        self.bounds = bounds or parse_bounds(os.getenv("WORLD_BOUNDS"))
+        self.agents = _Points()
+        self.objects = _Points()
+
+    def load(self, agents: Iterable[Any], world_objects: Iterable[Any]):
+        """Replaces the contents with the given Agent and WorldObject rows."""
+        self.agents, self.objects = _Points(), _Points()
+        for agent in agents:
+            self.agents.set(agent.id, agent.latitude, agent.longitude)
+        for obj in world_objects:
+            if obj.latitude is not None and obj.longitude is not None:
+                self.objects.set(obj.id, obj.latitude, obj.longitude)
+
+    def apply(self, event: Dict[str, Any]):
+        """Moves the event's agent to its committed new_state position (event as a dict)."""
+        new_state = event.get("new_state") or {}
+        if event.get("entity_id") is not None and new_state.get("latitude") is not None and new_state.get("longitude") is not None:
+            self.agents.set(event["entity_id"], new_state["latitude"], new_state["longitude"])
+
+    def position(self, agent_id: str) -> Optional[Tuple[float, float]]:
+        row = self.agents.rows.get(agent_id)
+        if row is None:
+            return None
+        latitude, longitude = self.agents.coordinates[row]
+        return float(latitude), float(longitude)
+
+    def distance_matrix(self) -> Tuple[List[str], np.ndarray]:
+        """Agent IDs and the (n, n) matrix of distances between them in km."""
+        rows, coordinates, _ = self.agents.active()
+        return [self.agents.ids[row] for row in rows], haversine_matrix(coordinates, coordinates)
+
+    def within(self, latitude: float, longitude: float, radius_km: float, objects: bool = False) -> List[str]:
+        """IDs of the agents (or objects) within radius_km of a point."""
+        points = self.objects if objects else self.agents
+        rows, coordinates, _ = points.active()
+        distances = haversine_matrix(np.array([[latitude, longitude]]), coordinates)[0]
+        return [points.ids[row] for row in rows[distances <= radius_km]]
+
+    def _nearest(self, points: _Points, k: int, exclude_self: bool) -> Dict[str, List[Tuple[str, float]]]:
+        agent_rows, agent_coordinates, agent_vectors = _by_latitude(self.agents)
+        rows, coordinates, vectors = (agent_rows, agent_coordinates, agent_vectors) if exclude_self else _by_latitude(points)
+        k = min(k, len(rows) - (1 if exclude_self else 0))
+        if k <= 0:
+            return {self.agents.ids[row]: [] for row in agent_rows}
+        ids = [points.ids[row] for row in rows]
+        # First guess at the distance holding k points, from the average density
+        spread = max(coordinates[-1, 0] - coordinates[0, 0], 1e-3) * KM_PER_DEGREE_LATITUDE
+        guess = spread * np.sqrt((k + 1) / len(rows))
+        nearest = {}
+        for chunk in _chunks(agent_coordinates):
+            chunk_coordinates = agent_coordinates[chunk]
+            margin = guess
+            while True:
+                candidates = _box(coordinates, chunk_coordinates, margin)
+                everything = len(candidates) == len(rows)
+                if len(candidates) < k + exclude_self and not everything:
+                    margin *= 2
+                    continue
+                # Larger dot product = closer; pick the k closest, then measure only those
+                similarity = agent_vectors[chunk] @ vectors[candidates].T
+                if exclude_self:
+                    similarity[np.arange(len(chunk)), np.searchsorted(candidates, chunk)] = -np.inf
+                selected = candidates[_top_k(similarity, k)]
+                distances = haversine_pairs(np.repeat(chunk_coordinates, k, axis=0), coordinates[selected.ravel()]).reshape(len(chunk), k)
+                # The box held everything within margin of the chunk, so the k found are the nearest
+                if distances.max() <= margin or everything:
+                    break
+                margin = distances.max()
+            order = np.argsort(distances, axis=1)
+            selected = np.take_along_axis(selected, order, axis=1).tolist()
+            distances = np.take_along_axis(distances, order, axis=1).tolist()
+            for position, indices, km in zip(chunk.tolist(), selected, distances):
+                nearest[self.agents.ids[agent_rows[position]]] = [(ids[index], distance) for index, distance in zip(indices, km)]
+        return nearest
+
+    def nearest_agents(self, k: int) -> Dict[str, List[Tuple[str, float]]]:
+        """For every agent, its k nearest other agents as (id, km), nearest first."""
+        return self._nearest(self.agents, k, exclude_self=True)
+
+    def nearest_objects(self, k: int) -> Dict[str, List[Tuple[str, float]]]:
+        """For every agent, its k nearest objects as (id, km), nearest first."""
+        return self._nearest(self.objects, k, exclude_self=False)
+
+    def has_neighbour(self, radius_km: float) -> Dict[str, bool]:
+        """For every agent, whether another agent or an object is within radius_km."""
+        agent_rows, agent_coordinates, agent_vectors = _by_latitude(self.agents)
+        _, object_coordinates, object_vectors = _by_latitude(self.objects)
+        # Within radius_km exactly when the dot product is at least the cosine of the angle
+        threshold = np.cos(min(radius_km / EARTH_RADIUS_KM, np.pi))
+        found = np.zeros(len(agent_rows), dtype=bool)
+        for chunk in _chunks(agent_coordinates):
+            candidates = _box(agent_coordinates, agent_coordinates[chunk], radius_km)
+            similarity = agent_vectors[chunk] @ agent_vectors[candidates].T
+            similarity[np.arange(len(chunk)), np.searchsorted(candidates, chunk)] = -np.inf
+            near = (similarity >= threshold).any(axis=1)
+            objects = _box(object_coordinates, agent_coordinates[chunk], radius_km)
+            if len(objects):
+                near |= (agent_vectors[chunk] @ object_vectors[objects].T >= threshold).any(axis=1)
+            found[chunk] = near
+        return {self.agents.ids[row]: bool(near) for row, near in zip(agent_rows, found)}
@@ -2,104 +2,227 @@ import asyncio
 from sqlalchemy.orm import Session
 from scrai_core.core.persistence import get_session
 from scrai_core.events.bus import EventBus
-from scrai_core.events.schemas import ActionEvent, WorldStateCommittedEvent
+from scrai_core.events.schemas import ActionEvent, WorldStateCommittedEvent, parse_event
 from scrai_core.agents.models import Agent
-from scrai_core.world.models import WorldObject
+from scrai_core.world.interactions import apply_interactions
+from scrai_core.world.messaging import MessageRouter
+from scrai_core.world.spatial import clamp_positions, parse_bounds, validate_moves
+from scrai_core.core.metrics import EVENTS_PROCESSED, REJECTED_MOVES, observe_event_latency
 from sqlalchemy.exc import SQLAlchemyError
 import structlog
 
 logger = structlog.get_logger(__name__)
 
-from typing import Callable
+import os
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
 
 class WorldStateSystem:
-    def __init__(self, event_bus: EventBus, session_factory: Callable[[], Session]):
+    def __init__(self, event_bus: EventBus, session_factory: Callable[[], Session], router: Optional[MessageRouter] = None):
         self.event_bus = event_bus
         self.session_factory = session_factory
+        # Writes communicate actions to the recipients' inbox streams
+        self.router = router or MessageRouter(event_bus)
         self.consumer_group = "world_state_group"
         self.consumer_name = "world_state_consumer_1"
         self.action_event_stream = "action_events"
         self.committed_event_stream = "world_state_committed_events"
+        # Most actions applied in one transaction
+        self.batch_size = int(os.getenv("WORLD_STATE_BATCH_SIZE", "64"))
+        # Move targets are clamped into these bounds; longer moves than MAX_MOVE_KM are rejected
+        self.bounds = parse_bounds(os.getenv("WORLD_BOUNDS"))
+        self.max_move_km = float(os.getenv("MAX_MOVE_KM")) if os.getenv("MAX_MOVE_KM") else None
+        # Stream ID of the last action handled, successfully or not
+        self.last_processed_id: Optional[str] = None
 
     async def process_action_event(self, event_data: dict):
         """
         Processes a single ActionEvent, updates the world state,
         and publishes a WorldStateCommittedEvent.
         """
-        try:
-            action_event = ActionEvent.model_validate(event_data)
+        await self.process_action_batch([event_data])
+
+    async def process_action_batch(self, batch: List[dict]):
+        """
+        Applies a batch of ActionEvents in one transaction, with every object
+        interaction in the batch in a single atomic statement, then publishes
+        a WorldStateCommittedEvent per action in order. If the transaction
+        fails, the actions are retried one by one so a bad action only loses
+        itself.
+        """
+        actions = []
+        for event_data in batch:
+            try:
+                action_event = parse_event(ActionEvent, event_data)
+            except Exception as e:
+                logger.error("Error parsing event data", event_data=event_data, error=e)
+                continue
+            consumed = action_event.mark("consumed")
+            observe_event_latency("action_queue", action_event.timings.get("published"), consumed)
             logger.info("Processing ActionEvent", event_id=action_event.event_id)
+            actions.append(action_event)
+        if actions:
+            await self._process(actions)
 
-            db: Session = next(self.session_factory())
+    async def _process(self, actions: List[ActionEvent]):
+        db: Session = next(self.session_factory())
+        try:
+            commits = self._apply(db, actions)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            # Database errors and bad payloads alike: only the failing action should be lost
+            if len(actions) > 1:
+                logger.warning("Batch failed, retrying actions one by one", actions=len(actions), error=e)
+                db.close()
+                for action_event in actions:
+                    await self._process([action_event])
+                return
+            if isinstance(e, SQLAlchemyError):
+                logger.error("Database error processing event", event_id=actions[0].event_id, error=e)
+            else:
+                logger.error("Error processing event", event_id=actions[0].event_id, error=e)
+            return
+        finally:
+            db.close()
+
+        for action_event, previous_state, new_state, recipient_ids in commits:
             try:
-                # Find the agent
-                agent = db.query(Agent).filter(Agent.id == action_event.entity_id).first()
-                if not agent:
-                    logger.warning("Agent not found", agent_id=action_event.entity_id)
-                    return
-
-                previous_state = {"latitude": agent.latitude, "longitude": agent.longitude}
-                
-                if action_event.action_type == "move":
-                    new_latitude = action_event.payload.get("new_latitude")
-                    new_longitude = action_event.payload.get("new_longitude")
-                    if new_latitude is not None and new_longitude is not None:
-                        agent.latitude = new_latitude
-                        agent.longitude = new_longitude
-                        logger.info("Agent moved", agent_id=agent.id, new_latitude=new_latitude, new_longitude=new_longitude)
-                
-                elif action_event.action_type == "interact_with_object":
-                    object_id = action_event.payload.get("object_id")
-                    target_object = db.query(WorldObject).filter(WorldObject.id == object_id).first()
-                    if target_object:
-                        # Example interaction: deplete a resource
-                        if target_object.properties.get("resource_level", 0) > 0:
-                            target_object.properties["resource_level"] -= 1
-                        logger.info("Agent interacted with object", agent_id=agent.id, object_id=object_id)
-
-                db.commit()
-                db.refresh(agent)
-                new_state = {"latitude": agent.latitude, "longitude": agent.longitude}
-                logger.info("Committed state change", agent_id=agent.id)
+                committed = action_event.mark("committed")
+                observe_event_latency("world_commit", action_event.timings.get("consumed"), committed)
+                logger.info("Committed state change", agent_id=action_event.entity_id)
+                if recipient_ids:
+                    await self.router.deliver(
+                        action_event.entity_id, recipient_ids, str(action_event.payload.get("message", "")),
+                        action_id=str(action_event.event_id), sent_at=action_event.timings.get("published"),
+                        broadcast=not action_event.payload.get("recipient_id"),
+                    )
 
                 # Create and publish the committed event
-                committed_event = WorldStateCommittedEvent(
-                    event_id=action_event.event_id,
-                    sequence=action_event.sequence,
-                    entity_id=action_event.entity_id,
-                    action_event=action_event,
-                    previous_state=previous_state,
-                    new_state=new_state
-                )
+                committed_event = WorldStateCommittedEvent.from_action(action_event, previous_state, new_state)
+                committed_event.mark("published")
                 await self.event_bus.publish(
                     self.committed_event_stream,
                     committed_event.model_dump(mode='json')
                 )
                 logger.info("Published WorldStateCommittedEvent", event_id=action_event.event_id)
+                EVENTS_PROCESSED.inc()
+            except Exception as e:
+                logger.error("Error publishing committed event", event_id=action_event.event_id, error=e)
 
-            except SQLAlchemyError as e:
-                db.rollback()
-                logger.error("Database error processing event", event_id=action_event.event_id, error=e)
-                # Optionally publish a failure event
-            finally:
-                db.close()
+    def _apply(self, db: Session, actions: List[ActionEvent]) -> List[Tuple[ActionEvent, dict, dict, List[str]]]:
+        """
+        Applies the actions to the session and returns (action, previous_state,
+        new_state, message recipients) for each action whose agent exists.
+        """
+        agent_ids = {action_event.entity_id for action_event in actions}
+        agents = {agent.id: agent for agent in db.query(Agent).filter(Agent.id.in_(agent_ids))}
+        moves = self._check_moves(actions, agents)
 
-        except Exception as e:
-            logger.error("Error parsing or processing event data", event_data=event_data, error=e)
+        applied = []
+        # (index into applied, object_id) for the interactions, applied together below
+        interactions = []
+        for index, action_event in enumerate(actions):
+            # Find the agent
+            agent = agents.get(action_event.entity_id)
+            if not agent:
+                logger.warning("Agent not found", agent_id=action_event.entity_id)
+                continue
+
+            previous_state = {"latitude": agent.latitude, "longitude": agent.longitude}
+            new_state = {}
+            recipient_ids = []
+
+            if action_event.action_type == "move":
+                target = moves.get(index)
+                if target is not None:
+                    agent.latitude, agent.longitude = target
+                    logger.info("Agent moved", agent_id=agent.id, new_latitude=agent.latitude, new_longitude=agent.longitude)
+
+            elif action_event.action_type == "interact_with_object":
+                object_id = action_event.payload.get("object_id")
+                if object_id:
+                    interactions.append((len(applied), str(object_id)))
+
+            elif action_event.action_type == "communicate":
+                recipient_ids = self.router.recipients(db, agent, action_event.payload)
+                # Recorded so stream consumers (the LOD scheduler) can see who has a message waiting
+                new_state["recipient_ids"] = recipient_ids
+
+            # Positions are read before commit, which would expire them
+            new_state = {"latitude": agent.latitude, "longitude": agent.longitude, **new_state}
+            applied.append((action_event, previous_state, new_state, recipient_ids))
+
+        levels = apply_interactions(db, [object_id for _, object_id in interactions])
+        for (index, object_id), level in zip(interactions, levels):
+            if level is None:
+                continue
+            _, previous_state, new_state, _ = applied[index]
+            # Record the resulting object state so the committed log can be replayed
+            previous_state["object_id"], previous_state["resource_level"] = object_id, level[0]
+            new_state["object_id"], new_state["resource_level"] = object_id, level[1]
+            logger.info("Agent interacted with object", agent_id=applied[index][0].entity_id, object_id=object_id)
+        return applied
+
+    def _check_moves(self, actions: List[ActionEvent], agents: Dict[str, Agent]) -> Dict[int, Tuple[float, float]]:
+        """
+        Validates and clamps the moves in the batch. Returns the allowed
+        target position by action index. Each move is measured from where the
+        agent's earlier accepted moves in the batch left it, so several moves
+        in one batch cannot cover more than MAX_MOVE_KM each. The moves are
+        checked in passes, the first move of every agent at once, then the
+        second, and so on.
+        """
+        passes: List[List[int]] = []
+        seen: Dict[str, int] = {}
+        for index, action_event in enumerate(actions):
+            if action_event.action_type == "move" and action_event.entity_id in agents:
+                rank = seen.get(action_event.entity_id, 0)
+                seen[action_event.entity_id] = rank + 1
+                if rank == len(passes):
+                    passes.append([])
+                passes[rank].append(index)
+
+        positions = {agent_id: (agent.latitude, agent.longitude) for agent_id, agent in agents.items()}
+        allowed: Dict[int, Tuple[float, float]] = {}
+        for indices in passes:
+            targets = np.full((len(indices), 2), np.nan)
+            origins = np.empty((len(indices), 2))
+            for row, index in enumerate(indices):
+                payload = actions[index].payload
+                origins[row] = positions[actions[index].entity_id]
+                try:
+                    targets[row] = (float(payload.get("new_latitude")), float(payload.get("new_longitude")))
+                except (TypeError, ValueError):
+                    pass
+            valid = validate_moves(origins, targets, self.max_move_km)
+            clamped = clamp_positions(targets, self.bounds)
+            for row, index in enumerate(indices):
+                if not valid[row]:
+                    REJECTED_MOVES.inc()
+                    logger.warning("Rejected move", agent_id=actions[index].entity_id, payload=actions[index].payload)
+                    continue
+                allowed[index] = positions[actions[index].entity_id] = (float(clamped[row, 0]), float(clamped[row, 1]))
+        return allowed
 
     async def run_consumer(self):
         """
-        Continuously listens for ActionEvents and processes them.
+        Continuously listens for ActionEvents and processes whatever has
+        arrived, up to batch_size at a time.
         """
         logger.info("WorldStateSystem consumer starting...")
         await self.event_bus.connect()
         try:
-            async for event_data in self.event_bus.subscribe(
+            async for batch in self.event_bus.subscribe_batches(
                 self.action_event_stream,
                 self.consumer_group,
-                self.consumer_name
+                self.consumer_name,
+                count=self.batch_size,
             ):
-                await self.process_action_event(event_data)
+                if not batch:
+                    continue
+                await self.process_action_batch([event_data for _, event_data in batch])
+                self.last_processed_id = batch[-1][0]
         except asyncio.CancelledError:
             logger.info("WorldStateSystem consumer stopped.")
         finally:
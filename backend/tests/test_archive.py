@@ -0,0 +1,61 @@
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+from scrai_core.events.bus import EventBus, parse_stream_id
+
+pytest.importorskip("pyarrow")
+from scrai_core.events.archive import StreamArchiver, iter_archive, list_archive_files
+
+HOUR_MS = 3600 * 1000
+
+def _fake_bus(entries, delivered_id):
+    """An EventBus whose stream holds entries and whose one group has been delivered up to delivered_id."""
+    event_bus = MagicMock(spec=EventBus)
+
+    async def read_range(stream, start="-", end="+", count=None):
+        after = parse_stream_id(start[1:]) if start.startswith("(") else (-1, -1)
+        return [entry for entry in entries if parse_stream_id(entry[0]) > after][:count]
+
+    event_bus.read_range = AsyncMock(side_effect=read_range)
+    event_bus.group_info = AsyncMock(return_value=[{"name": "group", "pending": 0, "last-delivered-id": delivered_id}])
+    event_bus.trim = AsyncMock(return_value=3)
+    return event_bus
+
+def _entries(count, start_ms):
+    return [
+        (f"{start_ms + i * HOUR_MS // 4}-0", {"event_id": f"e{i}", "entity_id": "a1", "sequence": i,
+                                            "action_type": "move", "schema_version": "1.0",
+                                            "payload": {"new_latitude": float(i)}})
+        for i in range(count)
+    ]
+
+@pytest.mark.asyncio
+async def test_archiver_writes_hourly_partitions_and_trims_delivered_entries(tmp_path):
+    entries = _entries(6, 1_700_000_000_000)
+    event_bus = _fake_bus(entries, delivered_id=entries[3][0])
+    archiver = StreamArchiver(event_bus, directory=str(tmp_path), streams=["action_events"], run_id="r1", batch_size=4)
+
+    await archiver.archive_once(force=True)
+
+    files = list_archive_files(str(tmp_path), "action_events")
+    assert len(files) == 2
+    assert all("/run=r1/date=2023-11-14/hour=" in path for path in files)
+    records = list(iter_archive(str(tmp_path), "action_events"))
+    assert [stream_id for stream_id, _ in records] == [stream_id for stream_id, _ in entries]
+    assert records[2][1]["payload"] == {"new_latitude": 2.0}
+    # Only what the consumer group has been delivered is trimmed
+    ms, seq = parse_stream_id(entries[3][0])
+    event_bus.trim.assert_awaited_once_with("action_events", f"{ms}-{seq + 1}")
+
+@pytest.mark.asyncio
+async def test_archiver_resumes_after_archived_entries(tmp_path):
+    entries = _entries(4, 1_700_000_000_000)
+    first = StreamArchiver(_fake_bus(entries[:2], "0-0"), directory=str(tmp_path), streams=["action_events"], run_id="r1")
+    await first.archive_once(force=True)
+    first.event_bus.trim.assert_not_awaited()
+
+    second = StreamArchiver(_fake_bus(entries, "0-0"), directory=str(tmp_path), streams=["action_events"], run_id="r2")
+    await second.archive_once(force=True)
+
+    assert len(list(iter_archive(str(tmp_path), "action_events"))) == 4
+    assert [stream_id for stream_id, _ in iter_archive(str(tmp_path), "action_events", run_id="r2")] == [e[0] for e in entries[2:]]
+    assert [stream_id for stream_id, _ in iter_archive(str(tmp_path), "action_events", start_after=entries[2][0])] == [entries[3][0]]
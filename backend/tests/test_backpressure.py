@@ -0,0 +1,58 @@
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+from prometheus_client import REGISTRY
+from scrai_core.core.backpressure import NORMAL, SLOW, BackpressureController
+from scrai_core.events.monitor import GroupLag, StreamLagMonitor
+
+def _controller(*groups: GroupLag) -> BackpressureController:
+    monitor = MagicMock(spec=StreamLagMonitor)
+    snapshot = {}
+    for group in groups:
+        snapshot.setdefault(group.stream, []).append(group)
+    monitor.collect = AsyncMock(return_value=snapshot)
+    return BackpressureController(
+        monitor,
+        groups=["world_state_group", "memory_consolidator_group"],
+        slow_backlog=100,
+        skip_backlog=300,
+        slow_lag_seconds=10,
+        skip_lag_seconds=30,
+        max_delay_seconds=4,
+    )
+
+def _lag(group="world_state_group", lag=0, pending=0, lag_seconds=0.0, stream="action_events"):
+    return GroupLag(stream=stream, group=group, pending=pending, lag=lag, lag_seconds=lag_seconds)
+
+@pytest.mark.asyncio
+async def test_ticks_run_normally_while_consumers_keep_up():
+    controller = _controller(_lag(lag=50, pending=10, lag_seconds=2))
+    assert await controller.before_tick()
+    assert REGISTRY.get_sample_value("simulation_backpressure_state") == 0
+
+@pytest.mark.asyncio
+async def test_ticks_slow_down_in_proportion_to_the_backlog():
+    controller = _controller(_lag(lag=150, pending=50), _lag("memory_consolidator_group", stream="world_state_committed_events"))
+    decision = await controller.check()
+    assert decision.state == SLOW
+    assert decision.group == "action_events/world_state_group"
+    assert decision.delay_seconds == pytest.approx(2.0)
+    assert REGISTRY.get_sample_value("simulation_backpressure_delay_seconds") == pytest.approx(2.0)
+
+@pytest.mark.asyncio
+async def test_ticks_are_skipped_past_the_skip_thresholds():
+    before = REGISTRY.get_sample_value("simulation_backpressure_ticks_total", {"action": "skipped"}) or 0
+    controller = _controller(_lag("memory_consolidator_group", lag=None, lag_seconds=45, stream="world_state_committed_events"))
+    assert not await controller.before_tick()
+    assert REGISTRY.get_sample_value("simulation_backpressure_state") == 2
+    assert REGISTRY.get_sample_value("simulation_backpressure_ticks_total", {"action": "skipped"}) == before + 1
+
+def test_unwatched_groups_are_ignored():
+    controller = _controller()
+    snapshot = {"world_state_committed_events": [_lag("memory_system_group", lag=10_000, stream="world_state_committed_events")]}
+    assert controller.decide(snapshot).state == NORMAL
+
+@pytest.mark.asyncio
+async def test_unreadable_lag_does_not_stop_the_simulation():
+    controller = _controller()
+    controller.monitor.collect.side_effect = ConnectionError("redis down")
+    assert (await controller.check()).state == NORMAL
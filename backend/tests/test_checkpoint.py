@@ -0,0 +1,91 @@
+import os
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+from scrai_core.core.checkpoint import Checkpoint, CheckpointManager, save_checkpoint, load_checkpoint
+from scrai_core.world.replay import ReplayEngine
+
+def test_checkpoint_round_trip(tmp_path):
+    """
+    Tests that a checkpoint written to disk is read back with the same rows,
+    embeddings and stream offset.
+    """
+    embeddings = np.random.default_rng(0).random((2, 384), dtype=np.float32)
+    checkpoint = Checkpoint(
+        agents=[{"id": "a1", "name": "Alice", "latitude": 1.0, "longitude": 2.0}],
+        world_objects=[{"id": "o1", "object_type": "resource", "position": "1,1", "properties": {"resource_level": 3}}],
+        memories=[
+            {"id": "m1", "agent_id": "a1", "timestamp": "2025-10-25T12:00:00", "content": "first", "event_type": "move", "salience_score": None},
+            {"id": "m2", "agent_id": "a1", "timestamp": "2025-10-25T12:00:01", "content": "second", "event_type": "move", "salience_score": 0.5},
+        ],
+        embeddings=embeddings,
+        stream_offset="1700000000000-0",
+    )
+    path = str(tmp_path / "checkpoint-test.npz")
+
+    save_checkpoint(checkpoint, path)
+    loaded = load_checkpoint(path)
+
+    assert loaded.agents == checkpoint.agents
+    assert loaded.world_objects == checkpoint.world_objects
+    assert loaded.memories == checkpoint.memories
+    assert loaded.stream_offset == "1700000000000-0"
+    assert loaded.embeddings.dtype == np.float32
+    np.testing.assert_array_equal(loaded.embeddings, embeddings)
+    assert not os.path.exists(f"{path}.tmp")
+
+def test_latest_checkpoint_ordering(tmp_path):
+    manager = CheckpointManager(directory=str(tmp_path))
+    assert manager.latest_checkpoint() is None
+
+    empty = Checkpoint(agents=[], world_objects=[], memories=[], embeddings=np.zeros((0, 384), dtype=np.float32))
+    save_checkpoint(empty, str(tmp_path / "checkpoint-20251025T120000000000Z.npz"))
+    save_checkpoint(empty, str(tmp_path / "checkpoint-20251026T120000000000Z.npz"))
+
+    assert manager.latest_checkpoint().endswith("checkpoint-20251026T120000000000Z.npz")
+
+def test_old_checkpoints_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setenv("CHECKPOINT_KEEP", "0")
+    with pytest.raises(ValueError):
+        CheckpointManager(directory=str(tmp_path))
+    with pytest.raises(ValueError):
+        CheckpointManager(directory=str(tmp_path), keep=0)
+
+    db = MagicMock()
+    db.query.return_value.all.return_value = []
+    db.query.return_value.order_by.return_value.yield_per.return_value = []
+    manager = CheckpointManager(directory=str(tmp_path), keep=1, session_factory=lambda: iter([db]))
+    first = manager.write_checkpoint(None)
+    second = manager.write_checkpoint(None)
+    assert first != second and manager.list_checkpoints() == [second]
+
+@pytest.mark.asyncio
+async def test_restore_leaves_existing_world_state_alone(tmp_path):
+    empty = Checkpoint(agents=[], world_objects=[], memories=[], embeddings=np.zeros((0, 384), dtype=np.float32))
+    save_checkpoint(empty, str(tmp_path / "checkpoint-20251025T120000000000Z.npz"))
+    db = MagicMock()
+    db.query.return_value.first.return_value = ("agent-1",)
+    manager = CheckpointManager(directory=str(tmp_path), session_factory=lambda: iter([db]))
+
+    assert await manager.restore_latest() is False
+    db.execute.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_archive_only_tail_is_written(tmp_path, monkeypatch):
+    checkpoint = Checkpoint(
+        agents=[{"id": "a1", "name": "Alice", "latitude": 0.0, "longitude": 0.0}],
+        world_objects=[], memories=[], embeddings=np.zeros((0, 384), dtype=np.float32), stream_offset="1-0",
+    )
+    save_checkpoint(checkpoint, str(tmp_path / "checkpoint-20251025T120000000000Z.npz"))
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    monkeypatch.setattr("scrai_core.events.archive.iter_archive", lambda *args, **kwargs: iter([
+        ("2-0", {"entity_id": "a1", "new_state": {"latitude": 5.0, "longitude": 6.0}}),
+    ]))
+    written = []
+    monkeypatch.setattr(ReplayEngine, "write", lambda engine, db: written.append(dict(engine.agents)))
+    manager = CheckpointManager(directory=str(tmp_path), session_factory=lambda: iter([MagicMock()]), archive_directory=str(archive))
+    monkeypatch.setattr(manager, "restore", lambda db, checkpoint: None)
+
+    assert await manager.restore_latest(force=True) is True
+    assert written == [{"a1": {"id": "a1", "name": "Alice", "latitude": 5.0, "longitude": 6.0}}]
@@ -2,6 +2,7 @@ import pytest
 import json
 from unittest.mock import MagicMock, patch, AsyncMock
 from scrai_core.agents.cognition import CognitiveAgent
+from scrai_core.agents.memory import RecalledMemories
 from scrai_core.agents.models import Agent
 from scrai_core.events.bus import EventBus
 from scrai_core.events.schemas import ActionEvent
@@ -18,7 +19,7 @@ def mock_event_bus():
 
 @pytest.mark.asyncio
 @patch("scrai_core.agents.cognition.get_session")
-@patch("scrai_core.agents.cognition.get_relevant_memories")
+@patch("scrai_core.agents.cognition.retrieve_memories")
 @patch("scrai_core.agents.cognition.get_chat_model_from_env")
 async def test_cognitive_agent_tick(mock_get_chat_model, mock_get_relevant_memories, mock_get_session, test_agent_model, mock_event_bus, db_session):
     """
@@ -28,7 +29,7 @@ async def test_cognitive_agent_tick(mock_get_chat_model, mock_get_relevant_memor
     # Arrange
     # Mock database and memory retrieval
     mock_get_session.return_value.query.return_value.filter.return_value.one.return_value = test_agent_model
-    mock_get_relevant_memories.return_value = []
+    mock_get_relevant_memories.return_value = RecalledMemories()
 
     # Create LLM stub that returns a fixed response instead of making actual API calls
     mock_llm = MagicMock()
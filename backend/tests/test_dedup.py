@@ -0,0 +1,50 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from sqlalchemy.dialects import postgresql
+from scrai_core.agents.dedup import add_memories, dedup_history, near_duplicates
+
+def test_near_duplicates_prefers_the_most_similar_memory_of_the_same_type():
+    existing = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]
+    new = [[0.99, 0.05, 0.0], [0.0, 0.98, 0.1], [0.0, 0.0, 1.0], [0.0, 0.02, 2.0], [1.0, 0.0, 0.0]]
+    types = ["move", "reflection", "move", "move", "summary"]
+    # The second matches an existing memory of another type; the fourth duplicates the third
+    assert near_duplicates(new, types, existing, ["move", "move"], 0.95) == [0, None, None, 2 + 2, None]
+
+def test_near_duplicates_never_merges_into_a_merged_memory():
+    assert near_duplicates([[1.0, 0.0], [1.0, 0.0], [1.0, 0.0]], ["move"] * 3, [], [], 0.95) == [None, 0, 0]
+
+def test_add_memories_merges_into_recent_memories():
+    db = MagicMock()
+    db.execute.return_value = [("old", "a", "move", [1.0, 0.0])]
+    inserted = add_memories(db, [
+        ("a", "move", "Agent moved.", [1.0, 0.01]),
+        ("a", "summary", "I rested.", [0.0, 1.0]),
+        ("a", "summary", "I rested again.", [0.0, 1.0]),
+    ], threshold=0.95, window=10)
+
+    assert inserted == 1
+    (summary,) = db.add_all.call_args.args[0]
+    assert summary.content == "I rested." and summary.occurrence_count == 2
+    # One query for the recent memories, one executemany for the merges
+    assert db.execute.call_count == 2
+    query = str(db.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+    assert "JOIN LATERAL" in query and "LIMIT" in query
+    assert [row["memory_id"] for row in db.execute.call_args.args[1]] == ["old"]
+
+def test_add_memories_without_window_inserts_everything():
+    db = MagicMock()
+    assert add_memories(db, [("a", "move", "Agent moved.", [1.0])] * 2, window=0) == 2
+    db.execute.assert_not_called()
+
+def test_dedup_history_folds_duplicates_into_the_oldest():
+    rows = [
+        SimpleNamespace(id="m1", event_type="move", embedding=[1.0, 0.0], occurrence_count=1, timestamp=datetime(2024, 1, 1)),
+        SimpleNamespace(id="m2", event_type="move", embedding=[0.0, 1.0], occurrence_count=1, timestamp=datetime(2024, 1, 2)),
+        SimpleNamespace(id="m3", event_type="move", embedding=[1.0, 0.02], occurrence_count=2, timestamp=datetime(2024, 1, 3)),
+    ]
+    db = MagicMock()
+    db.execute.return_value.all.return_value = rows
+    assert dedup_history(db, "a", threshold=0.95) == 1
+    updates = db.execute.call_args_list[1].args[1]
+    assert updates == [{"memory_id": "m1", "occurrences": 3, "seen_at": datetime(2024, 1, 3)}]
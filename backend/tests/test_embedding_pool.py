@@ -0,0 +1,55 @@
+import os
+import asyncio
+import pytest
+import numpy as np
+from scrai_core.agents.embedding_pool import EmbeddingWorkerPool
+
+class FakeEmbeddingModel:
+    """A deterministic stand-in for SentenceTransformer that runs in the worker processes."""
+    def encode(self, texts):
+        if any(text == "crash" for text in texts):
+            os._exit(1)
+        return np.array([[float(len(text)), float(os.getpid())] + [0.0] * 382 for text in texts], dtype=np.float32)
+
+def fake_model_factory():
+    return FakeEmbeddingModel()
+
+@pytest.mark.asyncio
+async def test_embedding_pool_batches_requests():
+    """
+    Tests that concurrent encode calls are served by worker processes and
+    each caller receives its own rows in order.
+    """
+    pool = EmbeddingWorkerPool(num_workers=2, model_factory=fake_model_factory, max_batch_size=8, batch_wait_ms=20)
+    await pool.start()
+    try:
+        results = await asyncio.gather(*[pool.encode(["a" * i, "b" * (i + 1)]) for i in range(1, 6)])
+
+        for i, vectors in enumerate(results, start=1):
+            assert vectors.shape == (2, 384)
+            assert vectors.dtype == np.float32
+            assert vectors[0, 0] == i
+            assert vectors[1, 0] == i + 1
+            # Encoding happened in a worker process, not in the test process
+            assert int(vectors[0, 1]) != os.getpid()
+
+        # Concurrent callers were coalesced into fewer batches than requests
+        assert pool.stats.batches < 5
+        assert pool.stats.texts == 10
+    finally:
+        await pool.close()
+
+@pytest.mark.asyncio
+async def test_embedding_pool_restarts_dead_worker():
+    pool = EmbeddingWorkerPool(num_workers=1, model_factory=fake_model_factory, health_check_interval=0.1, batch_wait_ms=1)
+    await pool.start()
+    try:
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(pool.encode(["crash"]), timeout=60)
+        assert pool.stats.restarts >= 1
+
+        # The restarted worker serves new requests
+        vectors = await asyncio.wait_for(pool.encode(["hello"]), timeout=60)
+        assert vectors[0, 0] == 5
+    finally:
+        await pool.close()
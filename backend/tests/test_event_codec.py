@@ -0,0 +1,61 @@
+import json
+import pytest
+from scrai_core.events.bus import decode_entry
+from scrai_core.events.codec import MSGPACK_CONTENT_TYPE, get_codec
+from scrai_core.events.schemas import ActionEvent, WorldStateCommittedEvent, parse_event
+
+def _committed() -> dict:
+    action = ActionEvent(entity_id="agent_1", sequence=3, action_type="move", payload={"new_latitude": 1.0})
+    action.mark("published")
+    event = WorldStateCommittedEvent.from_action(action, {"latitude": 0.0}, {"latitude": 1.0})
+    event.mark("published")
+    return event.model_dump(mode='json')
+
+@pytest.mark.parametrize("name", ["json", "orjson", "msgpack"])
+def test_codecs_round_trip_through_stream_entries(name):
+    codec = get_codec(name)
+    data = _committed()
+    entry = {b"data": codec.encode(data), b"content_type": codec.content_type.encode()}
+    assert decode_entry(entry) == data
+
+def test_entries_without_content_type_are_json():
+    assert decode_entry({b"data": json.dumps({"a": 1}).encode()}) == {"a": 1}
+
+def test_msgpack_is_smaller_than_json():
+    data = _committed()
+    assert get_codec("msgpack").content_type == MSGPACK_CONTENT_TYPE
+    assert len(get_codec("msgpack").encode(data)) < len(get_codec("json").encode(data))
+
+def test_committed_event_references_action_by_id():
+    data = _committed()
+    assert "action_event" not in data
+    assert data["action_id"] == data["event_id"]
+    assert data["timings"]["action_published"] <= data["timings"]["published"]
+
+def test_schema_1_0_committed_events_are_upgraded():
+    action = ActionEvent(entity_id="agent_1", sequence=1, action_type="interact_with_object", payload={})
+    action.mark("published")
+    legacy = {
+        "event_id": str(action.event_id), "sequence": 1, "entity_id": "agent_1", "schema_version": "1.0",
+        "action_event": action.model_dump(mode='json'), "previous_state": {}, "new_state": {},
+    }
+    event = parse_event(WorldStateCommittedEvent, legacy)
+    assert event.schema_version == "2.0"
+    assert event.action_type == "interact_with_object"
+    assert event.action_id == action.event_id
+    assert event.timings["action_published"] == action.timings["published"]
+
+@pytest.mark.asyncio
+async def test_batches_skip_undecodable_entries_and_ack_after_decoding():
+    from unittest.mock import AsyncMock
+    from scrai_core.events.bus import EventBus
+    bus = EventBus()
+    bus._redis = AsyncMock()
+    good = {b"data": json.dumps({"entity_id": "a"}).encode()}
+    bad = {b"data": b"\x00", b"content_type": b"application/x-unknown"}
+    bus._redis.xreadgroup.return_value = [(b"action_events", [(b"1-0", good), (b"2-0", bad), (b"3-0", good)])]
+
+    batches = bus.subscribe_batches("action_events", "group", "consumer")
+    assert await batches.__anext__() == [("1-0", {"entity_id": "a"}), ("3-0", {"entity_id": "a"})]
+    bus._redis.xack.assert_awaited_once_with("action_events", "group", b"1-0", b"2-0", b"3-0")
+    await batches.aclose()
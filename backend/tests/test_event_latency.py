@@ -0,0 +1,47 @@
+import time
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+from prometheus_client import REGISTRY
+from scrai_core.events.bus import EventBus
+from scrai_core.events.monitor import StreamLagMonitor
+from scrai_core.events.schemas import ActionEvent, WorldStateCommittedEvent
+
+def test_timings_survive_serialization():
+    action = ActionEvent(entity_id="agent_1", sequence=1, action_type="move", payload={})
+    action.mark("published")
+    committed = WorldStateCommittedEvent.from_action(action, previous_state={}, new_state={})
+    committed.mark("published")
+
+    restored = WorldStateCommittedEvent.model_validate(committed.model_dump(mode='json'))
+
+    assert restored.timings["published"] == committed.timings["published"]
+    assert restored.timings["action_published"] == action.timings["published"]
+
+def test_events_without_timings_still_parse():
+    action = ActionEvent.model_validate(
+        {"entity_id": "agent_1", "sequence": 1, "action_type": "move", "payload": {}}
+    )
+    assert action.timings == {}
+
+@pytest.mark.asyncio
+async def test_stream_lag_monitor_exports_gauges():
+    now_ms = int(time.time() * 1000)
+    event_bus = MagicMock(spec=EventBus)
+    event_bus.stream_length = AsyncMock(return_value=10)
+    event_bus.group_info = AsyncMock(return_value=[
+        {"name": "world_state_group", "consumers": 1, "pending": 2, "last-delivered-id": f"{now_ms - 9000}-0", "lag": 4},
+    ])
+    # The oldest undelivered entry was added 5 seconds ago
+    event_bus.read_range = AsyncMock(return_value=[(f"{now_ms - 5000}-0", {})])
+
+    monitor = StreamLagMonitor(event_bus, streams=["action_events"])
+    snapshot = await monitor.collect()
+
+    group = snapshot["action_events"][0]
+    assert group.lag == 4
+    assert group.pending == 2
+    assert 4.5 < group.lag_seconds < 10
+    labels = {"stream": "action_events", "group": "world_state_group"}
+    assert REGISTRY.get_sample_value("event_stream_consumer_lag", labels) == 4
+    assert REGISTRY.get_sample_value("event_stream_pending", labels) == 2
+    event_bus.read_range.assert_called_once_with("action_events", start=f"({now_ms - 9000}-0", count=1)
@@ -1,7 +1,6 @@
 import pytest
 import pytest_asyncio
 import asyncio
-import json
 from unittest.mock import patch, MagicMock, AsyncMock
 from scrai_core.agents.models import Agent
 from scrai_core.core.persistence import Base
@@ -91,9 +90,9 @@ async def test_heartbeat_pipeline(mock_get_chat_model, db_session, event_bus: Ev
     # Assert WorldStateCommittedEvent was received by MemorySystem
     # (In a real test, we'd check logs or a mock. For now, we'll check the stream)
     committed_stream = "world_state_committed_events"
-    messages = await event_bus._redis.xrange(committed_stream)
+    messages = await event_bus.read_range(committed_stream)
     assert len(messages) == 1
-    committed_event_data = json.loads(messages[0][1]['data'])
+    committed_event_data = messages[0][1]
     assert committed_event_data['entity_id'] == agent_id
     assert committed_event_data['new_state']['latitude'] == 10.0
     assert committed_event_data['new_state']['longitude'] == 10.0
@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from scrai_core.agents.cognition import is_valid_action
+from scrai_core.agents.models import Agent
+from scrai_core.core.simulation import Simulation
+from scrai_core.core.hedged_llm import HedgedChatModel, LatencyTracker, parse_providers
+from scrai_core.core.llm_provider_factory import get_chat_model_from_env
+from scrai_core.core.warmup import WarmupState, _load_llm_clients
+
+class FakeModel:
+    def __init__(self, delay, content="ok", error=None):
+        self.delay, self.content, self.error = delay, content, error
+        self.calls = self.cancelled = 0
+
+    async def ainvoke(self, prompt, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return SimpleNamespace(content=self.content)
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    primary, secondary = FakeModel(0.0, "primary"), FakeModel(0.0, "secondary")
+    llm = HedgedChatModel([("a", primary), ("b", secondary)], default_delay=0.5)
+    assert (await llm.ainvoke("hi")).content == "primary"
+    assert secondary.calls == 0
+    assert len(llm.latency["a"].samples) == 1
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled():
+    primary, secondary = FakeModel(5.0, "primary"), FakeModel(0.0, "secondary")
+    llm = HedgedChatModel([("a", primary), ("b", secondary)], default_delay=0.05)
+    assert (await llm.ainvoke("hi")).content == "secondary"
+    # The losing request has finished cancelling by the time ainvoke returns
+    assert primary.cancelled == 1
+
+@pytest.mark.asyncio
+async def test_errors_and_invalid_responses_fail_over():
+    broken, empty, working = FakeModel(0.0, error=RuntimeError("down")), FakeModel(0.0, "  "), FakeModel(0.0, "fine")
+    llm = HedgedChatModel([("a", broken), ("b", empty), ("c", working)], default_delay=5.0)
+    assert (await llm.ainvoke("hi")).content == "fine"
+
+    with pytest.raises(RuntimeError, match="down"):
+        await HedgedChatModel([("a", broken)]).ainvoke("hi")
+
+def test_hedge_delay_follows_the_tracked_percentile():
+    llm = HedgedChatModel([("a", FakeModel(0.0))], percentile=0.9, min_samples=10, default_delay=3.0)
+    assert llm.hedge_delay("a") == 3.0
+    for sample in range(1, 11):
+        llm.latency["a"].observe(sample / 10)
+    assert llm.hedge_delay("a") == 1.0
+    assert LatencyTracker().percentile(0.5) is None
+
+def test_providers_from_env(monkeypatch):
+    assert parse_providers("lm_proxy, stub:fast ,") == [("lm_proxy", None), ("stub", "fast")]
+    monkeypatch.setenv("LLM_PROVIDERS", "stub,stub:backup")
+    llm = get_chat_model_from_env()
+    assert [name for name, _ in llm.models] == ["stub", "stub:backup"]
+
+@pytest.mark.asyncio
+async def test_agents_fail_over_from_responses_that_are_not_actions():
+    action = '{"action_type": "move", "payload": {"new_latitude": 1.0, "new_longitude": 2.0}}'
+    assert is_valid_action(SimpleNamespace(content=action))
+    assert not any(is_valid_action(SimpleNamespace(content=content)) for content in ["{", '{"payload": {}}', "[]", ""])
+
+    llm = HedgedChatModel([("a", FakeModel(0.0, '{"action_type": "move"')), ("b", FakeModel(0.0, action))], validator=is_valid_action)
+    assert (await llm.ainvoke("hi")).content == action
+
+def test_simulation_agents_share_one_chat_model(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDERS", "stub,stub:backup")
+    db = MagicMock()
+    db.query.return_value.all.return_value = [Agent(id=agent_id, name=agent_id, latitude=0.0, longitude=0.0) for agent_id in "ab"]
+    simulation = Simulation(MagicMock(), db)
+    simulation.load_agents()
+    llm = simulation.llm
+    simulation.load_agents()
+    assert isinstance(llm, HedgedChatModel) and llm.validator is is_valid_action
+    assert all(agent.llm is llm for agent in simulation.agents)
+
+def test_warm_up_builds_the_model_the_simulation_uses(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDERS", "stub,stub:backup")
+    state = WarmupState()
+    _load_llm_clients(state)
+    assert isinstance(state.agent_llm, HedgedChatModel) and state.agent_llm.validator is is_valid_action
+    db = MagicMock()
+    db.query.return_value.all.return_value = [Agent(id="a", name="a", latitude=0.0, longitude=0.0)]
+    simulation = Simulation(MagicMock(), db, llm=state.agent_llm)
+    simulation.load_agents()
+    assert simulation.agents[0].llm is state.agent_llm
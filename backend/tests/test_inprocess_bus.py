@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from scrai_core.events.bus import EventBus, get_event_bus
+from scrai_core.events.inprocess import InProcessBroker, InProcessEventBus
+
+async def _take(bus, stream, group, consumer, count):
+    received = []
+    async for message_id, event in bus.subscribe_with_ids(stream, group, consumer):
+        received.append((message_id, event))
+        if len(received) == count:
+            return received
+
+@pytest.mark.asyncio
+async def test_every_group_receives_every_event_without_copies():
+    bus = InProcessEventBus(InProcessBroker())
+    await bus.connect()
+    events = [{"n": i} for i in range(5)]
+    for event in events:
+        await bus.publish("action_events", event)
+
+    first, second = await asyncio.gather(
+        _take(bus, "action_events", "world", "c1", 5),
+        _take(bus, "action_events", "archive", "c1", 5),
+    )
+    assert [event for _, event in first] == events
+    assert all(event is original for (_, event), original in zip(second, events))
+    assert [message_id for message_id, _ in first] == [message_id for message_id, _ in await bus.read_range("action_events")]
+    groups = {info["name"]: info for info in await bus.group_info("action_events")}
+    assert groups["world"]["last-delivered-id"] == await bus.last_id("action_events")
+    assert groups["world"]["lag"] == 0
+
+@pytest.mark.asyncio
+async def test_consumers_in_one_group_share_the_entries():
+    bus = InProcessEventBus(InProcessBroker())
+    await bus.connect()
+    consumers = [asyncio.create_task(_take(bus, "s", "group", f"c{i}", 10)) for i in range(2)]
+    for i in range(6):
+        await bus.publish("s", {"n": i})
+    await asyncio.sleep(0.01)
+    for task in consumers:
+        task.cancel()
+    await asyncio.gather(*consumers, return_exceptions=True)
+    groups = await bus.group_info("s")
+    assert groups[0]["consumers"] == 2
+    assert groups[0]["last-delivered-id"] == await bus.last_id("s")
+
+@pytest.mark.asyncio
+async def test_publish_waits_for_slow_groups():
+    bus = InProcessEventBus(InProcessBroker(max_pending=2, groups=["group"]))
+    await bus.connect()
+    consumer = asyncio.create_task(_take(bus, "s", "group", "c1", 1))
+    await asyncio.sleep(0)
+    # The consumer takes one entry and stops, leaving the group behind
+    for i in range(3):
+        await bus.publish("s", {"n": i})
+    await consumer
+    blocked = asyncio.create_task(bus.publish("s", {"n": 3}))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    trimmed = await bus.trim("s", await bus.last_id("s"))
+    await asyncio.wait_for(blocked, 1)
+    assert trimmed == 2
+    assert await bus.stream_length("s") == 2
+
+@pytest.mark.asyncio
+async def test_unwatched_groups_do_not_hold_publishers_back():
+    bus = InProcessEventBus(InProcessBroker(max_pending=2, groups=["watched"]))
+    await bus.connect()
+    assert bus.codec is not None and bus.redis_url
+    # A follower group whose consumer took one entry and went away
+    await bus.publish("s", {"n": 0})
+    await _take(bus, "s", "follower", "c1", 1)
+    for i in range(1, 5):
+        await asyncio.wait_for(bus.publish("s", {"n": i}), 1)
+    assert await bus.stream_length("s") == 5
+
+@pytest.mark.asyncio
+async def test_backend_is_selected_by_configuration(monkeypatch):
+    monkeypatch.setenv("EVENT_BUS_BACKEND", "memory")
+    first, second = get_event_bus(), get_event_bus()
+    assert isinstance(first, InProcessEventBus)
+    await first.connect()
+    await second.connect()
+    await first.publish("s", {"shared": True})
+    assert await second.stream_length("s") == 1
+
+    monkeypatch.setenv("EVENT_BUS_BACKEND", "redis")
+    assert type(get_event_bus()) is EventBus
+
+@pytest.mark.asyncio
+async def test_subscribe_batches_yields_the_backlog_in_chunks():
+    bus = InProcessEventBus(InProcessBroker())
+    await bus.connect()
+    for i in range(5):
+        await bus.publish("s", {"n": i})
+    batches = bus.subscribe_batches("s", "group", "c1", count=2)
+    assert [[event["n"] for _, event in await batches.__anext__()] for _ in range(3)] == [[0, 1], [2, 3], [4]]
+    await bus.publish("s", {"n": 5})
+    [(message_id, event)] = await batches.__anext__()
+    assert event == {"n": 5} and message_id == await bus.last_id("s")
+    await batches.aclose()
@@ -2,6 +2,7 @@ import pytest
 import json
 from unittest.mock import MagicMock, patch, AsyncMock
 from scrai_core.agents.cognition import CognitiveAgent
+from scrai_core.agents.memory import RecalledMemories
 from scrai_core.agents.models import Agent
 from scrai_core.world.models import WorldObject
 from scrai_core.events.bus import EventBus
@@ -23,13 +24,13 @@ def mock_event_bus():
 
 @pytest.mark.asyncio
 @patch("scrai_core.agents.cognition.get_session")
-@patch("scrai_core.agents.cognition.get_memories_for_agent")
+@patch("scrai_core.agents.cognition.retrieve_memories")
 @patch("scrai_core.agents.cognition.get_chat_model_from_env")
 async def test_agent_interacts_with_object(mock_get_chat_model, mock_get_memories, mock_get_session, test_agent_model, test_world_object, mock_event_bus):
     # Arrange
     mock_get_session.return_value.query.return_value.filter.return_value.one.return_value = test_agent_model
     mock_get_session.return_value.query.return_value.all.return_value = [test_world_object]
-    mock_get_memories.return_value = []
+    mock_get_memories.return_value = RecalledMemories()
 
     # Create LLM stub that returns a fixed response instead of making actual API calls
     class LLMStub:
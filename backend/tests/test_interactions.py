@@ -0,0 +1,73 @@
+import pytest
+from decimal import Decimal
+from unittest.mock import MagicMock
+from scrai_core.agents.models import Agent
+from scrai_core.events.inprocess import InProcessBroker, InProcessEventBus
+from scrai_core.events.schemas import ActionEvent
+from scrai_core.world.interactions import apply_interactions, resolve_levels
+from scrai_core.world.systems import WorldStateSystem
+
+def test_resolve_levels_replays_interactions_in_order():
+    levels = resolve_levels(["well", "tree", "well", "ghost", "well", "empty"], [1, 1, 1, 1, 1, 1], {"well": 2, "tree": 5, "empty": 0})
+    assert levels == [(2, 1), (5, 4), (1, 0), None, (0, 0), (0, 0)]
+
+def test_apply_interactions_is_one_statement():
+    db = MagicMock()
+    db.execute.return_value.all.return_value = [("well", Decimal("3")), ("tree", Decimal("2.5"))]
+    assert apply_interactions(db, ["well", "tree", "well"]) == [(3, 2), (2.5, 1.5), (2, 1)]
+    db.execute.assert_called_once()
+    assert db.execute.call_args.args[1] == {"object_ids": ["well", "tree", "well"], "amounts": [1, 1, 1]}
+    assert apply_interactions(db, []) == []
+    assert db.execute.call_count == 1
+
+def _action(agent_id, action_type, **payload):
+    action = ActionEvent(entity_id=agent_id, sequence=0, action_type=action_type, payload=payload)
+    action.mark("published")
+    return action.model_dump(mode='json')
+
+@pytest.mark.asyncio
+async def test_batch_commits_once_and_publishes_each_state():
+    agents = [Agent(id="a", name="A", latitude=0.0, longitude=0.0), Agent(id="b", name="B", latitude=1.0, longitude=1.0)]
+    db = MagicMock()
+    db.query.return_value.filter.return_value = agents
+    db.execute.return_value.all.return_value = [("well", Decimal("1"))]
+
+    bus = InProcessEventBus(InProcessBroker())
+    await bus.connect()
+    system = WorldStateSystem(bus, session_factory=lambda: iter([db]))
+    await system.process_action_batch([
+        _action("a", "interact_with_object", object_id="well"),
+        _action("a", "move", new_latitude=0.5, new_longitude=0.25),
+        _action("b", "interact_with_object", object_id="well"),
+        _action("ghost", "move", new_latitude=9.0, new_longitude=9.0),
+    ])
+
+    db.execute.assert_called_once()
+    db.commit.assert_called_once()
+    committed = [event for _, event in await bus.read_range(system.committed_event_stream)]
+    assert [(event["entity_id"], event["action_type"]) for event in committed] == [
+        ("a", "interact_with_object"), ("a", "move"), ("b", "interact_with_object"),
+    ]
+    assert committed[0]["previous_state"]["resource_level"] == 1 and committed[0]["new_state"]["resource_level"] == 0
+    assert committed[1]["previous_state"] == {"latitude": 0.0, "longitude": 0.0}
+    assert committed[1]["new_state"] == {"latitude": 0.5, "longitude": 0.25}
+    assert committed[2]["previous_state"]["resource_level"] == 0 and committed[2]["new_state"]["resource_level"] == 0
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried_one_action_at_a_time():
+    agents = [Agent(id="a", name="A", latitude=0.0, longitude=0.0), Agent(id="b", name="B", latitude=1.0, longitude=1.0)]
+    db = MagicMock()
+    db.query.return_value.filter.return_value = agents
+    bus = InProcessEventBus(InProcessBroker())
+    await bus.connect()
+    system = WorldStateSystem(bus, session_factory=lambda: iter([db]))
+    # A bad payload fails outside the database
+    system.router.recipients = MagicMock(side_effect=TypeError("radius_km must be a number"))
+    await system.process_action_batch([
+        _action("b", "communicate", radius_km="far", message="hi"),
+        _action("a", "move", new_latitude=0.5, new_longitude=0.25),
+    ])
+
+    committed = [event for _, event in await bus.read_range(system.committed_event_stream)]
+    assert [(event["entity_id"], event["action_type"]) for event in committed] == [("a", "move")]
+    assert db.commit.call_count == 1 and db.rollback.call_count == 2
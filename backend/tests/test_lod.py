@@ -0,0 +1,129 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, AsyncMock
+from scrai_core.agents.cognition import CognitiveAgent
+from scrai_core.agents.models import Agent
+from scrai_core.core.lod import CONTINUE, FULL, IDLE, REDUCED, SKIP, THINK, LodScheduler
+from scrai_core.core.simulation import Simulation
+from scrai_core.events.bus import EventBus
+from scrai_core.world.geo import haversine_km
+
+def _agent(agent_id, latitude, longitude):
+    agent = MagicMock()
+    agent.agent_model = SimpleNamespace(id=agent_id, name=agent_id, latitude=latitude, longitude=longitude)
+    agent.tick = AsyncMock()
+    agent.continue_behavior = AsyncMock(return_value=True)
+    return agent
+
+def _scheduler():
+    return LodScheduler(radius_km=1.0, reduced_interval=4, idle_interval=16, idle_after_ticks=8)
+
+def test_haversine_km():
+    assert haversine_km(0.0, 0.0, 0.0, 1.0) == pytest.approx(111.19, abs=0.01)
+    assert haversine_km(51.5, -0.1, 51.5, -0.1) == 0.0
+
+def test_tiers_follow_proximity_activity_and_messages():
+    scheduler = _scheduler()
+    # Two agents about 500 m apart, two far from everything
+    agents = [_agent("a", 10.0, 10.0), _agent("b", 10.0045, 10.0), _agent("c", 40.0, 40.0), _agent("d", -30.0, 100.0)]
+    scheduler.apply({"entity_id": "c", "action_type": "move", "new_state": {"latitude": 40.0, "longitude": 40.0}})
+
+    tiers = {agent.agent_model.id: tier for agent, tier, _ in scheduler.plan(agents)}
+    assert tiers == {"a": FULL, "b": FULL, "c": REDUCED, "d": REDUCED}
+
+    # No activity for longer than idle_after_ticks
+    for _ in range(9):
+        plan = scheduler.plan(agents)
+    tiers = {agent.agent_model.id: tier for agent, tier, _ in plan}
+    assert tiers == {"a": FULL, "b": FULL, "c": IDLE, "d": IDLE}
+
+    # A message waiting promotes the recipient for the one tick that perceives it
+    scheduler.apply({"entity_id": "a", "action_type": "communicate", "new_state": {"latitude": 10.0, "longitude": 10.0, "recipient_ids": ["d"]}})
+    plan = {agent.agent_model.id: (tier, mode) for agent, tier, mode in scheduler.plan(agents)}
+    assert plan["d"] == (FULL, THINK)
+    assert "d" not in scheduler.pending_messages
+
+def test_committed_moves_update_positions():
+    scheduler = _scheduler()
+    agents = [_agent("a", 10.0, 10.0), _agent("b", 20.0, 20.0)]
+    scheduler.apply({"entity_id": "b", "action_type": "move", "new_state": {"latitude": 10.001, "longitude": 10.001}})
+    assert {tier for _, tier, _ in scheduler.plan(agents)} == {FULL}
+
+def test_objects_count_as_nearby():
+    scheduler = _scheduler()
+    scheduler.load([], [SimpleNamespace(id="well", latitude=60.0, longitude=5.005), SimpleNamespace(id="broken", latitude=None, longitude=None)])
+    [(_, tier, _)] = scheduler.plan([_agent("a", 60.0, 5.0)])
+    assert tier == FULL
+
+def test_reduced_agents_think_once_per_interval():
+    scheduler = _scheduler()
+    agents = [_agent(f"agent-{i}", i * 10.0, 0.0) for i in range(8)]
+    modes = {agent.agent_model.id: [] for agent in agents}
+    for _ in range(4):
+        for agent_id in modes:
+            scheduler.last_active[agent_id] = scheduler.tick_number
+        for agent, tier, mode in scheduler.plan(agents):
+            assert tier == REDUCED
+            modes[agent.agent_model.id].append(mode)
+    assert all(sorted(agent_modes) == [CONTINUE, CONTINUE, CONTINUE, THINK] for agent_modes in modes.values())
+
+@pytest.mark.asyncio
+async def test_simulation_tick_runs_agents_by_mode():
+    scheduler = _scheduler()
+    thinking, continuing, skipped = _agent("a", 0.0, 0.0), _agent("b", 30.0, 30.0), _agent("c", 60.0, 60.0)
+    scheduler.plan = MagicMock(return_value=[(thinking, FULL, THINK), (continuing, REDUCED, CONTINUE), (skipped, IDLE, SKIP)])
+    scheduler.store.agents.set("b", 30.5, 30.5)
+    thinking.tick.side_effect = RuntimeError("LLM down")
+
+    simulation = Simulation(MagicMock(spec=EventBus), MagicMock(), scheduler=scheduler)
+    simulation.agents = [thinking, continuing, skipped]
+    assert await simulation.tick() == 1
+
+    thinking.tick.assert_awaited_once()
+    continuing.continue_behavior.assert_awaited_once()
+    assert continuing.continue_behavior.await_args.args == (30.5, 30.5)
+    assert continuing.continue_behavior.await_args.kwargs["event_id"] in scheduler.autopilot_actions
+    skipped.tick.assert_not_called()
+    skipped.continue_behavior.assert_not_called()
+    assert (thinking.cohort, continuing.cohort, skipped.cohort) == (FULL, REDUCED, IDLE)
+
+@pytest.mark.asyncio
+async def test_autopilot_moves_do_not_keep_an_agent_reduced():
+    scheduler = _scheduler()
+    agent = _agent("a", 10.0, 10.0)
+
+    async def continue_behavior(latitude, longitude, event_id):
+        # The committed move comes back on the stream
+        scheduler.apply({"entity_id": "a", "action_id": event_id, "action_type": "move", "new_state": {"latitude": latitude + 0.1, "longitude": longitude}})
+        return True
+
+    agent.continue_behavior = AsyncMock(side_effect=continue_behavior)
+    simulation = Simulation(MagicMock(spec=EventBus), MagicMock(), scheduler=scheduler)
+    simulation.agents = [agent]
+    # A new agent thinks first, then runs on autopilot between its reduced full ticks
+    await simulation.tick()
+    assert agent.tick.await_count == 1 and scheduler.tiers["a"] == REDUCED
+    for _ in range(scheduler.idle_after_ticks + 1):
+        await simulation.tick()
+    assert agent.continue_behavior.await_count > 0
+    assert scheduler.tiers["a"] == IDLE and not scheduler.autopilot_actions
+
+    # A message makes it active again
+    scheduler.apply({"entity_id": "b", "action_type": "communicate", "new_state": {"recipient_ids": ["a"]}})
+    [(_, tier, mode)] = scheduler.plan([agent])
+    assert (tier, mode) == (FULL, THINK)
+    assert scheduler.tier_for("a", {}) == REDUCED
+
+@pytest.mark.asyncio
+async def test_continue_behavior_repeats_the_last_move():
+    event_bus = MagicMock(spec=EventBus)
+    event_bus.publish = AsyncMock()
+    agent = CognitiveAgent(Agent(id="a", name="A", latitude=10.0, longitude=10.0), event_bus, llm=MagicMock())
+    assert await agent.continue_behavior(10.0, 10.0) is False
+
+    agent.last_move = (0.5, -0.25)
+    assert await agent.continue_behavior(10.5, 9.75) is True
+    stream, action = event_bus.publish.await_args.args
+    assert stream == "action_events"
+    assert action["action_type"] == "move"
+    assert action["payload"] == {"new_latitude": 11.0, "new_longitude": 9.5}
@@ -1,11 +1,13 @@
+import asyncio
 import pytest
-from uuid import uuid4
 from unittest.mock import patch, MagicMock, AsyncMock
 from scrai_core.agents.models import Agent, EpisodicMemory
 from scrai_core.core.persistence import get_session
 from scrai_core.events.bus import EventBus
 from scrai_core.events.schemas import ActionEvent, WorldStateCommittedEvent
+from scrai_core.agents import memory_consolidator
 from scrai_core.agents.memory_consolidator import MemoryConsolidator
+from scrai_core.events.inprocess import InProcessBroker, InProcessEventBus
 
 @pytest.fixture(scope="function")
 def test_agent():
@@ -22,19 +24,18 @@ def test_agent():
         session.commit()
         session.close()
 
-@patch("scrai_core.agents.memory_consolidator.SentenceTransformer")
-def test_memory_consolidation(mock_sentence_transformer, test_agent):
+@pytest.mark.asyncio
+@patch("scrai_core.agents.memory_consolidator.embed_texts", new_callable=AsyncMock)
+async def test_memory_consolidation(mock_embed_texts, test_agent):
     """
     Tests that the MemoryConsolidator correctly processes events and
     creates memories in the database.
     """
-    # Mock the embedding model to avoid actual embedding computation
-    mock_model = MagicMock()
-    mock_model.encode.return_value = [0.1] * 384  # Mock embedding vector
-    mock_sentence_transformer.return_value = mock_model
+    # Mock the embedding call to avoid actual embedding computation
+    mock_embed_texts.side_effect = lambda texts: [[0.1] * 384 for _ in texts]  # Mock embedding vectors
 
     event_bus = EventBus()
-    consolidator = MemoryConsolidator(event_bus=event_bus, buffer_threshold=5)
+    consolidator = MemoryConsolidator(event_bus=event_bus, buffer_threshold=5, llm_summaries=False)
 
     # 1. Publish enough events to trigger consolidation
     for i in range(5):
@@ -42,23 +43,19 @@ def test_memory_consolidation(mock_sentence_transformer, test_agent):
             entity_id=test_agent.id,
             sequence=i,
             action_type="move",
-            payload={"new_position": f"1,{i}"}
+            payload={"new_latitude": float(i + 1), "new_longitude": 0.0}
         )
-        world_state_event = WorldStateCommittedEvent(
-            event_id=str(uuid4()),
-            sequence=i,
-            entity_id=test_agent.id,
-            schema_version="1.0",
-            action_event=action_event,
-            previous_state={"position": f"0,{i}"},
-            new_state={"position": f"1,{i}"}
+        world_state_event = WorldStateCommittedEvent.from_action(
+            action_event,
+            previous_state={"latitude": float(i), "longitude": 0.0},
+            new_state={"latitude": float(i + 1), "longitude": 0.0}
         )
         consolidator.event_buffer.append(world_state_event)
 
     # 2. Manually trigger the consolidator's processing logic for the test
 
     # Process the buffer directly
-    consolidator._process_buffer()
+    await consolidator._process_buffer()
 
     # 3. Verify that memories were created
     session = next(get_session())
@@ -66,6 +63,65 @@ def test_memory_consolidation(mock_sentence_transformer, test_agent):
         memories = session.query(EpisodicMemory).filter(EpisodicMemory.agent_id == test_agent.id).all()
     finally:
         session.close()
-        assert len(memories) == 5
-        for memory in memories:
-            assert "Agent moved from" in memory.content
+        # Consecutive moves are folded into one memory
+        assert len(memories) == 1
+        assert memories[0].content == "Agent moved from (0.0000, 0.0000) to (5.0000, 0.0000) in 5 steps."
+
+
+def _committed(agent_id, action_type, previous_state, new_state):
+    action_event = ActionEvent(entity_id=agent_id, sequence=0, action_type=action_type, payload={})
+    return WorldStateCommittedEvent.from_action(action_event, previous_state=previous_state, new_state=new_state)
+
+@pytest.mark.asyncio
+async def test_summarize_groups_events_per_agent():
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(return_value=MagicMock(content="I drew water and spoke to a friend."))
+    consolidator = MemoryConsolidator(event_bus=MagicMock(), llm=llm, llm_summaries=True)
+    events = [
+        _committed("a", "move", {"latitude": 0.0, "longitude": 0.0}, {"latitude": 0.1, "longitude": 0.0}),
+        _committed("a", "interact_with_object", {"object_id": "well", "resource_level": 3}, {"object_id": "well", "resource_level": 2}),
+        _committed("b", "move", {"latitude": 1.0, "longitude": 1.0}, {"latitude": 1.1, "longitude": 1.0}),
+        _committed("a", "move", {"latitude": 0.1, "longitude": 0.0}, {"latitude": 0.2, "longitude": 0.0}),
+        _committed("a", "communicate", {}, {"recipient_ids": ["b"]}),
+    ]
+    memories = await consolidator.summarize(events)
+
+    assert memories == [
+        ("a", "move", "Agent moved from (0.0000, 0.0000) to (0.2000, 0.0000) in 2 steps."),
+        ("b", "move", "Agent moved from (1.0000, 1.0000) to (1.1000, 1.0000)."),
+        ("a", "summary", "I drew water and spoke to a friend."),
+    ]
+    # One call for agent a's non-move events
+    llm.ainvoke.assert_awaited_once()
+    prompt = llm.ainvoke.call_args.args[0]
+    assert "object well (resource level 3 -> 2)" in prompt and "message to 1 agent(s)" in prompt
+
+@pytest.mark.asyncio
+async def test_summarize_falls_back_to_templates():
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(side_effect=RuntimeError("provider down"))
+    consolidator = MemoryConsolidator(event_bus=MagicMock(), llm=llm, llm_summaries=True)
+    memories = await consolidator.summarize([_committed("a", "eat", {}, {})])
+    assert memories == [("a", "eat", "Agent performed action: eat.")]
+
+@pytest.mark.asyncio
+async def test_run_survives_bad_events_and_failed_persists(monkeypatch):
+    monkeypatch.setattr(memory_consolidator, "RETRY_BACKOFF_SECONDS", 0.01)
+    bus = InProcessEventBus(InProcessBroker())
+    consolidator = MemoryConsolidator(event_bus=bus, buffer_threshold=1, llm_summaries=False)
+    consolidator._persist = AsyncMock(side_effect=[RuntimeError("database down"), None])
+    worker = asyncio.create_task(consolidator.run())
+    await asyncio.sleep(0.01)
+
+    await bus.publish("world_state_committed_events", {"entity_id": "a", "new_state": "not a committed event"})
+    for sequence in range(2):
+        event = _committed("a", "move", {}, {"latitude": float(sequence), "longitude": 0.0})
+        await bus.publish("world_state_committed_events", event.model_dump(mode="json"))
+        await asyncio.sleep(0.05)
+
+    # The failed buffer is kept and persisted with the next event
+    assert not worker.done()
+    assert [len(call.args[0]) for call in consolidator._persist.await_args_list] == [1, 2]
+    assert consolidator.event_buffer == []
+    worker.cancel()
+    await asyncio.gather(worker, return_exceptions=True)
@@ -0,0 +1,19 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from scrai_core.agents.memory import retrieve_memories
+
+@patch("scrai_core.agents.memory.get_session")
+def test_retrieve_memories_returns_both_sets_from_one_query(mock_get_session):
+    # Rows come back best score first, with their rank among the candidates by timestamp
+    old_but_relevant, newest, older = SimpleNamespace(content="well"), SimpleNamespace(content="new"), SimpleNamespace(content="older")
+    session = MagicMock()
+    session.query.return_value.filter.return_value.order_by.return_value.all.return_value = [
+        (old_but_relevant, 3), (newest, 1), (older, 2),
+    ]
+    mock_get_session.return_value = iter([session])
+
+    recalled = retrieve_memories("a", [0.1] * 384, k=2, recent=2)
+
+    session.query.assert_called_once()
+    assert recalled.relevant == [old_but_relevant, newest]
+    assert recalled.recent == [newest, older]
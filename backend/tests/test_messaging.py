@@ -0,0 +1,70 @@
+import time
+import pytest
+from unittest.mock import MagicMock
+from scrai_core.agents.models import Agent
+from scrai_core.core.simulation import Simulation
+from scrai_core.events.inprocess import InProcessBroker, InProcessEventBus
+from scrai_core.world.messaging import Inbox, MessageRouter, inbox_stream
+
+async def _bus():
+    bus = InProcessEventBus(InProcessBroker())
+    await bus.connect()
+    return bus
+
+def test_broadcast_reaches_agents_within_the_radius():
+    router = MessageRouter(MagicMock(), broadcast_radius_km=1.0)
+    sender = Agent(id="a", name="A", latitude=0.0, longitude=0.0)
+    db = MagicMock()
+    # ~0.5 km, ~1.7 km and ~111 km away
+    db.query.return_value.filter.return_value = [("b", 0.0045, 0.0), ("c", 0.0, 0.015), ("d", 1.0, 0.0)]
+    assert router.recipients(db, sender, {"message": "hi"}) == ["b"]
+    assert router.recipients(db, sender, {"message": "hi", "radius_km": 2}) == ["b", "c"]
+
+def test_direct_message_needs_a_known_recipient():
+    router = MessageRouter(MagicMock())
+    sender = Agent(id="a", name="A", latitude=0.0, longitude=0.0)
+    db = MagicMock()
+    db.query.return_value.filter.return_value.first.return_value = ("b",)
+    assert router.recipients(db, sender, {"recipient_id": "b", "message": "hi"}) == ["b"]
+    assert router.recipients(db, sender, {"recipient_id": "a", "message": "hi"}) == []
+    db.query.return_value.filter.return_value.first.return_value = None
+    assert router.recipients(db, sender, {"recipient_id": "ghost", "message": "hi"}) == []
+
+@pytest.mark.asyncio
+async def test_inbox_reads_only_new_messages():
+    bus = await _bus()
+    router = MessageRouter(bus, max_inbox=100)
+    inbox = Inbox(bus, "b", batch_size=2)
+    assert await inbox.read_new() == []
+
+    for i in range(3):
+        await router.deliver("a", ["b", "c"], f"hello {i}", sent_at=time.time(), broadcast=True)
+    assert [message["content"] for message in await inbox.read_new()] == ["hello 0", "hello 1", "hello 2"]
+    assert await inbox.read_new() == []
+
+    await router.deliver("c", ["b"], "just you")
+    [message] = await inbox.read_new()
+    assert (message["sender_id"], message["recipient_id"], message["content"]) == ("c", "b", "just you")
+
+@pytest.mark.asyncio
+async def test_inbox_cursor_survives_reloading_agents(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    bus = await _bus()
+    db = MagicMock()
+    db.query.return_value.all.return_value = [Agent(id="b", name="B", latitude=0.0, longitude=0.0)]
+    simulation = Simulation(bus, db)
+    simulation.load_agents()
+    await MessageRouter(bus, max_inbox=100).deliver("a", ["b"], "hello")
+    assert len(await simulation.agents[0].inbox.read_new()) == 1
+
+    simulation.load_agents()
+    assert await simulation.agents[0].inbox.read_new() == []
+
+@pytest.mark.asyncio
+async def test_inbox_length_is_bounded():
+    bus = await _bus()
+    router = MessageRouter(bus, max_inbox=3)
+    for i in range(5):
+        await router.deliver("a", ["b"], f"m{i}")
+    assert await bus.stream_length(inbox_stream("b")) == 3
+    assert [message["content"] for message in await Inbox(bus, "b").read_new()] == ["m2", "m3", "m4"]
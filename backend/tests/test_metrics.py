@@ -0,0 +1,46 @@
+import pytest
+from uuid import uuid4
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from prometheus_client import REGISTRY
+from scrai_core.core.metrics import observe_stage
+from scrai_core.core.llm_metrics import LLMMetricsCallback, instrument_chat_model
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+@pytest.mark.asyncio
+async def test_observe_stage_records_latency_and_errors():
+    before = sample("cognition_stage_seconds_count", stage="reason", cohort="test")
+    errors_before = sample("cognition_stage_errors_total", stage="reason", cohort="test")
+
+    async with observe_stage("reason", "test", agent_id="a1"):
+        pass
+    with pytest.raises(ValueError):
+        async with observe_stage("reason", "test"):
+            raise ValueError("bad LLM output")
+
+    assert sample("cognition_stage_seconds_count", stage="reason", cohort="test") == before + 2
+    assert sample("cognition_stage_errors_total", stage="reason", cohort="test") == errors_before + 1
+
+@pytest.mark.asyncio
+async def test_instrumented_chat_model_records_calls():
+    llm = instrument_chat_model(FakeListChatModel(responses=["hello"]), "fake", "fake-model")
+    before = sample("llm_request_seconds_count", provider="fake", model="fake-model", outcome="success")
+
+    response = await llm.ainvoke("hi")
+
+    assert response.content == "hello"
+    assert sample("llm_request_seconds_count", provider="fake", model="fake-model", outcome="success") == before + 1
+
+def test_llm_callback_records_token_usage():
+    callback = LLMMetricsCallback("fake", "token-model")
+    run_id = uuid4()
+    message = AIMessage(content="ok", usage_metadata={"input_tokens": 120, "output_tokens": 30, "total_tokens": 150})
+
+    callback.on_chat_model_start({}, [], run_id=run_id)
+    callback.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=run_id)
+
+    assert sample("llm_tokens_sum", provider="fake", model="token-model", kind="prompt") == 120
+    assert sample("llm_tokens_sum", provider="fake", model="token-model", kind="completion") == 30
@@ -0,0 +1,17 @@
+from unittest.mock import MagicMock, patch
+from scrai_core.core.migrations import run_migrations
+
+def _engine(index_exists):
+    engine = MagicMock()
+    engine.connect.return_value.__enter__.return_value.execute.return_value.scalar.return_value = index_exists
+    return engine
+
+@patch("scrai_core.core.migrations.migrate_vector_storage")
+def test_startup_only_checks_the_compact_vector_index(mock_migrate, monkeypatch):
+    monkeypatch.setenv("MEMORY_VECTOR_STORAGE", "half")
+    assert run_migrations(_engine(False)) is False
+    mock_migrate.assert_not_called()
+
+    assert run_migrations(_engine(True)) is True
+    assert run_migrations(_engine(False), build_vector_index=True) is True
+    mock_migrate.assert_called_once()
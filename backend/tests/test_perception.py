@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, AsyncMock, patch
+from scrai_core.agents.cognition import CognitiveAgent
+from scrai_core.agents.models import Agent
+from scrai_core.events.bus import EventBus
+from scrai_core.events.inprocess import InProcessBroker, InProcessEventBus
+from scrai_core.world.models import WorldObject
+from scrai_core.world.perception import PerceptionService
+
+def _session_factory(agents, objects):
+    session = MagicMock()
+    session.query.side_effect = lambda model: MagicMock(all=MagicMock(return_value=agents if model is Agent else objects))
+
+    def factory():
+        yield session
+    return factory, session
+
+def _world():
+    agents = [
+        Agent(id="a", name="A", latitude=1.0, longitude=1.0),
+        Agent(id="b", name="B", latitude=2.0, longitude=2.0),
+    ]
+    objects = [WorldObject(id="well", object_type="resource", position="1.5,1.5", properties={"resource_level": 3})]
+    return agents, objects
+
+@pytest.mark.asyncio
+async def test_view_follows_committed_deltas_without_queries():
+    agents, objects = _world()
+    factory, session = _session_factory(agents, objects)
+    perception = PerceptionService(session_factory=factory, reconcile_seconds=3600)
+
+    me, seen_objects, others = await perception.perceive("a")
+    assert (me.latitude, me.longitude) == (1.0, 1.0)
+    assert [other.id for other in others] == ["b"]
+    assert seen_objects[0].latitude == 1.5 and seen_objects[0].properties == {"resource_level": 3}
+    queries = session.query.call_count
+
+    perception.apply({"entity_id": "b", "action_type": "move", "new_state": {"latitude": 2.5, "longitude": 2.25}})
+    perception.apply({"entity_id": "a", "action_type": "interact_with_object",
+                      "new_state": {"latitude": 1.0, "longitude": 1.0, "object_id": "well", "resource_level": 2}})
+    me, seen_objects, others = await perception.perceive("a")
+    assert (others[0].latitude, others[0].longitude) == (2.5, 2.25)
+    assert seen_objects[0].properties["resource_level"] == 2
+    assert session.query.call_count == queries
+
+@pytest.mark.asyncio
+async def test_unknown_entities_and_age_trigger_a_reconcile():
+    agents, objects = _world()
+    factory, session = _session_factory(agents, objects)
+    perception = PerceptionService(session_factory=factory, reconcile_seconds=3600)
+    await perception.refresh()
+    reconciled = perception.last_reconciled
+
+    agents.append(Agent(id="c", name="C", latitude=3.0, longitude=3.0))
+    perception.apply({"entity_id": "c", "action_type": "move", "new_state": {"latitude": 3.0, "longitude": 3.0}})
+    me, _, _ = await perception.perceive("c")
+    assert me.name == "C"
+    assert perception.last_reconciled > reconciled
+
+    perception.reconcile_seconds = 0.0001
+    perception.last_reconciled -= 1
+    before = session.query.call_count
+    await perception.refresh()
+    assert session.query.call_count == before + 2
+
+@pytest.mark.asyncio
+async def test_events_already_in_the_database_are_not_applied_again():
+    agents, objects = _world()
+    factory, _ = _session_factory(agents, objects)
+    bus = InProcessEventBus(InProcessBroker())
+    await bus.connect()
+    # Committed before the database was read; the database holds a newer position
+    await bus.publish("world_state_committed_events", {"entity_id": "a", "new_state": {"latitude": 0.5, "longitude": 0.5}})
+    perception = PerceptionService(bus, session_factory=factory, reconcile_seconds=3600)
+    follower = asyncio.create_task(perception.run())
+    await asyncio.sleep(0.01)
+
+    await bus.publish("world_state_committed_events", {"entity_id": "b", "new_state": {"latitude": 2.5, "longitude": 2.5}})
+    await asyncio.sleep(0.01)
+    me, _, others = await perception.perceive("a")
+    assert (me.latitude, others[0].latitude) == (1.0, 2.5)
+
+    # Replayed entries at or before the reconciled ID are ignored
+    perception.apply({"entity_id": "a", "new_state": {"latitude": 0.5, "longitude": 0.5}}, perception.reconciled_id)
+    assert perception.agents["a"].latitude == 1.0
+    follower.cancel()
+    await asyncio.gather(follower, return_exceptions=True)
+
+@pytest.mark.asyncio
+@patch("scrai_core.agents.cognition.get_session")
+async def test_cognitive_agent_perceives_from_the_view(mock_get_session):
+    agents, objects = _world()
+    factory, _ = _session_factory(agents, objects)
+    perception = PerceptionService(session_factory=factory)
+    event_bus = MagicMock(spec=EventBus)
+    event_bus.read_range = AsyncMock(return_value=[])
+    agent = CognitiveAgent(agents[0], event_bus, llm=MagicMock(), perception=perception)
+
+    state = await agent._perceive({"agent_model": agents[0]})
+    assert state["agent_model"].name == "A"
+    assert [obj.id for obj in state["nearby_objects"]] == ["well"]
+    assert [other.name for other in state["nearby_agents"]] == ["B"]
+    assert "1 objects and 1 other agents" in state["environmental_context"]
+    mock_get_session.assert_not_called()
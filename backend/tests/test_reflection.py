@@ -66,10 +66,10 @@ async def test_reflection(mock_get_chat_model, setup_database):
     # 2. Create a cognitive agent
     cognitive_agent = CognitiveAgent(agent, event_bus)
 
-    # 3. Manually invoke the reflection step
+    # 3. Manually invoke the reflection step on the memories recall found
     initial_state = {
         "agent_model": agent,
-        "memories": [],
+        "memories": memories_content,
         "relevant_memories": [],
         "nearby_objects": [],
         "next_action": None
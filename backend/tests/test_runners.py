@@ -0,0 +1,144 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+from scrai_core.core.runners import AgentRunner, RunnerOrchestrator, command_stream, result_stream
+from scrai_core.core.simulation import Simulation, partition_for
+from scrai_core.events.inprocess import InProcessBroker, InProcessEventBus
+
+def test_partitions_are_stable_and_balanced():
+    agent_ids = [f"agent-{i}" for i in range(1000)]
+    partitions = [partition_for(agent_id, 4) for agent_id in agent_ids]
+    assert partitions == [partition_for(agent_id, 4) for agent_id in agent_ids]
+    assert all(200 < partitions.count(index) < 300 for index in range(4))
+
+class InLoopOrchestrator(RunnerOrchestrator):
+    """Runs the partitions as tasks on this loop instead of processes."""
+    def __init__(self, broker, simulations, **kwargs):
+        super().__init__(InProcessEventBus(broker), partitions=len(simulations), **kwargs)
+        self.broker = broker
+        self.simulations = simulations
+        self.tasks = []
+
+    def _spawn(self):
+        for index, simulation in enumerate(self.simulations):
+            runner = AgentRunner(index, self.partitions, self.run_id, InProcessEventBus(self.broker), simulation)
+            self.tasks.append(asyncio.create_task(runner.run()))
+
+def _simulation(agents, failed=0, delay=0.0):
+    simulation = MagicMock(spec=Simulation)
+    simulation.agents = agents
+
+    async def tick():
+        await asyncio.sleep(delay)
+        return failed
+
+    simulation.tick = AsyncMock(side_effect=tick)
+    simulation.db_session = MagicMock()
+    return simulation
+
+@pytest.mark.asyncio
+async def test_tick_waits_for_every_partition():
+    simulations = [_simulation([1, 2], delay=0.05), _simulation([3], failed=1)]
+    orchestrator = InLoopOrchestrator(InProcessBroker(), simulations, tick_timeout=5)
+    await orchestrator.start()
+    assert orchestrator.agents_per_partition == {0: 2, 1: 1}
+
+    assert await orchestrator.tick() == 1
+    assert all(simulation.tick.await_count == 1 for simulation in simulations)
+
+    orchestrator.load_agents()
+    await orchestrator.tick()
+    assert all(simulation.load_agents.call_count == 2 for simulation in simulations)
+
+    await orchestrator.stop()
+    await asyncio.wait_for(asyncio.gather(*orchestrator.tasks), 1)
+
+@pytest.mark.asyncio
+async def test_tick_gives_up_on_a_missing_partition():
+    simulations = [_simulation([1]), _simulation([2], delay=1.0)]
+    orchestrator = InLoopOrchestrator(InProcessBroker(), simulations, tick_timeout=0.2)
+    await orchestrator.start()
+    assert await orchestrator.tick() == 0
+    for task in orchestrator.tasks:
+        task.cancel()
+    await asyncio.gather(*orchestrator.tasks, return_exceptions=True)
+
+class TaskProcess:
+    def __init__(self, task):
+        self.task = task
+        self.exitcode = None
+
+    def is_alive(self):
+        return not self.task.done()
+
+class SupervisedOrchestrator(InLoopOrchestrator):
+    """Starts each partition as a task that stands in for its process."""
+    def _spawn(self):
+        self.processes = [self._start_partition(index) for index in range(self.partitions)]
+
+    def _start_partition(self, index):
+        runner = AgentRunner(index, self.partitions, self.run_id, InProcessEventBus(self.broker), self.simulations[index])
+        self.tasks.append(asyncio.create_task(runner.run()))
+        return TaskProcess(self.tasks[-1])
+
+@pytest.mark.asyncio
+async def test_crashed_runner_fails_the_tick_fast_and_is_restarted():
+    crashing = _simulation([2])
+    crashing.tick = AsyncMock(side_effect=[RuntimeError("runner crashed"), 0])
+    simulations = [_simulation([1]), crashing]
+    orchestrator = SupervisedOrchestrator(InProcessBroker(), simulations, tick_timeout=5, supervise_interval=0.01)
+    await orchestrator.start()
+
+    started = asyncio.get_running_loop().time()
+    assert await orchestrator.tick() == 0
+    assert asyncio.get_running_loop().time() - started < 1
+    assert len(orchestrator.tasks) == 3
+
+    # The restarted runner takes the next tick
+    assert await orchestrator.tick() == 0
+    assert crashing.tick.await_count == 2 and crashing.load_agents.call_count == 2
+    for task in orchestrator.tasks:
+        task.cancel()
+    await asyncio.gather(*orchestrator.tasks, return_exceptions=True)
+
+@pytest.mark.asyncio
+async def test_runner_skips_stale_tick_commands():
+    bus = InProcessEventBus(InProcessBroker())
+    simulation = _simulation([1])
+    runner = AgentRunner(0, 1, "run", bus, simulation, start_tick=2)
+    await bus.connect()
+    commands = command_stream("run")
+    await bus.publish(commands, {"tick": 2, "reload": False})
+    await bus.publish(commands, {"tick": 3, "reload": True, "expires_at": time.time() - 1})
+    await bus.publish(commands, {"tick": 4, "reload": False, "expires_at": time.time() + 60})
+    await bus.publish(commands, {"stop": True})
+    await asyncio.wait_for(runner.run(), 1)
+
+    await bus.connect()
+    results = [result for _, result in await bus.read_range(result_stream("run"))]
+    assert [result.get("tick") for result in results] == [None, 4]
+    # The stale reload still happens, on top of the initial load
+    assert simulation.tick.await_count == 1 and simulation.load_agents.call_count == 2
+
+@pytest.mark.asyncio
+async def test_follower_groups_are_removed_on_start_and_stop():
+    broker = InProcessBroker()
+    bus = InProcessEventBus(broker)
+    await bus.connect()
+    # Left behind by an earlier run with more partitions
+    for group in ("perception_group_5", "lod_scheduler_group_5", "perception_group"):
+        reader = asyncio.create_task(bus.subscribe("world_state_committed_events", group, f"{group}_1").__anext__())
+        await asyncio.sleep(0)
+        reader.cancel()
+    orchestrator = InLoopOrchestrator(broker, [_simulation([1])], tick_timeout=5)
+    await orchestrator.start()
+    assert [group["name"] for group in await bus.group_info("world_state_committed_events")] == ["perception_group"]
+    await orchestrator.stop()
+    await asyncio.wait_for(asyncio.gather(*orchestrator.tasks), 1)
+
+@pytest.mark.asyncio
+async def test_runner_processes_need_a_shared_bus():
+    orchestrator = RunnerOrchestrator(InProcessEventBus(InProcessBroker()), partitions=2)
+    with pytest.raises(RuntimeError):
+        orchestrator._spawn()
@@ -0,0 +1,47 @@
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+from scrai_core.agents.models import Agent
+from scrai_core.events.bus import EventBus
+from scrai_core.scenarios.loader import apply_scenario, load_scenario
+from scrai_core.scenarios.schemas import RandomPopulation, Scenario
+from scrai_core.world.models import WorldObject
+from scrai_core.core.headless import HeadlessRunner
+
+def test_prefab_scenario_is_applied():
+    scenario = load_scenario("village")
+    db = MagicMock()
+
+    agents, objects = apply_scenario(db, scenario)
+
+    assert (agents, objects) == (3, 3)
+    added = db.add_all.call_args[0][0]
+    assert [a.name for a in added if isinstance(a, Agent)] == ["Alice", "Bob", "Carol"]
+    well = [o for o in added if isinstance(o, WorldObject) and o.object_type == "well"][0]
+    assert (well.latitude, well.longitude) == (51.5081, -0.0759)
+    db.commit.assert_called_once()
+
+def test_random_population_is_seeded_and_bounded():
+    scenario = Scenario(name="crowd", random=RandomPopulation(agents=20, objects=5, latitude_range=(10, 11), longitude_range=(20, 21), seed=3))
+    first, second = MagicMock(), MagicMock()
+    apply_scenario(first, scenario)
+    apply_scenario(second, scenario)
+
+    positions = lambda db: [(a.latitude, a.longitude) for a in db.add_all.call_args[0][0] if isinstance(a, Agent)]
+    assert positions(first) == positions(second)
+    assert len(positions(first)) == 20
+    assert all(10 <= lat <= 11 and 20 <= lon <= 21 for lat, lon in positions(first))
+
+@pytest.mark.asyncio
+async def test_headless_drain_waits_for_new_entries_only():
+    runner = HeadlessRunner(ticks=1, drain_timeout=1)
+    admin_bus = MagicMock(spec=EventBus)
+
+    # Nothing was published this tick: no wait even though the consumer has seen nothing
+    admin_bus.last_id = AsyncMock(return_value="100-0")
+    assert await runner._drain(admin_bus, "action_events", "100-0", lambda: None, "consumer") == "100-0"
+
+    # New entries: returns once the consumer has processed up to the newest one
+    admin_bus.last_id = AsyncMock(return_value="100-3")
+    assert await runner._drain(admin_bus, "action_events", "100-0", lambda: "100-3", "consumer") == "100-3"
+    with pytest.raises(TimeoutError):
+        await runner._drain(admin_bus, "action_events", "100-0", lambda: "100-2", "consumer")
@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from scrai_core.agents.models import Agent
+from scrai_core.events.inprocess import InProcessBroker, InProcessEventBus
+from scrai_core.events.schemas import ActionEvent
+from scrai_core.world import spatial
+from scrai_core.world.geo import haversine_km
+from scrai_core.world.spatial import SpatialStore, clamp_positions, haversine_matrix, validate_moves
+from scrai_core.world.systems import WorldStateSystem
+
+def _store(count, seed=0):
+    rng = np.random.default_rng(seed)
+    store = SpatialStore()
+    agents = [SimpleNamespace(id=f"agent-{i}", latitude=lat, longitude=lon)
+              for i, (lat, lon) in enumerate(zip(rng.uniform(-60, 60, count), rng.uniform(-180, 180, count)))]
+    objects = [SimpleNamespace(id=f"object-{i}", latitude=lat, longitude=lon)
+               for i, (lat, lon) in enumerate(zip(rng.uniform(-60, 60, count // 2), rng.uniform(-180, 180, count // 2)))]
+    store.load(agents, objects)
+    return store, agents, objects
+
+def test_haversine_matrix_matches_the_scalar_formula():
+    a = np.array([[0.0, 0.0], [51.5, -0.1], [-33.9, 151.2]])
+    b = np.array([[40.7, -74.0], [0.0, 179.9]])
+    expected = [[haversine_km(*p, *q) for q in b] for p in a]
+    assert np.allclose(haversine_matrix(a, b), expected)
+
+def test_nearest_neighbours_for_every_agent(monkeypatch):
+    monkeypatch.setattr(spatial, "CHUNK_ROWS", 64)
+    store, agents, objects = _store(300)
+    nearest = store.nearest_agents(3)
+    nearest_objects = store.nearest_objects(2)
+    for agent in agents[::37]:
+        others = sorted((haversine_km(agent.latitude, agent.longitude, o.latitude, o.longitude), o.id) for o in agents if o is not agent)
+        assert [agent_id for agent_id, _ in nearest[agent.id]] == [agent_id for _, agent_id in others[:3]]
+        assert nearest[agent.id][0][1] == pytest.approx(others[0][0])
+        closest = sorted((haversine_km(agent.latitude, agent.longitude, o.latitude, o.longitude), o.id) for o in objects)
+        assert [object_id for object_id, _ in nearest_objects[agent.id]] == [object_id for _, object_id in closest[:2]]
+    monkeypatch.setattr(spatial, "TOP_K_PASSES", 0)
+    assert store.nearest_agents(3) == nearest
+
+def test_rows_are_stable_and_reused():
+    store = SpatialStore()
+    store.load([SimpleNamespace(id=i, latitude=0.0, longitude=float(n)) for n, i in enumerate("abc")], [])
+    row_c = store.agents.rows["c"]
+    store.agents.remove("b")
+    assert store.agents.rows["c"] == row_c
+    assert store.nearest_agents(5) == {"a": [("c", pytest.approx(222.39, abs=0.01))], "c": [("a", pytest.approx(222.39, abs=0.01))]}
+    store.apply({"entity_id": "d", "new_state": {"latitude": 0.0, "longitude": 0.001}})
+    assert store.agents.rows["d"] == 1
+    assert store.within(0.0, 0.0, 1.0) == ["a", "d"]
+    assert store.has_neighbour(1.0) == {"a": True, "d": True, "c": False}
+
+def test_many_agents_grow_the_arrays():
+    store, agents, _ = _store(200)
+    ids, distances = store.distance_matrix()
+    assert len(ids) == 200 and distances.shape == (200, 200)
+    assert np.allclose(np.diag(distances), 0.0)
+
+def test_clamp_and_validate_moves():
+    targets = np.array([[95.0, 190.0], [10.0, -181.0], [np.nan, 0.0], [1.0, 1.0]])
+    assert np.allclose(clamp_positions(targets[[0, 1, 3]]), [[90.0, -170.0], [10.0, 179.0], [1.0, 1.0]])
+    assert np.allclose(clamp_positions(targets[[0, 3]], (0.0, 0.0, 5.0, 5.0)), [[5.0, 5.0], [1.0, 1.0]])
+    origins = np.zeros((4, 2))
+    assert validate_moves(origins, targets).tolist() == [True, True, False, True]
+    assert validate_moves(origins, targets, max_step_km=200.0).tolist() == [False, False, False, True]
+
+@pytest.mark.asyncio
+async def test_world_state_clamps_and_rejects_moves(monkeypatch):
+    monkeypatch.setenv("MAX_MOVE_KM", "500")
+    agents = [Agent(id=agent_id, name=agent_id, latitude=89.0, longitude=0.0) for agent_id in ("a", "b", "c")]
+    db = MagicMock()
+    db.query.return_value.filter.return_value = agents
+    bus = InProcessEventBus(InProcessBroker())
+    await bus.connect()
+    system = WorldStateSystem(bus, session_factory=lambda: iter([db]))
+
+    def move(agent_id, latitude, longitude):
+        action = ActionEvent(entity_id=agent_id, sequence=0, action_type="move", payload={"new_latitude": latitude, "new_longitude": longitude})
+        return action.model_dump(mode='json')
+
+    await system.process_action_batch([move("a", 91.0, 0.0), move("b", 0.0, 0.0), move("c", "north", 0.0)])
+    committed = {event["entity_id"]: event["new_state"] for _, event in await bus.read_range(system.committed_event_stream)}
+    assert committed == {
+        "a": {"latitude": 90.0, "longitude": 0.0},
+        "b": {"latitude": 89.0, "longitude": 0.0},
+        "c": {"latitude": 89.0, "longitude": 0.0},
+    }
+
+@pytest.mark.asyncio
+async def test_moves_in_one_batch_are_measured_from_the_previous_move(monkeypatch):
+    monkeypatch.setenv("MAX_MOVE_KM", "500")
+    db = MagicMock()
+    db.query.return_value.filter.return_value = [Agent(id="a", name="a", latitude=0.0, longitude=0.0)]
+    bus = InProcessEventBus(InProcessBroker())
+    await bus.connect()
+    system = WorldStateSystem(bus, session_factory=lambda: iter([db]))
+
+    def move(latitude, longitude):
+        action = ActionEvent(entity_id="a", sequence=0, action_type="move", payload={"new_latitude": latitude, "new_longitude": longitude})
+        return action.model_dump(mode='json')
+
+    # About 445 km each from the previous position; the last is 950 km from (8, 0) but 334 km from the start
+    await system.process_action_batch([move(4.0, 0.0), move(8.0, 0.0), move(0.0, 3.0)])
+    committed = [event["new_state"] for _, event in await bus.read_range(system.committed_event_stream)]
+    assert committed == [
+        {"latitude": 4.0, "longitude": 0.0},
+        {"latitude": 8.0, "longitude": 0.0},
+        {"latitude": 8.0, "longitude": 0.0},
+    ]
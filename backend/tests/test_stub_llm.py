@@ -0,0 +1,66 @@
+import json
+import random
+import pytest
+from scrai_core.core.stub_llm import SUMMARIES, StubChatModel, StubLLMError, parse_latency
+from scrai_core.events.schemas import ActionEvent
+
+REASON_PROMPT = """
+        You are Agent Alice.
+        Your current position is latitude 10.0, longitude 20.0.
+        Nearby objects are:
+        - Object ID: obj_1, Type: resource, Latitude: 10.1, Longitude: 20.1
+        Nearby agents are:
+        - Agent ID: agent_2, Name: Bob, Latitude: 9.0, Longitude: 19.0
+        Your response must be a JSON object representing an ActionEvent.
+"""
+
+REFLECT_PROMPT = """
+        You are Agent Alice.
+        Based on the following recent memories, what are 1-3 high-level insights or reflections?
+"""
+
+@pytest.mark.asyncio
+async def test_stub_returns_schema_valid_actions():
+    llm = StubChatModel(seed=1)
+    for _ in range(50):
+        response = await llm.ainvoke(REASON_PROMPT)
+        action = json.loads(response.content)
+        ActionEvent(entity_id="alice", sequence=0, **action)
+        if action["action_type"] == "interact_with_object":
+            assert action["payload"]["object_id"] == "obj_1"
+        elif action["action_type"] == "communicate":
+            assert action["payload"]["recipient_id"] == "agent_2"
+        else:
+            assert abs(action["payload"]["new_latitude"] - 10.0) <= llm.step_degrees
+
+    reflection = await llm.ainvoke(REFLECT_PROMPT)
+    assert reflection.content.startswith("- ")
+
+    summary = await llm.ainvoke("You are Agent alice. Summarize these events from your recent past as one short memory.")
+    assert summary.content in SUMMARIES
+
+@pytest.mark.asyncio
+async def test_stub_is_deterministic_per_seed():
+    first, second, other = StubChatModel(seed=7), StubChatModel(seed=7), StubChatModel(seed=8)
+    run = lambda llm: [llm.invoke(REASON_PROMPT).content for _ in range(20)]
+    assert run(first) == run(second)
+    assert run(first) != run(other)
+
+@pytest.mark.asyncio
+async def test_stub_injects_failures_and_malformed_output():
+    with pytest.raises(StubLLMError):
+        await StubChatModel(failure_rate=1.0).ainvoke(REASON_PROMPT)
+
+    response = await StubChatModel(malformed_rate=1.0).ainvoke(REASON_PROMPT)
+    with pytest.raises((ValueError, KeyError)):
+        action = json.loads(response.content)
+        action["action_type"], action["payload"]
+
+def test_latency_distributions():
+    rng = random.Random(0)
+    assert parse_latency("fixed:250")(rng) == 0.25
+    assert all(0.05 <= parse_latency("uniform:50,100")(rng) <= 0.1 for _ in range(100))
+    samples = sorted(parse_latency("lognormal:200,0.5")(rng) for _ in range(1000))
+    assert 0.17 < samples[500] < 0.23
+    with pytest.raises(ValueError):
+        parse_latency("pareto:1")